@@ -1,26 +1,28 @@
+import codecs
 import logging
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from api.routers.tournament import alterable_tournament, visible_tournament
-from api.schemas.competitor import Competitor as CompetitorSchema, CompetitorCreate, CompetitorUpdate
+from api.schemas.competitor import Competitor as CompetitorSchema, CompetitorCreate, CompetitorUpdate, CompetitorImport
 from database.db import get_db
 from database.models import Tournament, Competitor
+from lib.roster_import import RosterError
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/tournaments/{tournament_id}/competitors', tags=['competitor'])
 
 
-async def get_competitor_by_id(competitor_id: int, db: Session = Depends(get_db)) -> Optional[Competitor]:
+def get_competitor_by_id(competitor_id: int, db: Session = Depends(get_db)) -> Optional[Competitor]:
     return Competitor.by_id(competitor_id, db)
 
 
 @router.post('/', response_model=CompetitorSchema, status_code=status.HTTP_201_CREATED)
-async def create_competitor(
+def create_competitor(
         tournament_id: int,
         competitor: CompetitorCreate,
         tournament: Tournament = Depends(alterable_tournament),
@@ -46,7 +48,7 @@ async def create_competitor(
 
 # noinspection PyTypeChecker
 @router.post('/batch', response_model=List[CompetitorSchema], status_code=status.HTTP_201_CREATED)
-async def create_competitors(
+def create_competitors(
         tournament_id: int,
         competitors: List[CompetitorCreate],
         tournament: Tournament = Depends(alterable_tournament),
@@ -71,9 +73,38 @@ async def create_competitors(
             )
 
 
+@router.post('/import', response_model=CompetitorImport, status_code=status.HTTP_201_CREATED)
+def import_competitors(
+        tournament_id: int,
+        roster: UploadFile = File(...),
+        tournament: Tournament = Depends(alterable_tournament),
+        db: Session = Depends(get_db),
+):
+    """
+    Adds the competitors in an uploaded CSV roster to the given tournament if the current user owns it. The header
+    names the competitor fields in the file. Rows that aren't valid competitors are skipped and returned as errors with
+    their line numbers.
+    """
+    if not tournament:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'No tournament found with id {tournament_id}',
+        )
+    else:
+        try:
+            competitors, errors = Competitor.import_csv(tournament, codecs.iterdecode(roster.file, 'utf-8-sig'), db)
+        except RosterError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e),
+            )
+        return {'competitors': competitors, 'errors': errors}
+
+
 # noinspection PyTypeChecker
 @router.get('/', response_model=List[CompetitorSchema])
-async def get_competitors(
+def get_competitors(
         tournament_id: int,
         tournament: Tournament = Depends(visible_tournament),
 ):
@@ -91,7 +122,7 @@ async def get_competitors(
 
 # noinspection PyTypeChecker
 @router.put('/', response_model=List[CompetitorSchema])
-async def update_competitors(
+def update_competitors(
         tournament_id: int,
         competitors: List[CompetitorCreate],
         tournament: Tournament = Depends(alterable_tournament),
@@ -103,24 +134,18 @@ async def update_competitors(
             detail=f'No tournament found with id {tournament_id}',
         )
     else:
-        # Delete all the existing competitors and create new ones
-        tournament.delete_competitors(db, autocommit=False)
         try:
-            Competitor.create_batch(tournament, competitors, db, autocommit=False)
+            return Competitor.replace_all(tournament, competitors, db)
         except IntegrityError:
             db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail='Competitors must have at least a last name or an organization',
             )
-        else:
-            db.commit()
-            db.refresh(tournament)
-            return tournament.competitors
 
 
 @router.get('/{competitor_id}', response_model=CompetitorSchema)
-async def get_competitor(
+def get_competitor(
         tournament_id: int,
         competitor_id: int,
         tournament: Tournament = Depends(visible_tournament),
@@ -139,7 +164,7 @@ async def get_competitor(
 
 
 @router.put('/{competitor_id}', response_model=CompetitorSchema)
-async def update_competitor(
+def update_competitor(
         tournament_id: int,
         competitor_id: int,
         competitor_data: CompetitorUpdate,
@@ -162,7 +187,7 @@ async def update_competitor(
 
 
 @router.delete('/{competitor_id}')
-async def delete_competitor(
+def delete_competitor(
         tournament_id: int,
         competitor_id: int,
         tournament: Tournament = Depends(alterable_tournament),
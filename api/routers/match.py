@@ -1,16 +1,70 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
-from api.routers.tournament import visible_tournament
-from database.models import Tournament
+from api.routers.stage import get_stage_by_id, get_stage_detail_by_id
+from api.routers.tournament import alterable_tournament, visible_tournament
+from api.schemas.match import Match as MatchSchema, MatchUpdate
+from database.db import get_db
+from database.models import Tournament, Stage, Match, TournamentError
 
-router = APIRouter(prefix='/tournaments/{tournament_id}/stages/{stage_id}}/matches', tags=['match'])
+router = APIRouter(prefix='/tournaments/{tournament_id}/stages/{stage_id}/matches', tags=['match'])
 
 
+def get_match_by_id(match_id: int, db: Session = Depends(get_db)) -> Optional[Match]:
+    return Match.by_id(match_id, db)
+
+
+# noinspection PyTypeChecker
 @router.get('/', response_model=List[MatchSchema])
-async def get_matches(
+def get_matches(
+        tournament_id: int,
+        stage_id: int,
+        tournament: Tournament = Depends(visible_tournament),
+        stage: Stage = Depends(get_stage_detail_by_id),
+):
+    """
+    Gets the matches that have been created so far for the given stage, if it exists within the given tournament and
+    is visible to the current user. Lazy stages report how many rounds are still to come on the stage itself.
+    """
+    if not tournament or not stage or stage.tournament != tournament:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'No stage found with id {stage_id} for tournament {tournament_id}',
+        )
+    else:
+        return sorted((match for pool in stage.pools for match in pool.matches), key=lambda match: match.ordinal)
+
+
+@router.put('/{match_id}', response_model=MatchSchema)
+def update_match(
         tournament_id: int,
         stage_id: int,
-        tournament: Tournament = Depends(visible_tournament)):
-    pass
+        match_id: int,
+        match_data: MatchUpdate,
+        tournament: Tournament = Depends(alterable_tournament),
+        stage: Stage = Depends(get_stage_by_id),
+        match: Match = Depends(get_match_by_id),
+        db: Session = Depends(get_db),
+):
+    """
+    Records the scores and status of the match with the given ID if it exists within the given stage and is editable
+    by the current user
+    """
+    if not tournament or not stage or stage.tournament != tournament or not match or match.pool.stage != stage:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'No match found with id {match_id} for stage {stage_id}',
+        )
+    else:
+        try:
+            match.update(match_data, db)
+        except (IntegrityError, TournamentError) as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e),
+            )
+        return match
@@ -69,7 +69,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-async def get_current_user(token: str = Depends(oath2_scheme), db: Session = Depends(get_db)):
+def get_current_user(token: str = Depends(oath2_scheme), db: Session = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -89,27 +89,27 @@ async def get_current_user(token: str = Depends(oath2_scheme), db: Session = Dep
     return user
 
 
-async def get_current_user_or_none(token: str = Depends(oath2_scheme_allow_anonymous), db: Session = Depends(get_db)):
+def get_current_user_or_none(token: str = Depends(oath2_scheme_allow_anonymous), db: Session = Depends(get_db)):
     if token:
-        return await get_current_user(token, db)
+        return get_current_user(token, db)
     else:
         return None
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Inactive user')
     return current_user
 
 
-async def get_current_active_user_or_none(current_user: User = Depends(get_current_user_or_none)):
+def get_current_active_user_or_none(current_user: User = Depends(get_current_user_or_none)):
     if current_user:
-        return await get_current_active_user(current_user=current_user)
+        return get_current_active_user(current_user=current_user)
     return None
 
 
 @router.post('/token', response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
@@ -4,22 +4,30 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi import status
 from sqlalchemy.orm import Session
 
-from api.routers.tournament import alterable_tournament, visible_tournament
+from api.routers.tournament import alterable_tournament, visible_tournament, visible_tournament_detail
 from api.schemas.stage import StageCreate, Stage as StageSchema
+from api.schemas.standings import PoolStandings
 from database.db import get_db
-from database.models import Stage, Tournament
+from database.models import Stage, Tournament, TournamentError
 
 # All routes will receive a tournament_id path parameter
 router = APIRouter(prefix='/tournaments/{tournament_id}/stages', tags=['stage'])
 
 
-async def get_stage_by_id(stage_id: int, db: Session = Depends(get_db)) -> Optional[Stage]:
+def get_stage_by_id(stage_id: int, db: Session = Depends(get_db)) -> Optional[Stage]:
     return Stage.by_id(stage_id, db)
 
 
+def get_stage_detail_by_id(stage_id: int, db: Session = Depends(get_db)) -> Optional[Stage]:
+    """
+    Same as get_stage_by_id, but loads the pools, matches and competitors along with it for responses that include them
+    """
+    return Stage.by_id(stage_id, db, load_detail=True)
+
+
 # noinspection PyTypeChecker
 @router.post('/', response_model=List[StageSchema], status_code=status.HTTP_201_CREATED)
-async def create_stage(
+def create_stage(
         tournament_id: int,
         stages: List[StageCreate],
         tournament: Tournament = Depends(alterable_tournament),
@@ -45,9 +53,9 @@ async def create_stage(
 
 # noinspection PyTypeChecker
 @router.get('/', response_model=List[StageSchema])
-async def get_stages(
+def get_stages(
         tournament_id: int,
-        tournament: Tournament = Depends(visible_tournament),
+        tournament: Tournament = Depends(visible_tournament_detail),
 ):
     """
     Gets all stages for the given tournament, if it exists and is visible to the current user
@@ -63,7 +71,7 @@ async def get_stages(
 
 # noinspection PyTypeChecker
 @router.put('/', response_model=List[StageSchema])
-async def update_stages(
+def update_stages(
         tournament_id: int,
         stages: List[StageCreate],
         tournament: Tournament = Depends(alterable_tournament),
@@ -86,11 +94,11 @@ async def update_stages(
 
 
 @router.get('/{stage_id}', response_model=StageSchema)
-async def get_stage(
+def get_stage(
         tournament_id: int,
         stage_id: int,
         tournament: Tournament = Depends(visible_tournament),
-        stage: Stage = Depends(get_stage_by_id),
+        stage: Stage = Depends(get_stage_detail_by_id),
 ):
     """
     Gets the stage with the given ID, if it exists within the given tournament and is visible to the current user
@@ -104,8 +112,93 @@ async def get_stage(
         return stage
 
 
+# noinspection PyTypeChecker
+@router.get('/{stage_id}/standings', response_model=List[PoolStandings])
+def get_stage_standings(
+        tournament_id: int,
+        stage_id: int,
+        tournament: Tournament = Depends(visible_tournament),
+        stage: Stage = Depends(get_stage_by_id),
+        db: Session = Depends(get_db),
+):
+    """
+    Gets the standings of each pool in the stage with the given ID, from the matches completed so far, if it exists
+    within the given tournament and is visible to the current user. Only pool stages have standings.
+    """
+    if not tournament or not stage or stage.tournament != tournament:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'No stage found with id {stage_id} for tournament {tournament_id}',
+        )
+    elif stage.type != Stage.StageType.POOL:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Only pool stages have standings',
+        )
+    else:
+        return [{'pool_id': pool_id, 'standings': standings} for pool_id, standings in stage.standings(db).items()]
+
+
+@router.post('/{stage_id}/rounds', response_model=StageSchema, status_code=status.HTTP_201_CREATED)
+def create_stage_round(
+        tournament_id: int,
+        stage_id: int,
+        tournament: Tournament = Depends(alterable_tournament),
+        stage: Stage = Depends(get_stage_by_id),
+        db: Session = Depends(get_db),
+):
+    """
+    Creates the matches for the next round of a lazy stage, if it exists within the given tournament and is editable by
+    the current user. Rounds are normally created as the previous one completes, this lets them be created early.
+    """
+    if not tournament or not stage or stage.tournament != tournament:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'No stage found with id {stage_id} for tournament {tournament_id}',
+        )
+    else:
+        try:
+            stage.materialize_next_round(db, autocommit=False)
+            stage.schedule_matches(db)
+        except TournamentError as e:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e),
+            )
+        return stage
+
+
+@router.post('/{stage_id}/schedule', response_model=StageSchema)
+def schedule_stage_matches(
+        tournament_id: int,
+        stage_id: int,
+        tournament: Tournament = Depends(alterable_tournament),
+        stage: Stage = Depends(get_stage_by_id),
+        db: Session = Depends(get_db),
+):
+    """
+    Assigns the pending matches of the stage with the given ID to courts and start slots, if it exists within the given
+    tournament and is editable by the current user. Matches are normally rescheduled as results come in, this picks up
+    changes to the stage's courts, match_duration or minimum_rest params.
+    """
+    if not tournament or not stage or stage.tournament != tournament:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f'No stage found with id {stage_id} for tournament {tournament_id}',
+        )
+    elif stage.status != Stage.StageStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='Only the matches of active stages can be scheduled',
+        )
+    else:
+        stage.schedule_matches(db)
+        return stage
+
+
 @router.delete('/{stage_id}')
-async def delete_stage(
+def delete_stage(
         tournament_id: int,
         stage_id: int,
         tournament: Tournament = Depends(alterable_tournament),
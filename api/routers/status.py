@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+
+from api.schemas.status import PoolStatus
+from database.db import pool_status
+
+router = APIRouter(prefix='/status', tags=['status'])
+
+
+@router.get('/pool', response_model=PoolStatus)
+async def get_pool_status():
+    """
+    Returns how many database connections this worker has open and how many are in use
+    """
+    return pool_status()
@@ -1,4 +1,8 @@
-from typing import Optional
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
 
 from fastapi import Depends, APIRouter, HTTPException
 from fastapi import status
@@ -13,7 +17,27 @@ from database.models import User, Tournament
 router = APIRouter(prefix='/tournaments', tags=['tournament'])
 
 
-async def visible_tournament(
+def encode_cursor(tournament: Tournament) -> str:
+    """
+    Returns the cursor for the page after the given tournament. Clients should treat it as opaque.
+    """
+    position = json.dumps([tournament.start_date.isoformat(), tournament.id])
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Returns the (start_date, id) a cursor points after
+    :raises ValueError: if the cursor wasn't made by encode_cursor
+    """
+    try:
+        start_date, tournament_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(start_date), int(tournament_id)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError(f'Invalid cursor {cursor!r}') from e
+
+
+def visible_tournament(
         tournament_id: int,
         current_user: Optional[User] = Depends(get_current_active_user_or_none),
         db: Session = Depends(get_db),
@@ -21,7 +45,19 @@ async def visible_tournament(
     return Tournament.by_id_visible(tournament_id, current_user, db)
 
 
-async def alterable_tournament(
+def visible_tournament_detail(
+        tournament_id: int,
+        current_user: Optional[User] = Depends(get_current_active_user_or_none),
+        db: Session = Depends(get_db),
+) -> Optional[Tournament]:
+    """
+    Same as visible_tournament, but loads the stages, pools, matches and competitors along with it for responses that
+    include them
+    """
+    return Tournament.by_id_visible(tournament_id, current_user, db, load_detail=True)
+
+
+def alterable_tournament(
         tournament: Tournament = Depends(visible_tournament),
         current_user: Optional[User] = Depends(get_current_active_user_or_none),
 ) -> Optional[Tournament]:
@@ -32,7 +68,7 @@ async def alterable_tournament(
 
 
 @router.post('/', response_model=TournamentSchema, status_code=status.HTTP_201_CREATED)
-async def create_tournament(
+def create_tournament(
         tournament: TournamentCreate,
         current_user: User = Depends(get_current_active_user),
         db: Session = Depends(get_db),
@@ -45,26 +81,35 @@ async def create_tournament(
 
 # noinspection PyTypeChecker
 @router.get('/', response_model=TournamentList)
-async def get_tournaments(
-        is_filtered_by_user: bool = False, skip: int = 0, limit: int = 100,
+def get_tournaments(
+        is_filtered_by_user: bool = False, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
         current_user: Optional[User] = Depends(get_current_active_user_or_none),
         db: Session = Depends(get_db),
 ):
     """
-    Return all public tournaments and any private tournaments owned by the current_user, if present
+    Return all public tournaments and any private tournaments owned by the current_user, if present.
+
+    Page through them by passing the next_cursor of each page back as cursor, which stays fast however deep the
+    listing goes. skip still works, but has to walk past every skipped tournament.
     """
-    tournament_count = len(Tournament.get_all_visible(current_user, db, is_filtered_by_user))
-    tournaments = Tournament.get_all_visible(current_user, db, is_filtered_by_user, skip, limit)
+    try:
+        after = decode_cursor(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
+
+    tournament_count = Tournament.count_visible(current_user, db, is_filtered_by_user)
+    tournaments = Tournament.get_all_visible(current_user, db, is_filtered_by_user, skip, limit, after)
     return {
         'total': tournament_count,
         'items': tournaments,
+        'next_cursor': encode_cursor(tournaments[-1]) if tournaments and len(tournaments) == limit else None,
     }
 
 
 @router.get('/{tournament_id}', response_model=TournamentSchema)
-async def get_tournament(
+def get_tournament(
         tournament_id: int,
-        tournament: Tournament = Depends(visible_tournament),
+        tournament: Tournament = Depends(visible_tournament_detail),
 ):
     """
     Gets the tournament with the given ID, if it exists and is visible to the current user
@@ -79,7 +124,7 @@ async def get_tournament(
 
 
 @router.put('/{tournament_id}', response_model=TournamentSchema)
-async def update_tournament(
+def update_tournament(
         tournament_id: int,
         tournament_data: TournamentUpdate,
         tournament: Tournament = Depends(alterable_tournament),
@@ -100,7 +145,7 @@ async def update_tournament(
 
 
 @router.post('/{tournament_id}/status', response_model=TournamentSchema, status_code=status.HTTP_201_CREATED)
-async def create_tournament_status(
+def create_tournament_status(
         tournament_id: int,
         status_data: Status,
         tournament: Tournament = Depends(alterable_tournament),
@@ -118,7 +163,7 @@ async def create_tournament_status(
 
 
 @router.delete('/{tournament_id}')
-async def delete_tournament(
+def delete_tournament(
         tournament_id: int,
         tournament: Tournament = Depends(alterable_tournament),
         current_user: User = Depends(get_current_active_user),
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -8,6 +8,8 @@ class CompetitorBase(BaseModel):
     last_name: Optional[str]
     organization: Optional[str]
     location: Optional[str]
+    rating: Optional[int]
+    minimum_rest: Optional[int]
 
 
 class CompetitorCreate(CompetitorBase):
@@ -24,3 +26,16 @@ class Competitor(CompetitorBase):
 
     class Config:
         orm_mode = True
+
+
+class CompetitorImportError(BaseModel):
+    line: int
+    detail: str
+
+    class Config:
+        orm_mode = True
+
+
+class CompetitorImport(BaseModel):
+    competitors: List[Competitor]
+    errors: List[CompetitorImportError]
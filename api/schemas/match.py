@@ -5,15 +5,25 @@ from pydantic import BaseModel
 from api.schemas.competitor import Competitor
 
 
+class MatchUpdate(BaseModel):
+    competitor_1_score: Optional[int]
+    competitor_2_score: Optional[int]
+    status: int
+
+
 class Match(BaseModel):
     id: int
     ordinal: int
+    round: Optional[int]
     competitor_1: Optional[Competitor]
     competitor_1_score: Optional[int]
     competitor_2: Optional[Competitor]
     competitor_2_score: Optional[int]
     next_match_id: Optional[int]
+    loser_next_match_id: Optional[int]
     status: int
+    court: Optional[int]
+    slot: Optional[int]
 
     class Config:
         orm_mode = True
@@ -8,6 +8,10 @@ from api.schemas.match import Match
 class Pool(BaseModel):
     id: int
     ordinal: int
+    match_count: int
+    pending_match_count: int
+    active_match_count: int
+    complete_match_count: int
     matches: List[Match]
 
     class Config:
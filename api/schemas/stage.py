@@ -19,6 +19,11 @@ class Stage(StageBase):
     tournament_id: int
     ordinal: int
     status: int
+    pending_rounds: int
+    match_count: int
+    pending_match_count: int
+    active_match_count: int
+    complete_match_count: int
     pools: List[Pool]
 
     class Config:
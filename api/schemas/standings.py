@@ -0,0 +1,25 @@
+from typing import List
+
+from pydantic.main import BaseModel
+
+
+class Standing(BaseModel):
+    competitor_id: int
+    place: int
+    played: int
+    wins: int
+    draws: int
+    losses: int
+    score: float
+    points_for: int
+    points_against: int
+    differential: int
+    head_to_head: float
+
+    class Config:
+        orm_mode = True
+
+
+class PoolStandings(BaseModel):
+    pool_id: int
+    standings: List[Standing]
@@ -40,6 +40,8 @@ class TournamentDetail(TournamentBasic):
 class TournamentList(BaseModel):
     total: int
     items: List[TournamentBasic]
+    # Pass back as cursor to get the next page, None on the last one
+    next_cursor: Optional[str]
 
 
 class Status(BaseModel):
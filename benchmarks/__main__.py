@@ -0,0 +1,60 @@
+"""
+Benchmarks match generation and stage progression against synthetic tournaments.
+
+    python -m benchmarks --save benchmarks/baseline.json
+    python -m benchmarks --compare benchmarks/baseline.json
+
+Comparing exits with status 1 if any case regressed beyond the tolerance.
+"""
+import argparse
+import sys
+
+from benchmarks.cases import CASES, DEFAULT_SIZES, BenchmarkDatabase
+from benchmarks.harness import Results, find_regressions, load_results, save_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='number of competitors in each synthetic tournament')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs per case, the fastest is kept')
+    parser.add_argument('--save', metavar='PATH', help='write the results to a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare the results against a JSON baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='fraction time and memory may grow by before counting as a regression')
+    args = parser.parse_args(argv)
+
+    database = BenchmarkDatabase() if any(CASES[case].uses_database for case in args.cases) else None
+    results: Results = {}
+    try:
+        print(f'{"case":<22}{"size":>7}{"seconds":>12}{"peak MiB":>11}{"statements":>12}')
+        for case in args.cases:
+            for size in args.sizes:
+                measurement = CASES[case].run(size, args.repeats, database)
+                results.setdefault(case, {})[str(size)] = measurement._asdict()
+                print(f'{case:<22}{size:>7}{measurement.seconds:>12.4f}'
+                      f'{measurement.peak_memory / 2 ** 20:>11.2f}{measurement.statements:>12}')
+    finally:
+        if database:
+            database.dispose()
+
+    if args.save:
+        save_results(args.save, results)
+        print(f'Saved results to {args.save}')
+
+    if args.compare:
+        regressions = find_regressions(load_results(args.compare), results, tolerance=args.tolerance)
+        if regressions:
+            print(f'{len(regressions)} regression(s) against {args.compare}:')
+            for regression in regressions:
+                print(f'  {regression}')
+            return 1
+        print(f'No regressions against {args.compare}')
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
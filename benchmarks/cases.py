@@ -0,0 +1,211 @@
+from datetime import datetime
+from random import Random
+from typing import Callable, Dict, List, NamedTuple
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from api.schemas.competitor import CompetitorCreate
+from benchmarks.harness import Measurement, measure
+from database.db import Base
+from database.models import User, Tournament, Stage, Competitor, Match
+from lib.match_generators.ordering import order_rounds_for_rest
+from lib.match_generators.pool_assignment import PoolEntrant, assign_pools
+from lib.match_generators.round_robin import round_robin_rounds
+from lib.match_generators.swiss import SwissPlayer, default_num_rounds, swiss_pairings
+from settings import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
+
+DEFAULT_SIZES = (16, 64, 256, 1024, 4096, 10000)
+# Pool size used for the synthetic pool stages, the most common setting at real events
+POOL_SIZE = 5
+NUM_ORGANIZATIONS = 20
+
+
+class BenchmarkDatabase:
+    """
+    A scratch database, separate from the app and test databases, that is recreated from the models on every run.
+    """
+
+    def __init__(self, name: str = f'{DB_NAME}_bench'):
+        server_url = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}'
+        with create_engine(server_url, isolation_level='AUTOCOMMIT').connect() as connection:
+            connection.execute(f'drop database if exists {name}')
+            connection.execute(f'create database {name}')
+
+        self.engine = create_engine(f'{server_url}/{name}')
+        self.session_local = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.create_all(self.engine)
+
+    def reset(self):
+        tables = ', '.join(f'"{table.name}"' for table in Base.metadata.sorted_tables)
+        with self.engine.begin() as connection:
+            connection.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
+
+    def dispose(self):
+        self.engine.dispose()
+
+
+class Case(NamedTuple):
+    description: str
+    uses_database: bool
+    run: Callable[[int, int, BenchmarkDatabase], Measurement]
+
+
+def synthetic_competitors(size: int, seed: int = 0) -> List[CompetitorCreate]:
+    """
+    Builds size competitors spread across a handful of organizations, with ratings so seeding has work to do.
+    """
+    rng = Random(seed)
+    return [
+        CompetitorCreate(
+            first_name=f'First {idx}',
+            last_name=f'Last {idx}',
+            organization=f'Organization {rng.randrange(NUM_ORGANIZATIONS)}',
+            location=None,
+            rating=rng.randrange(3000),
+        )
+        for idx in range(size)
+    ]
+
+
+def _synthetic_pools(size: int) -> List[List[int]]:
+    entrants = [PoolEntrant(competitor_id, competitor.rating, competitor.organization)
+                for competitor_id, competitor in enumerate(synthetic_competitors(size))]
+    return assign_pools(entrants, max(size // POOL_SIZE, 1), seeded=True, spread_organizations=True)
+
+
+def _create_tournament(db, size: int, stage_types: List[int]) -> Tournament:
+    user = User(email='benchmark@example.com', password='benchmark')
+    tournament = Tournament(name='Benchmark', start_date=datetime.now(), owner=user,
+                            status=Tournament.TournamentStatus.READY)
+    db.add(tournament)
+    db.flush()
+    for ordinal, stage_type in enumerate(stage_types):
+        params = {'minimum_pool_size': POOL_SIZE, 'seeded': True, 'spread_organizations': True} \
+            if stage_type == Stage.StageType.POOL else {'seeded': True}
+        db.add(Stage(tournament=tournament, ordinal=ordinal, type=stage_type, params=params))
+    Competitor.create_batch(tournament, synthetic_competitors(size), db, autocommit=False)
+    db.commit()
+    return tournament
+
+
+def run_pairing(size: int, repeats: int, _) -> Measurement:
+    def run(pools):
+        return [round_robin_rounds(competitor_ids) for competitor_ids in pools]
+
+    return measure(lambda: _synthetic_pools(size), run, repeats=repeats)
+
+
+def run_ordering(size: int, repeats: int, _) -> Measurement:
+    def run(pool_rounds):
+        return [order_rounds_for_rest(rounds) for rounds in pool_rounds]
+
+    return measure(lambda: [round_robin_rounds(competitor_ids) for competitor_ids in _synthetic_pools(size)], run,
+                   repeats=repeats)
+
+
+def run_swiss_pairing(size: int, repeats: int, _) -> Measurement:
+    def setup():
+        # Play all but the last round with random results, so the round being paired has score groups and rematches
+        # to work around
+        rng = Random(0)
+        players = {competitor_id: SwissPlayer(competitor_id, rating=competitor.rating)
+                   for competitor_id, competitor in enumerate(synthetic_competitors(size))}
+        for _ in range(default_num_rounds(size) - 1):
+            pairings, bye = swiss_pairings(list(players.values()))
+            for competitor_1_id, competitor_2_id in pairings:
+                result = rng.choice((1, 0.5, 0))
+                player_1, player_2 = players[competitor_1_id], players[competitor_2_id]
+                players[competitor_1_id] = player_1._replace(score=player_1.score + result,
+                                                             opponents=player_1.opponents | {competitor_2_id})
+                players[competitor_2_id] = player_2._replace(score=player_2.score + 1 - result,
+                                                             opponents=player_2.opponents | {competitor_1_id})
+            if bye is not None:
+                players[bye] = players[bye]._replace(score=players[bye].score + 1, had_bye=True)
+        return list(players.values())
+
+    return measure(setup, swiss_pairings, repeats=repeats)
+
+
+def _database_case(database: BenchmarkDatabase, repeats: int, prepare: Callable, run: Callable) -> Measurement:
+    """
+    Wraps a benchmark that needs a session. prepare(db) builds the data to work on and returns the state passed to
+    run(db, state), and every run starts from an empty database.
+    """
+    def setup():
+        database.reset()
+        db = database.session_local()
+        return db, prepare(db)
+
+    def teardown(state):
+        state[0].close()
+
+    return measure(setup, lambda state: run(*state), teardown, repeats=repeats, engine=database.engine)
+
+
+def run_orm_flush(size: int, repeats: int, database: BenchmarkDatabase) -> Measurement:
+    competitors = synthetic_competitors(size)
+
+    def prepare(db):
+        return _create_tournament(db, 0, [Stage.StageType.POOL])
+
+    def run(db, tournament):
+        Competitor.create_batch(tournament, competitors, db)
+
+    return _database_case(database, repeats, prepare, run)
+
+
+def run_progress_pools(size: int, repeats: int, database: BenchmarkDatabase) -> Measurement:
+    def prepare(db):
+        return _create_tournament(db, size, [Stage.StageType.POOL])
+
+    def run(db, tournament):
+        tournament.progress(db)
+
+    return _database_case(database, repeats, prepare, run)
+
+
+def run_progress_to_bracket(size: int, repeats: int, database: BenchmarkDatabase) -> Measurement:
+    def prepare(db):
+        tournament = _create_tournament(db, size, [Stage.StageType.POOL, Stage.StageType.BRACKET_DOUBLE_ELIMINATION])
+        tournament.progress(db)
+        db.query(Match).update({Match.status: Match.MatchStatus.COMPLETE})
+        db.commit()
+        # Start from a cold session like a fresh request would
+        db.expire_all()
+        return tournament
+
+    def run(db, tournament):
+        tournament.progress(db)
+
+    return _database_case(database, repeats, prepare, run)
+
+
+def run_standings(size: int, repeats: int, database: BenchmarkDatabase) -> Measurement:
+    def prepare(db):
+        tournament = _create_tournament(db, size, [Stage.StageType.POOL])
+        tournament.progress(db)
+        db.query(Match).update({
+            Match.status: Match.MatchStatus.COMPLETE,
+            Match.competitor_1_score: func.floor(func.random() * 10),
+            Match.competitor_2_score: func.floor(func.random() * 10),
+        }, synchronize_session=False)
+        db.commit()
+        return tournament.stages[0]
+
+    def run(db, stage):
+        stage.standings(db)
+
+    return _database_case(database, repeats, prepare, run)
+
+
+CASES: Dict[str, Case] = {
+    'pairing': Case('Pool assignment output to round robin pairings', False, run_pairing),
+    'ordering': Case('Round robin rounds to rest ordering', False, run_ordering),
+    'swiss_pairing': Case('Pairing the last round of a swiss stage', False, run_swiss_pairing),
+    'orm_flush': Case('Flushing a batch of competitors through the ORM', True, run_orm_flush),
+    'progress_pools': Case('Tournament.progress starting a pool stage', True, run_progress_pools),
+    'progress_to_bracket': Case('Tournament.progress completing pools and starting a double elimination bracket',
+                                True, run_progress_to_bracket),
+    'standings': Case('Stage.standings for a completed pool stage', True, run_standings),
+}
@@ -0,0 +1,140 @@
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Results are keyed by case name, then by field size (as a string, since they round trip through JSON), then by metric
+Results = Dict[str, Dict[str, Dict[str, float]]]
+
+METRICS = ('seconds', 'peak_memory', 'statements')
+
+
+class Measurement(NamedTuple):
+    # Fastest wall clock time of the repeats
+    seconds: float
+    # Peak memory allocated by Python while running, in bytes
+    peak_memory: int
+    # Number of SQL statements sent to the database while running
+    statements: int
+
+
+class Regression(NamedTuple):
+    case: str
+    size: str
+    metric: str
+    baseline: float
+    current: float
+
+    def __str__(self):
+        change = (self.current / self.baseline - 1) * 100 if self.baseline else float('inf')
+        return f'{self.case}[{self.size}] {self.metric}: {self.baseline:g} -> {self.current:g} (+{change:.1f}%)'
+
+
+class StatementCounter:
+    """
+    Counts the statements executed through an engine while it is attached.
+    """
+
+    def __init__(self, engine: Optional[Engine]):
+        self._engine = engine
+        self.count = 0
+
+    def _before_cursor_execute(self, *_):
+        self.count += 1
+
+    def __enter__(self):
+        if self._engine is not None:
+            event.listen(self._engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *_):
+        if self._engine is not None:
+            event.remove(self._engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], Any], teardown: Callable[[Any], None] = lambda _: None,
+            repeats: int = 3, engine: Optional[Engine] = None) -> Measurement:
+    """
+    Runs a benchmark repeats times for timing, then once more for memory and statement counts. Tracing allocations
+    slows everything down, so it is kept out of the timed runs. Only run is measured, setup and teardown are called
+    around every run to give it a fresh state.
+    :param setup: builds the state passed to run
+    :param run: the code being measured
+    :param teardown: cleans up the state after each run
+    :param repeats: the number of timed runs, the fastest one is kept
+    :param engine: the engine to count statements on, if the benchmark touches the database
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        state = setup()
+        try:
+            start = time.perf_counter()
+            run(state)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            teardown(state)
+
+    state = setup()
+    try:
+        tracemalloc.start()
+        with StatementCounter(engine) as counter:
+            run(state)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        teardown(state)
+
+    return Measurement(seconds=best, peak_memory=peak_memory, statements=counter.count)
+
+
+def find_regressions(baseline: Results, current: Results, tolerance: float = 0.25,
+                     minimum_seconds: float = 0.005) -> List[Regression]:
+    """
+    Compares two sets of results and returns every metric that got worse. Time and memory have to grow by more than
+    tolerance (as a fraction of the baseline) to count, while statement counts are deterministic so any increase does.
+    Cases and sizes missing from either side are ignored.
+    :param minimum_seconds: timings where both sides are below this are too noisy to compare
+    """
+    regressions = []
+    for case, sizes in current.items():
+        for size, metrics in sizes.items():
+            baseline_metrics = baseline.get(case, {}).get(size)
+            if baseline_metrics is None:
+                continue
+
+            for metric in METRICS:
+                if metric not in metrics or metric not in baseline_metrics:
+                    continue
+                old, new = baseline_metrics[metric], metrics[metric]
+
+                if metric == 'statements':
+                    regressed = new > old
+                elif metric == 'seconds' and max(old, new) < minimum_seconds:
+                    regressed = False
+                else:
+                    regressed = new > old * (1 + tolerance)
+
+                if regressed:
+                    regressions.append(Regression(case, size, metric, old, new))
+
+    return regressions
+
+
+def save_results(path: str, results: Results):
+    with open(path, 'w') as f:
+        json.dump({
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Results:
+    with open(path) as f:
+        return json.load(f)['results']
@@ -0,0 +1,210 @@
+"""
+Checks that the queries behind the main endpoints use indexes on a large database.
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --matches 100000 --verbose
+
+Seeds a scratch database with synthetic tournaments (200,000 tournaments and 1,000,000 matches by default), runs the
+model methods the endpoints use while capturing their SQL, then EXPLAINs each statement. Exits with status 1 if any of
+them sequentially scans a table with more than --min-rows rows.
+"""
+import argparse
+import json
+import sys
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, text
+
+from benchmarks.cases import BenchmarkDatabase
+from database.models import Tournament, Stage, Match, User
+from lib.schedulers.match_scheduler import MatchScheduler
+from settings import DB_NAME
+
+# Shape of each synthetic tournament
+POOLS_PER_STAGE = 50
+MATCHES_PER_POOL = 10
+COMPETITORS_PER_TOURNAMENT = 50
+NUM_USERS = 200
+
+
+class PlanCheck(NamedTuple):
+    label: str
+    statement: str
+    # (node type, relation, index) for every node in the plan
+    nodes: List[Tuple[str, str, str]]
+    seq_scans: List[str]
+
+
+def seed(database: BenchmarkDatabase, num_matches: int, num_tournaments: int) -> int:
+    """
+    Fills the database with tournaments, using set based INSERTs so a million matches only takes seconds. The first
+    ones are underway, with one active pool stage each and most of their matches complete, and their matches add up
+    to num_matches. The rest haven't started, so the listings have far more tournaments to page through than there
+    are tournaments with matches.
+    :return: the number of tournaments underway
+    """
+    num_active = max(num_matches // (POOLS_PER_STAGE * MATCHES_PER_POOL), 1)
+    num_tournaments = max(num_tournaments, num_active)
+    num_pools = num_active * POOLS_PER_STAGE
+    statements = [
+        ('INSERT INTO "user" (email, password, is_active) '
+         "SELECT 'user' || i || '@example.com', 'password', true FROM generate_series(1, :users) i"),
+        ('INSERT INTO tournament (name, start_date, status, public, owner_id) '
+         "SELECT 'Tournament ' || i, now() + i * interval '1 hour', CASE WHEN i <= :active THEN 2 ELSE 0 END, "
+         '  i % 2 = 0, 1 + i % :users '
+         'FROM generate_series(1, :tournaments) i'),
+        ('INSERT INTO stage (tournament_id, ordinal, type, status, params) '
+         """SELECT i, 0, 0, 1, '{"minimum_pool_size": 5}' FROM generate_series(1, :active) i"""),
+        ('INSERT INTO competitor (tournament_id, last_name) '
+         "SELECT 1 + (i - 1) / :competitors, 'Competitor ' || i "
+         'FROM generate_series(1, :active * :competitors) i'),
+        ('INSERT INTO pool (stage_id, ordinal) '
+         'SELECT 1 + (i - 1) / :pools_per_stage, (i - 1) % :pools_per_stage FROM generate_series(1, :pools) i'),
+        ('INSERT INTO match (pool_id, ordinal, round, status, competitor_1_id, competitor_2_id) '
+         'SELECT pool_id, ordinal, ordinal / 2, CASE WHEN random() < 0.8 THEN 2 ELSE 0 END, '
+         '  first_competitor + ordinal % :competitors, first_competitor + (ordinal + 1) % :competitors '
+         'FROM ('
+         '  SELECT 1 + (i - 1) / :matches_per_pool AS pool_id, (i - 1) % :matches_per_pool AS ordinal, '
+         '    1 + ((i - 1) / :matches_per_pool / :pools_per_stage) * :competitors AS first_competitor '
+         '  FROM generate_series(1, :pools * :matches_per_pool) i'
+         ') matches'),
+    ]
+    params = {
+        'users': NUM_USERS,
+        'tournaments': num_tournaments,
+        'active': num_active,
+        'competitors': COMPETITORS_PER_TOURNAMENT,
+        'pools_per_stage': POOLS_PER_STAGE,
+        'pools': num_pools,
+        'matches_per_pool': MATCHES_PER_POOL,
+    }
+    with database.engine.begin() as connection:
+        for statement in statements:
+            connection.execute(text(statement), params)
+
+    # Make sure the planner knows how big everything is
+    with database.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute('ANALYZE')
+
+    return num_active
+
+
+def endpoint_queries(num_active: int) -> Dict[str, Callable]:
+    """
+    The model calls made by the main endpoints, keyed by a label for the report. Each one takes a session.
+    """
+    tournament_id = num_active // 2 or 1
+    owner_id = 1 + tournament_id % NUM_USERS
+    match_id = tournament_id * POOLS_PER_STAGE * MATCHES_PER_POOL
+
+    def owner(db) -> User:
+        return User.by_id(owner_id, db)
+
+    def stage(db) -> Stage:
+        return Stage.by_id(tournament_id, db)
+
+    def deep_page(user: Optional[User], db):
+        tournament = db.query(Tournament).get(tournament_id)
+        return Tournament.get_all_visible(user, db, after=(tournament.start_date, tournament.id))
+
+    return {
+        'GET /tournaments (anonymous)': lambda db: Tournament.get_all_visible(None, db),
+        'GET /tournaments (signed in)': lambda db: Tournament.get_all_visible(owner(db), db),
+        'GET /tournaments?is_filtered_by_user': lambda db: Tournament.get_all_visible(owner(db), db, True),
+        'GET /tournaments?cursor': lambda db: deep_page(None, db),
+        'GET /tournaments?cursor (signed in)': lambda db: deep_page(owner(db), db),
+        'GET /tournaments/{id}': lambda db: Tournament.by_id_visible(tournament_id, owner(db), db, load_detail=True),
+        'GET /tournaments/{id}/stages/{id}': lambda db: Stage.by_id(tournament_id, db, load_detail=True),
+        'GET /tournaments/{id}/competitors': lambda db: Tournament.by_id_visible(tournament_id, None, db).competitors,
+        'PUT .../matches/{id}': lambda db: Match.by_id(match_id, db),
+        'Stage.materialized_matches_complete': lambda db: stage(db).materialized_matches_complete(),
+        'MatchScheduler.schedule_matches': lambda db: MatchScheduler(stage(db)).schedule_matches(db),
+    }
+
+
+def capture_statements(database: BenchmarkDatabase, query: Callable) -> List[Tuple[str, Any]]:
+    statements = []
+
+    def before_cursor_execute(_connection, _cursor, statement, parameters, _context, _executemany):
+        statements.append((statement, parameters))
+
+    event.listen(database.engine, 'before_cursor_execute', before_cursor_execute)
+    db = database.session_local()
+    try:
+        query(db)
+    finally:
+        db.rollback()
+        db.close()
+        event.remove(database.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def _walk(plan: Dict) -> Iterator[Dict]:
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _walk(child)
+
+
+def explain(database: BenchmarkDatabase, label: str, statement: str, parameters: Any,
+            table_rows: Dict[str, float], min_rows: int) -> PlanCheck:
+    connection = database.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {statement}', parameters)
+        plan_json = cursor.fetchone()[0]
+        plan = (plan_json if isinstance(plan_json, list) else json.loads(plan_json))[0]['Plan']
+    finally:
+        connection.rollback()
+        connection.close()
+
+    nodes = [(node['Node Type'], node.get('Relation Name', ''), node.get('Index Name', '')) for node in _walk(plan)]
+    seq_scans = [relation for node_type, relation, _ in nodes
+                 if node_type == 'Seq Scan' and table_rows.get(relation, 0) > min_rows]
+    return PlanCheck(label, statement, nodes, seq_scans)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.query_plans', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--matches', type=int, default=1000000, help='number of matches to seed')
+    parser.add_argument('--tournaments', type=int, default=200000,
+                        help='number of tournaments to seed, at least enough to hold the matches')
+    parser.add_argument('--min-rows', type=int, default=50000,
+                        help='sequential scans of tables smaller than this are left to the planner')
+    parser.add_argument('--verbose', action='store_true', help='print every plan node')
+    args = parser.parse_args(argv)
+
+    database = BenchmarkDatabase(f'{DB_NAME}_plans')
+    try:
+        num_active = seed(database, args.matches, args.tournaments)
+        with database.engine.connect() as connection:
+            table_rows = dict(connection.execute(
+                "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+            ).fetchall())
+        print(', '.join(f'{table}: {int(rows)} rows' for table, rows in sorted(table_rows.items())))
+
+        failures = 0
+        for label, query in endpoint_queries(num_active).items():
+            # Lazy loads repeat the same statement with different ids, one plan of each is enough
+            seen = set()
+            for statement, parameters in capture_statements(database, query):
+                if statement in seen or not statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+                    continue
+                seen.add(statement)
+                check = explain(database, label, statement, parameters, table_rows, args.min_rows)
+                indexes = sorted({index for _, _, index in check.nodes if index})
+                status = f'SEQ SCAN on {", ".join(check.seq_scans)}' if check.seq_scans else 'ok'
+                print(f'{status:<28}{label:<40}{", ".join(indexes) or "-"}')
+                if args.verbose or check.seq_scans:
+                    print(f'    {" ".join(check.statement.split())}')
+                    for node_type, relation, index in check.nodes:
+                        print(f'    {node_type} {relation} {index}'.rstrip())
+                failures += bool(check.seq_scans)
+    finally:
+        database.dispose()
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
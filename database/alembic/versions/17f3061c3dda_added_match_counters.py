@@ -0,0 +1,209 @@
+"""Added match counters
+
+Revision ID: 17f3061c3dda
+Revises: 8e81cfbd812e
+Create Date: 2026-10-18 17:38:15.350517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '17f3061c3dda'
+down_revision = '8e81cfbd812e'
+branch_labels = None
+depends_on = None
+
+# The triggers as of this revision, from database.models.match_count_triggers_sql
+MATCH_COUNT_TRIGGERS = """
+CREATE OR REPLACE FUNCTION count_insert_matches() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    WITH pool_deltas AS (
+        SELECT pool_id, sum(sign) AS match_count,
+            sum(CASE WHEN status = 0 THEN sign ELSE 0 END) AS pending_match_count,
+            sum(CASE WHEN status = 1 THEN sign ELSE 0 END) AS active_match_count,
+            sum(CASE WHEN status = 2 THEN sign ELSE 0 END) AS complete_match_count
+        FROM (SELECT pool_id, status, 1 AS sign FROM new_rows) changes
+        GROUP BY pool_id
+    ), updated_pools AS (
+        UPDATE pool SET match_count = pool.match_count + deltas.match_count,
+            pending_match_count = pool.pending_match_count + deltas.pending_match_count,
+            active_match_count = pool.active_match_count + deltas.active_match_count,
+            complete_match_count = pool.complete_match_count + deltas.complete_match_count
+        FROM pool_deltas deltas
+        WHERE pool.id = deltas.pool_id
+            AND (deltas.match_count, deltas.pending_match_count, deltas.active_match_count,
+                 deltas.complete_match_count) != (0, 0, 0, 0)
+        RETURNING pool.stage_id, deltas.match_count, deltas.pending_match_count, deltas.active_match_count,
+            deltas.complete_match_count
+    )
+    UPDATE stage SET match_count = stage.match_count + deltas.match_count,
+            pending_match_count = stage.pending_match_count + deltas.pending_match_count,
+            active_match_count = stage.active_match_count + deltas.active_match_count,
+            complete_match_count = stage.complete_match_count + deltas.complete_match_count
+    FROM (
+        SELECT stage_id, sum(match_count) AS match_count, sum(pending_match_count) AS pending_match_count,
+            sum(active_match_count) AS active_match_count, sum(complete_match_count) AS complete_match_count
+        FROM updated_pools
+        GROUP BY stage_id
+    ) deltas
+    WHERE stage.id = deltas.stage_id;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER count_insert_matches AFTER INSERT ON match REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE count_insert_matches();
+
+CREATE OR REPLACE FUNCTION count_update_matches() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    WITH pool_deltas AS (
+        SELECT pool_id, sum(sign) AS match_count,
+            sum(CASE WHEN status = 0 THEN sign ELSE 0 END) AS pending_match_count,
+            sum(CASE WHEN status = 1 THEN sign ELSE 0 END) AS active_match_count,
+            sum(CASE WHEN status = 2 THEN sign ELSE 0 END) AS complete_match_count
+        FROM (
+            SELECT pool_id, status, 1 AS sign FROM new_rows
+            UNION ALL
+            SELECT pool_id, status, -1 AS sign FROM old_rows
+        ) changes
+        GROUP BY pool_id
+    ), updated_pools AS (
+        UPDATE pool SET match_count = pool.match_count + deltas.match_count,
+            pending_match_count = pool.pending_match_count + deltas.pending_match_count,
+            active_match_count = pool.active_match_count + deltas.active_match_count,
+            complete_match_count = pool.complete_match_count + deltas.complete_match_count
+        FROM pool_deltas deltas
+        WHERE pool.id = deltas.pool_id
+            AND (deltas.match_count, deltas.pending_match_count, deltas.active_match_count,
+                 deltas.complete_match_count) != (0, 0, 0, 0)
+        RETURNING pool.stage_id, deltas.match_count, deltas.pending_match_count, deltas.active_match_count,
+            deltas.complete_match_count
+    )
+    UPDATE stage SET match_count = stage.match_count + deltas.match_count,
+            pending_match_count = stage.pending_match_count + deltas.pending_match_count,
+            active_match_count = stage.active_match_count + deltas.active_match_count,
+            complete_match_count = stage.complete_match_count + deltas.complete_match_count
+    FROM (
+        SELECT stage_id, sum(match_count) AS match_count, sum(pending_match_count) AS pending_match_count,
+            sum(active_match_count) AS active_match_count, sum(complete_match_count) AS complete_match_count
+        FROM updated_pools
+        GROUP BY stage_id
+    ) deltas
+    WHERE stage.id = deltas.stage_id;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER count_update_matches AFTER UPDATE ON match REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE count_update_matches();
+
+CREATE OR REPLACE FUNCTION count_delete_matches() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    WITH pool_deltas AS (
+        SELECT pool_id, sum(sign) AS match_count,
+            sum(CASE WHEN status = 0 THEN sign ELSE 0 END) AS pending_match_count,
+            sum(CASE WHEN status = 1 THEN sign ELSE 0 END) AS active_match_count,
+            sum(CASE WHEN status = 2 THEN sign ELSE 0 END) AS complete_match_count
+        FROM (SELECT pool_id, status, -1 AS sign FROM old_rows) changes
+        GROUP BY pool_id
+    ), updated_pools AS (
+        UPDATE pool SET match_count = pool.match_count + deltas.match_count,
+            pending_match_count = pool.pending_match_count + deltas.pending_match_count,
+            active_match_count = pool.active_match_count + deltas.active_match_count,
+            complete_match_count = pool.complete_match_count + deltas.complete_match_count
+        FROM pool_deltas deltas
+        WHERE pool.id = deltas.pool_id
+            AND (deltas.match_count, deltas.pending_match_count, deltas.active_match_count,
+                 deltas.complete_match_count) != (0, 0, 0, 0)
+        RETURNING pool.stage_id, deltas.match_count, deltas.pending_match_count, deltas.active_match_count,
+            deltas.complete_match_count
+    )
+    UPDATE stage SET match_count = stage.match_count + deltas.match_count,
+            pending_match_count = stage.pending_match_count + deltas.pending_match_count,
+            active_match_count = stage.active_match_count + deltas.active_match_count,
+            complete_match_count = stage.complete_match_count + deltas.complete_match_count
+    FROM (
+        SELECT stage_id, sum(match_count) AS match_count, sum(pending_match_count) AS pending_match_count,
+            sum(active_match_count) AS active_match_count, sum(complete_match_count) AS complete_match_count
+        FROM updated_pools
+        GROUP BY stage_id
+    ) deltas
+    WHERE stage.id = deltas.stage_id;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER count_delete_matches AFTER DELETE ON match REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE PROCEDURE count_delete_matches();
+"""
+
+BACKFILL_POOLS = """
+UPDATE pool SET
+    match_count = counts.match_count,
+    pending_match_count = counts.pending_match_count,
+    active_match_count = counts.active_match_count,
+    complete_match_count = counts.complete_match_count
+FROM (
+    SELECT pool_id,
+        count(*) AS match_count,
+        count(*) FILTER (WHERE status = 0) AS pending_match_count,
+        count(*) FILTER (WHERE status = 1) AS active_match_count,
+        count(*) FILTER (WHERE status = 2) AS complete_match_count
+    FROM match
+    GROUP BY pool_id
+) counts
+WHERE pool.id = counts.pool_id
+"""
+
+BACKFILL_STAGES = """
+UPDATE stage SET
+    match_count = counts.match_count,
+    pending_match_count = counts.pending_match_count,
+    active_match_count = counts.active_match_count,
+    complete_match_count = counts.complete_match_count
+FROM (
+    SELECT stage_id,
+        sum(match_count) AS match_count,
+        sum(pending_match_count) AS pending_match_count,
+        sum(active_match_count) AS active_match_count,
+        sum(complete_match_count) AS complete_match_count
+    FROM pool
+    GROUP BY stage_id
+) counts
+WHERE stage.id = counts.stage_id
+"""
+
+
+def upgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.add_column('pool', sa.Column('active_match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('pool', sa.Column('complete_match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('pool', sa.Column('match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('pool', sa.Column('pending_match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('stage', sa.Column('active_match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('stage', sa.Column('complete_match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('stage', sa.Column('match_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('stage', sa.Column('pending_match_count', sa.Integer(), server_default='0', nullable=False))
+    # ### end Alembic commands ###
+
+    # Count the existing matches before the triggers take over. Nothing else can change the matches until this commits.
+    op.execute('LOCK TABLE match IN SHARE MODE')
+    op.execute(BACKFILL_POOLS)
+    op.execute(BACKFILL_STAGES)
+    op.execute(MATCH_COUNT_TRIGGERS)
+
+
+def downgrade():
+    for name in ('insert', 'update', 'delete'):
+        op.execute(f'DROP TRIGGER count_{name}_matches ON match')
+        op.execute(f'DROP FUNCTION count_{name}_matches()')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_column('stage', 'pending_match_count')
+    op.drop_column('stage', 'match_count')
+    op.drop_column('stage', 'complete_match_count')
+    op.drop_column('stage', 'active_match_count')
+    op.drop_column('pool', 'pending_match_count')
+    op.drop_column('pool', 'match_count')
+    op.drop_column('pool', 'complete_match_count')
+    op.drop_column('pool', 'active_match_count')
+    # ### end Alembic commands ###
@@ -0,0 +1,25 @@
+"""Added swiss stage type
+
+Revision ID: 3c5e0f7a9d21
+Revises: 99611e3c4760
+Create Date: 2026-10-18 17:32:10.118042
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5e0f7a9d21'
+down_revision = '99611e3c4760'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_constraint('valid_type', 'stage', type_='check')
+    op.create_check_constraint('valid_type', 'stage', 'type IN (0,1,2,3)')
+
+
+def downgrade():
+    op.drop_constraint('valid_type', 'stage', type_='check')
+    op.create_check_constraint('valid_type', 'stage', 'type IN (0,1,2)')
@@ -1,18 +1,190 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+from weakref import WeakKeyDictionary
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from settings import SQLALCHEMY_DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, \
+    DB_POOL_PRE_PING, DB_STATEMENT_TIMEOUT, DB_APPLICATION_NAME, SQLALCHEMY_REPLICA_URLS, DB_REPLICA_MAX_LAG, \
+    DB_REPLICA_LAG_CHECK_INTERVAL, DB_READ_YOUR_WRITES_WINDOW
+
+
+def engine_options() -> Dict[str, Any]:
+    """
+    The create_engine keyword arguments for the pool and connection settings in settings.py
+    """
+    connect_args = {'application_name': DB_APPLICATION_NAME}
+    if DB_STATEMENT_TIMEOUT:
+        connect_args['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
 
-from settings import SQLALCHEMY_DATABASE_URL
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'connect_args': connect_args,
+    }
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Thread local sessions for scripts, requests get their own from get_db
 Session = scoped_session(SessionLocal)
 Base = declarative_base()
 
 
-def get_db():
-    db = Session()
-    try:
-        yield db
-    finally:
-        Session.remove()
+# Seconds a replica is behind the primary. It's caught up if it has replayed everything it received, and a primary is
+# never behind. NULL if the replica hasn't replayed anything yet.
+REPLICA_LAG_SQL = (
+    'SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+)
+
+
+class Replica:
+    """
+    A read-only copy of the database, with its own pool, and how far behind the primary it was when last checked
+    """
+
+    def __init__(self, url: str):
+        self.engine = create_engine(url, **engine_options())
+        self.session_local = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        # Seconds behind the primary, None if it couldn't be measured
+        self.lag: Optional[float] = None
+        # time.monotonic() of the last check, None if it has never been checked
+        self.checked_at: Optional[float] = None
+
+    def check_lag(self) -> Optional[float]:
+        try:
+            with self.engine.connect() as connection:
+                lag = connection.execute(REPLICA_LAG_SQL).scalar()
+        except DBAPIError:
+            lag = None
+        self.lag = None if lag is None else float(lag)
+        return self.lag
+
+
+class ReplicaRouter:
+    """
+    Decides which database each request's session uses. GET and HEAD requests take turns on the replicas, skipping
+    any more than max_lag seconds behind the primary, and use the primary if there are none left. Everything else uses
+    the primary, and the user's reads stay there for read_your_writes_window seconds afterwards so they see their own
+    changes. Users are told apart by their Authorization header, since anonymous users can't write.
+
+    Lag is checked at most every lag_check_interval seconds per replica, on the threadpool. Recent writes are only
+    remembered by the worker process that served them.
+    """
+    READ_METHODS = ('GET', 'HEAD')
+
+    def __init__(self, primary: sessionmaker, replicas: Sequence[Replica], max_lag: float = DB_REPLICA_MAX_LAG,
+                 lag_check_interval: float = DB_REPLICA_LAG_CHECK_INTERVAL,
+                 read_your_writes_window: float = DB_READ_YOUR_WRITES_WINDOW):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.read_your_writes_window = read_your_writes_window
+        # Maps each user's Authorization header to the time.monotonic() of their last write, oldest first
+        self._writes: 'OrderedDict[str, float]' = OrderedDict()
+        self._next_replica = 0
+
+    async def session_local(self, request: Request) -> sessionmaker:
+        if request.method not in self.READ_METHODS:
+            self.record_write(request)
+            return self.primary
+        if self.wrote_recently(request):
+            return self.primary
+
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next_replica]
+            self._next_replica = (self._next_replica + 1) % len(self.replicas)
+            if await self._caught_up(replica):
+                return replica.session_local
+        return self.primary
+
+    def record_write(self, request: Request):
+        user = request.headers.get('authorization')
+        if request.method in self.READ_METHODS or user is None:
+            return
+
+        now = time.monotonic()
+        self._writes[user] = now
+        self._writes.move_to_end(user)
+        # Forget the writes that are out of the window, which are all at the start
+        while self._writes:
+            oldest_user, wrote_at = next(iter(self._writes.items()))
+            if now - wrote_at < self.read_your_writes_window:
+                break
+            del self._writes[oldest_user]
+
+    def wrote_recently(self, request: Request) -> bool:
+        wrote_at = self._writes.get(request.headers.get('authorization'))
+        return wrote_at is not None and time.monotonic() - wrote_at < self.read_your_writes_window
+
+    async def _caught_up(self, replica: Replica) -> bool:
+        now = time.monotonic()
+        if replica.checked_at is None or now - replica.checked_at >= self.lag_check_interval:
+            # Claim the check before handing it to the threadpool, so concurrent requests go by the last result
+            replica.checked_at = now
+            await run_in_threadpool(replica.check_lag)
+        return replica.lag is not None and replica.lag <= self.max_lag
+
+
+replica_router = ReplicaRouter(SessionLocal, [Replica(url) for url in SQLALCHEMY_REPLICA_URLS])
+
+# One semaphore per event loop, limiting the requests holding a session to the connections the pool can hand out
+_session_slots: 'WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]' = WeakKeyDictionary()
+
+
+def _get_session_slots() -> asyncio.Semaphore:
+    loop = asyncio.get_event_loop()
+    slots = _session_slots.get(loop)
+    if slots is None:
+        slots = _session_slots[loop] = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    return slots
+
+
+async def get_db(request: Request):
+    """
+    Gives each request a session of its own, which is closed once the request is done. Closing rolls back anything
+    the request left uncommitted and returns the connection to the pool. replica_router picks the database it uses.
+
+    Handlers run on the threadpool, and each hop between the threadpool and the event loop needs a free thread. If
+    more requests held sessions than the pool has connections, the extra ones could fill every thread waiting on the
+    pool while the requests holding the connections wait for a thread to finish on. So requests wait their turn for a
+    session here on the event loop instead, and the session is opened and closed on the loop too. Neither touches the
+    database except for the rollback on close.
+    """
+    session_local = await replica_router.session_local(request)
+    async with _get_session_slots():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+            # Keep the user's reads on the primary for the whole window after the write is done
+            replica_router.record_write(request)
+
+
+def pool_status(pool_engine: Engine = engine) -> Dict[str, int]:
+    """
+    Returns how many of the engine's pooled connections are in use, for sizing the pool against the number of workers
+    """
+    pool = pool_engine.pool
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        # Connections open beyond size, negative while the pool hasn't filled up yet
+        'overflow': pool.overflow(),
+        'max_overflow': DB_MAX_OVERFLOW,
+    }
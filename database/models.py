@@ -1,15 +1,23 @@
 import enum
-from collections import defaultdict
-from typing import Optional, List, Dict, Sequence
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Optional, List, Dict, Sequence, Tuple, Iterable
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, CheckConstraint, ForeignKey, or_, JSON
-from sqlalchemy.orm import Session, relationship, backref
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, CheckConstraint, ForeignKey, or_, and_, JSON, \
+    Index, text, func, tuple_, event, DDL, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session, relationship, backref, joinedload, selectinload, object_session
 
 from api.schemas.competitor import CompetitorCreate, CompetitorUpdate
+from api.schemas.match import MatchUpdate
 from api.schemas.security import UserCreate
 from api.schemas.stage import StageCreate
 from api.schemas.tournament import TournamentCreate, TournamentUpdate
 from database.db import Base
+from lib.match_generators.round_robin import num_rounds
+from lib.match_generators.swiss import default_num_rounds
+from lib.roster_import import ROSTER_COLUMNS, RosterReader, RowError
+from lib.standings import MatchColumns, Standing, pool_standings
 from lib.status_updaters import TournamentStatusUpdater
 
 
@@ -75,6 +83,10 @@ class Tournament(Base):
 
     __table_args__ = (
         CheckConstraint(f'status IN ({",".join(map(str, status_options))})', name='valid_status'),
+        # Listing tournaments filters on public or the owner and pages through them by start date, with the id to break
+        # ties
+        Index('ix_tournament_public_start_date_id', 'public', 'start_date', 'id'),
+        Index('ix_tournament_owner_id_start_date_id', 'owner_id', 'start_date', 'id'),
     )
 
     @staticmethod
@@ -92,8 +104,24 @@ class Tournament(Base):
         return db_tournament
 
     @staticmethod
-    def by_id_visible(tournament_id: int, user: User, db: Session):
+    def detail_loader_options() -> list:
+        """
+        Loader options that load everything a TournamentDetail response needs up front, with one query per level of
+        the graph rather than one per row
+        """
+        stages = selectinload(Tournament.stages)
+        return [
+            joinedload(Tournament.owner),
+            selectinload(Tournament.competitors),
+            stages,
+            *Stage.detail_loader_options(stages),
+        ]
+
+    @staticmethod
+    def by_id_visible(tournament_id: int, user: User, db: Session, load_detail: bool = False):
         query = db.query(Tournament).filter(Tournament.id == tournament_id)
+        if load_detail:
+            query = query.options(*Tournament.detail_loader_options())
 
         if user:
             # Only allow tournaments the current user can see
@@ -107,28 +135,61 @@ class Tournament(Base):
         return query.first()
 
     @staticmethod
-    def get_all_visible(user: User, db: Session, is_filtered_by_user: bool = False, skip: int = 0, limit: int = 100):
-        query = db.query(Tournament)
-
+    def _visible_filter(user: User, is_filtered_by_user: bool = False):
+        """
+        The predicate for the tournaments the given user can see, shared by the listing and its total
+        """
         if user:
             if is_filtered_by_user:
                 # Only this users tournaments
-                query = query.filter(Tournament.owner_id == user.id)
+                return Tournament.owner_id == user.id
             else:
                 # All public or owned by this user
-                query = query.filter(or_(
+                return or_(
                     Tournament.public.is_(True),
                     Tournament.owner_id == user.id,
-                ))
+                )
         else:
-            query = query.filter(Tournament.public.is_(True))
+            return Tournament.public.is_(True)
 
-        # Newest tournaments first
-        query = query.order_by(Tournament.start_date.desc())
+    @staticmethod
+    def get_all_visible(user: User, db: Session, is_filtered_by_user: bool = False, skip: int = 0, limit: int = 100,
+                        after: Optional[Tuple[datetime, int]] = None):
+        """
+        Returns a page of the tournaments the given user can see, newest first.
+        :param after: the (start_date, id) of the last tournament on the previous page. Pages are found by seeking to it
+        through the listing indexes, so every page takes the same time however deep it is, and tournaments created
+        while paging can't shift rows between pages the way skip does.
+        """
+        def page(visible_filter):
+            query = db.query(Tournament).filter(visible_filter)
+            if after is not None:
+                query = query.filter(tuple_(Tournament.start_date, Tournament.id) < tuple_(*after))
+            # Newest tournaments first, the id keeps tournaments starting at the same time in a stable order
+            return query.order_by(Tournament.start_date.desc(), Tournament.id.desc())
+
+        if user and not is_filtered_by_user:
+            # Neither index can walk public OR owner in order, so Postgres would sort every public tournament. Instead
+            # each index gives its own newest skip + limit rows, the owner's private ones so nothing appears twice,
+            # and only those are merged.
+            query = page(Tournament.public.is_(True)).limit(skip + limit).union_all(
+                page(and_(Tournament.owner_id == user.id, Tournament.public.is_(False))).limit(skip + limit)
+            ).order_by(Tournament.start_date.desc(), Tournament.id.desc())
+        else:
+            query = page(Tournament._visible_filter(user, is_filtered_by_user))
 
         # Apply the paging
         return query.offset(skip).limit(limit).all()
 
+    @staticmethod
+    def count_visible(user: User, db: Session, is_filtered_by_user: bool = False) -> int:
+        """
+        Counts every tournament get_all_visible could return across all pages, with a single SELECT count(*)
+        """
+        return db.query(func.count(Tournament.id)) \
+            .filter(Tournament._visible_filter(user, is_filtered_by_user)) \
+            .scalar()
+
     def change_status(self, status: int, db: Session):
         TournamentStatusUpdater.update_status(self, status, db)
         db.commit()
@@ -155,8 +216,8 @@ class Tournament(Base):
             db.commit()
 
     def delete_competitors(self, db: Session, autocommit=True):
-        for competitor in self.competitors:
-            competitor.delete(db=db, autocommit=False)
+        # A single DELETE, so the competitors already loaded on this tournament only go away once it's committed
+        db.query(Competitor).filter(Competitor.tournament_id == self.id).delete(synchronize_session=False)
 
         if autocommit:
             db.commit()
@@ -184,7 +245,8 @@ class Tournament(Base):
             db.add(self)
         elif self.status == Tournament.TournamentStatus.ACTIVE:
             # The tournament is already active, so ensure the current stage is complete before moving to the next one
-            active_stages = [stage for stage in self.stages if stage.status == Stage.StageStatus.ACTIVE]
+            stages = db.query(Stage).filter(Stage.tournament_id == self.id)
+            active_stages = stages.filter(Stage.status == Stage.StageStatus.ACTIVE).all()
 
             if len(active_stages) != 1:
                 raise TournamentError(f'Unexpected number of stages are currently active: {len(active_stages)}')
@@ -193,9 +255,7 @@ class Tournament(Base):
             current_stage.progress(db, autocommit=False)
 
             # Grab the first stage in status pending, it's the next one to start
-            pending_stages = [stage for stage in self.stages if stage.status == Stage.StageStatus.PENDING]
-            if len(pending_stages):
-                stage_to_start = pending_stages[0]
+            stage_to_start = stages.filter(Stage.status == Stage.StageStatus.PENDING).order_by(Stage.ordinal).first()
         else:
             raise TournamentError(f'A tournament with status {self.status} cannot be progressed')
 
@@ -212,16 +272,26 @@ class Tournament(Base):
             db.refresh(self)
 
 
+# Roster updates match competitors by name and organization and update the rest of their details
+CompetitorKey = Tuple[Optional[str], Optional[str], Optional[str]]
+COMPETITOR_DETAIL_FIELDS = ('location', 'rating', 'minimum_rest')
+COMPETITOR_FIELDS = ('first_name', 'last_name', 'organization') + COMPETITOR_DETAIL_FIELDS
+
+
 class Competitor(Base):
     __tablename__ = 'competitor'
 
     id = Column(Integer, primary_key=True, index=True)
-    tournament_id = Column(Integer, ForeignKey('tournament.id', ondelete='CASCADE'), nullable=False)
+    tournament_id = Column(Integer, ForeignKey('tournament.id', ondelete='CASCADE'), nullable=False, index=True)
     tournament = relationship('Tournament', back_populates='competitors')
     first_name = Column(String, nullable=True)
     last_name = Column(String, nullable=True)
     organization = Column(String, nullable=True)
     location = Column(String, nullable=True)
+    # Used to seed the competitor, higher is better
+    rating = Column(Integer, nullable=True)
+    # Minutes the competitor needs between matches, if they need longer than the stage gives everyone
+    minimum_rest = Column(Integer, nullable=True)
 
     __table_args__ = (
         # All competitors must have at least a last name (individual) or an organization (team)
@@ -236,6 +306,8 @@ class Competitor(Base):
             last_name=competitor.last_name,
             organization=competitor.organization,
             location=competitor.location,
+            rating=competitor.rating,
+            minimum_rest=competitor.minimum_rest,
         )
         db.add(db_competitor)
         db.commit()
@@ -252,6 +324,8 @@ class Competitor(Base):
                 last_name=competitor.last_name,
                 organization=competitor.organization,
                 location=competitor.location,
+                rating=competitor.rating,
+                minimum_rest=competitor.minimum_rest,
             ))
         # No need to refresh after this since it doesn't associate the objects to the session
         db.bulk_save_objects(batch, return_defaults=True)
@@ -261,6 +335,100 @@ class Competitor(Base):
 
         return batch
 
+    @staticmethod
+    def replace_all(tournament: Tournament, competitors: List[CompetitorCreate], db: Session,
+                    autocommit=True) -> List['Competitor']:
+        """
+        Makes the given competitors the tournament's roster. Existing competitors are matched to the new ones by first
+        name, last name and organization, and keep their ids, with their other details updated if they changed. The
+        rest are deleted or created, so this is at most one DELETE, one UPDATE and one INSERT however big the roster
+        is. Competitors with the same key are matched up in order.
+        :return: the tournament's competitors, oldest first
+        """
+        existing: Dict[CompetitorKey, deque] = defaultdict(deque)
+        for row in db.query(Competitor.id, *(getattr(Competitor, field) for field in COMPETITOR_FIELDS)) \
+                .filter(Competitor.tournament_id == tournament.id) \
+                .order_by(Competitor.id):
+            existing[(row.first_name, row.last_name, row.organization)].append(row)
+
+        inserts = []
+        updates = []
+        for competitor in competitors:
+            matches = existing.get((competitor.first_name, competitor.last_name, competitor.organization))
+            if not matches:
+                inserts.append({'tournament_id': tournament.id,
+                                **{field: getattr(competitor, field) for field in COMPETITOR_FIELDS}})
+                continue
+            row = matches.popleft()
+            if any(getattr(row, field) != getattr(competitor, field) for field in COMPETITOR_DETAIL_FIELDS):
+                updates.append({'id': row.id,
+                                **{field: getattr(competitor, field) for field in COMPETITOR_DETAIL_FIELDS}})
+        delete_ids = [row.id for rows in existing.values() for row in rows]
+
+        competitor_table = Competitor.__table__
+        if delete_ids:
+            db.execute(competitor_table.delete().where(
+                competitor_table.c.id == any_(bindparam('ids', delete_ids, type_=ARRAY(Integer)))))
+        if updates:
+            # Unnesting one array per column sends every change in a single statement
+            db.execute(text(
+                'UPDATE competitor SET location = changes.location, rating = changes.rating, '
+                'minimum_rest = changes.minimum_rest '
+                'FROM unnest(CAST(:ids AS integer[]), CAST(:locations AS varchar[]), CAST(:ratings AS integer[]), '
+                'CAST(:minimum_rests AS integer[])) AS changes (id, location, rating, minimum_rest) '
+                'WHERE competitor.id = changes.id'
+            ), {
+                'ids': [update['id'] for update in updates],
+                'locations': [update['location'] for update in updates],
+                'ratings': [update['rating'] for update in updates],
+                'minimum_rests': [update['minimum_rest'] for update in updates],
+            })
+        if inserts:
+            db.execute(competitor_table.insert().values(inserts))
+
+        # The loaded roster is out of date now
+        db.expire(tournament, ['competitors'])
+        if autocommit:
+            db.commit()
+
+        return db.query(Competitor).filter(Competitor.tournament_id == tournament.id).order_by(Competitor.id).all()
+
+    @staticmethod
+    def import_csv(tournament: Tournament, lines: Iterable[str], db: Session,
+                   autocommit=True) -> Tuple[List['Competitor'], List[RowError]]:
+        """
+        Adds the competitors in a CSV roster to the tournament. Rows are checked as they are read and streamed with
+        COPY into a staging table, then added with a single INSERT, so large rosters are never held in memory. Invalid
+        rows are skipped and reported rather than failing the whole import.
+        :return: the competitors that were added, in roster order, and the errors for the rows that were skipped
+        """
+        roster = RosterReader(lines)
+        columns = ', '.join(ROSTER_COLUMNS)
+
+        db.execute(
+            'CREATE TEMPORARY TABLE competitor_import (line integer, first_name varchar, last_name varchar, '
+            'organization varchar, location varchar, rating integer, minimum_rest integer)'
+        )
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f'COPY competitor_import (line, {columns}) FROM STDIN WITH (FORMAT csv)', roster)
+        finally:
+            cursor.close()
+        if roster.failure:
+            raise roster.failure
+        ids = [row.id for row in db.execute(text(
+            f'INSERT INTO competitor (tournament_id, {columns}) '
+            f'SELECT :tournament_id, {columns} FROM competitor_import ORDER BY line RETURNING id'
+        ), {'tournament_id': tournament.id})]
+        db.execute('DROP TABLE competitor_import')
+
+        db.expire(tournament, ['competitors'])
+        if autocommit:
+            db.commit()
+
+        competitors = db.query(Competitor).filter(Competitor.id.in_(ids)).order_by(Competitor.id).all() if ids else []
+        return competitors, roster.errors
+
     @staticmethod
     def by_id(competitor_id: int, db: Session):
         return db.query(Competitor).filter(Competitor.id == competitor_id).first()
@@ -270,6 +438,8 @@ class Competitor(Base):
         self.last_name = competitor.last_name
         self.organization = competitor.organization
         self.location = competitor.location
+        self.rating = competitor.rating
+        self.minimum_rest = competitor.minimum_rest
 
         db.add(self)
         db.commit()
@@ -289,6 +459,7 @@ class Stage(Base):
         POOL = 0
         BRACKET_SINGLE_ELIMINATION = 1
         BRACKET_DOUBLE_ELIMINATION = 2
+        SWISS = 3
 
         @classmethod
         def is_valid_stage_ordering(cls, first, second):
@@ -298,6 +469,7 @@ class Stage(Base):
             """
             valid_orders = defaultdict(set)
             valid_orders[cls.POOL] = {cls.POOL, cls.BRACKET_SINGLE_ELIMINATION, cls.BRACKET_DOUBLE_ELIMINATION}
+            valid_orders[cls.SWISS] = {cls.BRACKET_SINGLE_ELIMINATION, cls.BRACKET_DOUBLE_ELIMINATION}
 
             return second in valid_orders[first]
 
@@ -305,10 +477,26 @@ class Stage(Base):
         def parse_params(cls, stage_type, params) -> Dict:
             parsed_params = {}
 
+            parsed_params['seeded'] = bool(params.get('seeded', False))
+            # Matches are only assigned courts and start slots if there are courts to put them on. Durations and rest
+            # are in minutes.
+            parsed_params['courts'] = int(params.get('courts', 0))
+            parsed_params['match_duration'] = int(params.get('match_duration', 30))
+            parsed_params['minimum_rest'] = int(params.get('minimum_rest', 0))
             if stage_type == cls.POOL:
                 parsed_params['minimum_pool_size'] = int(params.get('minimum_pool_size', 0))
-            else:
-                parsed_params['seeded'] = bool(params.get('seeded', False))
+                # Whether to keep competitors from the same organization in different pools where possible
+                parsed_params['spread_organizations'] = bool(params.get('spread_organizations', False))
+                # Whether to only create each round's matches once the previous round is complete
+                parsed_params['lazy'] = bool(params.get('lazy', False))
+
+            if stage_type == cls.SWISS:
+                # Defaults to enough rounds to leave a single undefeated competitor
+                parsed_params['num_rounds'] = int(params['num_rounds']) if params.get('num_rounds') else None
+
+            if stage_type == cls.BRACKET_DOUBLE_ELIMINATION:
+                # Whether the grand final gets a second match if the losers bracket champion wins the first
+                parsed_params['grand_final_reset'] = bool(params.get('grand_final_reset', True))
 
             return parsed_params
 
@@ -325,6 +513,18 @@ class Stage(Base):
     status = Column(Integer, nullable=False, default=StageStatus.PENDING)
     params = Column(JSON, nullable=False)
 
+    # Lazy pool stages store the ordered competitor ids of each pool, which is all that's needed to generate any round
+    # of their round robins, and how many rounds have had their matches created so far. Swiss stages store their single
+    # pool's competitor ids the same way, since they are always paired a round at a time.
+    schedule = Column(JSON, nullable=True)
+    materialized_rounds = Column(Integer, nullable=True)
+
+    # Counts of the stage's matches by status, kept up to date by the triggers in match_count_triggers_sql
+    match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    pending_match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    active_match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    complete_match_count = Column(Integer, nullable=False, default=0, server_default='0')
+
     pools = relationship('Pool', back_populates='stage', cascade='all, delete', passive_deletes=True,
                          order_by='Pool.ordinal')
 
@@ -334,12 +534,34 @@ class Stage(Base):
     __table_args__ = (
         CheckConstraint(f'type IN ({",".join(map(str, type_options))})', name='valid_type'),
         CheckConstraint(f'status IN ({",".join(map(str, status_options))})', name='valid_status'),
+        # Also serves the tournament's stages relationship, which is ordered by ordinal
+        Index('ix_stage_tournament_id_ordinal', 'tournament_id', 'ordinal'),
     )
 
     @property
     def parsed_params(self):
         return Stage.StageType.parse_params(self.type, self.params)
 
+    @property
+    def total_rounds(self) -> Optional[int]:
+        """
+        The number of rounds in a lazy stage, or None if the stage creates all its matches up front
+        """
+        if self.schedule is None:
+            return None
+        if self.type == Stage.StageType.SWISS:
+            return self.parsed_params['num_rounds'] or default_num_rounds(len(self.schedule[0]))
+        return max(num_rounds(len(competitor_ids)) for competitor_ids in self.schedule)
+
+    @property
+    def pending_rounds(self) -> int:
+        """
+        The number of rounds that have not had their matches created yet
+        """
+        if self.schedule is None:
+            return 0
+        return self.total_rounds - self.materialized_rounds
+
     @staticmethod
     def create(tournament: Tournament, stage: StageCreate, db: Session, autocommit=True):
         # Make sure the requested stage type is compatible with the existing stages
@@ -368,8 +590,22 @@ class Stage(Base):
         return db_stage
 
     @staticmethod
-    def by_id(stage_id: int, db: Session):
-        return db.query(Stage).filter(Stage.id == stage_id).first()
+    def detail_loader_options(path=None) -> list:
+        """
+        Loader options that load a stage's pools, their matches and the matches' competitors up front
+        :param path: the loader for the relationship the stages are being loaded through, if they aren't the primary
+        entity of the query
+        """
+        matches = (path.selectinload(Stage.pools) if path is not None else selectinload(Stage.pools)) \
+            .selectinload(Pool.matches)
+        return [matches.joinedload(Match.competitor_1), matches.joinedload(Match.competitor_2)]
+
+    @staticmethod
+    def by_id(stage_id: int, db: Session, load_detail: bool = False):
+        query = db.query(Stage).filter(Stage.id == stage_id)
+        if load_detail:
+            query = query.options(*Stage.detail_loader_options())
+        return query.first()
 
     def update(self, stage: StageCreate, db: Session, autocommit: bool = True):
         self.type = stage.type
@@ -390,21 +626,132 @@ class Stage(Base):
         if autocommit:
             db.commit()
 
+    def standings(self, db: Session) -> Dict[int, List[Standing]]:
+        """
+        Ranks the competitors in each of the stage's pools by the matches they have completed, see pool_standings. The
+        matches are read with a single query, as columns rather than objects.
+        :return: maps each pool id to its standings from first place down, with the pools in ordinal order
+        """
+        rows = db.query(Match.pool_id, Match.competitor_1_id, Match.competitor_2_id, Match.competitor_1_score,
+                        Match.competitor_2_score, Match.status == Match.MatchStatus.COMPLETE) \
+            .join(Pool, Pool.id == Match.pool_id) \
+            .filter(Pool.stage_id == self.id) \
+            .order_by(Pool.ordinal, Match.ordinal) \
+            .all()
+        if not rows:
+            return {}
+        return pool_standings(MatchColumns(*zip(*rows)))
+
     def all_matches_complete(self):
         """
-        If there's a single match for this stage that isn't in status complete, return False, otherwise True
+        If there's a single match for this stage that isn't in status complete, or a round whose matches haven't been
+        created yet, return False, otherwise True
+        """
+        return self.materialized_matches_complete() and not self.pending_rounds
+
+    def materialized_matches_complete(self):
+        """
+        If there's a single match that has been created for this stage that isn't in status complete, return False,
+        otherwise True. This reads the stage's match counters, so it costs the same however big the stage is.
         """
-        num_matches = len([match for pool in self.pools for match in pool.matches])
-        if num_matches == 0:
+        db: Session = object_session(self)
+        # Matches changed in this session count too, and the counters on this instance may be out of date
+        db.flush()
+        match_count, complete_match_count = db.query(Stage.match_count, Stage.complete_match_count) \
+            .filter(Stage.id == self.id) \
+            .one()
+
+        if match_count == 0:
             raise TournamentError('Matches have not been generated yet for this stage')
+        return complete_match_count == match_count
 
-        incomplete_matches = [
-            match
-            for pool in self.pools
-            for match in pool.matches
-            if match.status != Match.MatchStatus.COMPLETE
-        ]
-        return len(incomplete_matches) == 0
+    @staticmethod
+    def repair_match_counts(db: Session, autocommit=True) -> int:
+        """
+        Recounts the matches of every pool and stage and fixes any counters that don't match, in case they drifted
+        from the match table, e.g. while the triggers were disabled.
+        :return: the number of pools and stages that were fixed
+        """
+        counts = ', '.join(f'{column} = counts.{column}' for column in MATCH_COUNT_COLUMNS)
+        changed = ' OR '.join(f'{{table}}.{column} != counts.{column}' for column in MATCH_COUNT_COLUMNS)
+        totals = ', '.join(f'coalesce(sum(pool.{column}), 0) AS {column}' for column in MATCH_COUNT_COLUMNS)
+        pool_counts = ', '.join(
+            ['count(match.id) AS match_count'] +
+            [f'count(match.id) FILTER (WHERE match.status = {status:d}) AS {column}'
+             for status, column in MATCH_STATUS_COUNT_COLUMNS.items()]
+        )
+
+        num_pools = db.execute(
+            f'UPDATE pool SET {counts} '
+            f'FROM (SELECT pool.id, {pool_counts} '
+            f'      FROM pool LEFT JOIN match ON match.pool_id = pool.id GROUP BY pool.id) '
+            f'counts WHERE pool.id = counts.id AND ({changed.format(table="pool")})'
+        ).rowcount
+        num_stages = db.execute(
+            f'UPDATE stage SET {counts} '
+            f'FROM (SELECT stage.id, {totals} FROM stage LEFT JOIN pool ON pool.stage_id = stage.id GROUP BY stage.id) '
+            f'counts WHERE stage.id = counts.id AND ({changed.format(table="stage")})'
+        ).rowcount
+
+        if autocommit:
+            db.commit()
+        return num_pools + num_stages
+
+    def materialize_next_round(self, db: Session, autocommit=True):
+        """
+        Creates the matches for the next round of a lazy or swiss stage
+        """
+        self._lock(db)
+        self._materialize_next_round(db)
+
+        if autocommit:
+            db.commit()
+
+    def materialize_next_round_if_ready(self, db: Session, autocommit=True):
+        """
+        Creates the matches for the next round of a lazy or swiss stage once every match created so far is complete
+        """
+        if not self.pending_rounds:
+            return
+        # Results for the last matches of a round can come in together, only one of them gets to create the next round
+        self._lock(db)
+        if self.pending_rounds and self.materialized_matches_complete():
+            self._materialize_next_round(db)
+
+        if autocommit:
+            db.commit()
+
+    def _materialize_next_round(self, db: Session):
+        from lib.match_generators.match_generator import MatchGenerator
+
+        if self.status != Stage.StageStatus.ACTIVE:
+            raise TournamentError('Rounds can only be created for active stages')
+        if not self.pending_rounds:
+            raise TournamentError('There are no more rounds to create for this stage')
+
+        MatchGenerator.get_match_generator_class(self.type).materialize_round(self, self.materialized_rounds, db)
+        self.materialized_rounds += 1
+        db.add(self)
+
+    def _lock(self, db: Session):
+        """
+        Locks the stage's row until the end of the transaction and reloads it, so anything else changing the stage
+        waits its turn and then sees the changes made before it
+        """
+        # Reloading would throw away changes that haven't been flushed
+        db.flush()
+        db.query(Stage).filter(Stage.id == self.id).populate_existing().with_for_update().one()
+
+    def schedule_matches(self, db: Session, autocommit=True):
+        """
+        Assigns the stage's pending matches to courts and start slots, if the stage has any courts
+        """
+        from lib.schedulers.match_scheduler import MatchScheduler
+
+        MatchScheduler(self).schedule_matches(db)
+
+        if autocommit:
+            db.commit()
 
     def progress(self, db: Session, autocommit=True):
         """
@@ -415,6 +762,7 @@ class Stage(Base):
         if self.status == Stage.StageStatus.PENDING:
             # Generate pools and matches and update the status to active
             self._generate_pools_and_matches(db, autocommit=False)
+            self.schedule_matches(db, autocommit=False)
             self.status = Stage.StageStatus.ACTIVE
         elif self.status == Stage.StageStatus.ACTIVE:
             # If all matches are complete, update status to complete, otherwise raise an error
@@ -450,9 +798,20 @@ class Pool(Base):
     stage_id = Column(Integer, ForeignKey('stage.id', ondelete='CASCADE'), nullable=False)
     stage = relationship('Stage', back_populates='pools')
 
+    # Counts of the pool's matches by status, kept up to date by the triggers in match_count_triggers_sql
+    match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    pending_match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    active_match_count = Column(Integer, nullable=False, default=0, server_default='0')
+    complete_match_count = Column(Integer, nullable=False, default=0, server_default='0')
+
     matches = relationship('Match', back_populates='pool', cascade='all, delete', passive_deletes=True,
                            order_by='Match.ordinal')
 
+    __table_args__ = (
+        # Also serves the stage's pools relationship, which is ordered by ordinal
+        Index('ix_pool_stage_id_ordinal', 'stage_id', 'ordinal'),
+    )
+
 
 class Match(Base):
     __tablename__ = 'match'
@@ -466,24 +825,130 @@ class Match(Base):
     pool_id = Column(Integer, ForeignKey('pool.id', ondelete='CASCADE'), nullable=False)
     pool = relationship('Pool', back_populates='matches')
     ordinal = Column(Integer, nullable=False)
+    # The round of the pool's round robin or swiss stage this match belongs to, brackets don't use it
+    round = Column(Integer, nullable=True)
     status = Column(Integer, nullable=False, default=MatchStatus.PENDING)
+    # Where and when the match is played, if the stage has courts to schedule matches on. Slots are match_duration
+    # minutes long.
+    court = Column(Integer, nullable=True)
+    slot = Column(Integer, nullable=True)
 
     # The competitors could be populated at creation, or after the feeder matches complete
-    competitor_1_id = Column(Integer, ForeignKey('competitor.id'), nullable=True)
+    competitor_1_id = Column(Integer, ForeignKey('competitor.id'), nullable=True, index=True)
     competitor_1 = relationship('Competitor', primaryjoin='Competitor.id==Match.competitor_1_id')
     competitor_1_score = Column(Integer, nullable=True)
-    competitor_2_id = Column(Integer, ForeignKey('competitor.id'), nullable=True)
+    competitor_2_id = Column(Integer, ForeignKey('competitor.id'), nullable=True, index=True)
     competitor_2 = relationship('Competitor', primaryjoin='Competitor.id==Match.competitor_2_id')
     competitor_2_score = Column(Integer, nullable=True)
 
     # A match can point to another match so that when this match finishes, the winner populates a competitor slot on
     # the next match. Which competitor slot is populated depends on the
-    next_match_id = Column(Integer, ForeignKey('match.id'), nullable=True)
-    feeder_matches = relationship('Match', backref=backref('next_match', remote_side=[id]))
+    next_match_id = Column(Integer, ForeignKey('match.id'), nullable=True, index=True)
+    feeder_matches = relationship('Match', foreign_keys=[next_match_id],
+                                  backref=backref('next_match', remote_side=[id]))
     next_match_competitor_slot = Column(Integer, nullable=True)
 
+    # Double elimination brackets also route the loser of a match into a competitor slot on a losers bracket match
+    loser_next_match_id = Column(Integer, ForeignKey('match.id'), nullable=True, index=True)
+    loser_feeder_matches = relationship('Match', foreign_keys=[loser_next_match_id],
+                                        backref=backref('loser_next_match', remote_side=[id]))
+    loser_next_match_competitor_slot = Column(Integer, nullable=True)
+
     status_options = list(map(int, MatchStatus))
 
     __table_args__ = (
         CheckConstraint(f'status IN ({",".join(map(str, status_options))})', name='valid_status'),
+        # Also serves the pool's matches relationship, which is ordered by ordinal
+        Index('ix_match_pool_id_ordinal', 'pool_id', 'ordinal'),
+        # Checking whether a pool's matches are all complete only has to look at the ones that aren't
+        Index('ix_match_pool_id_incomplete', 'pool_id', postgresql_where=text(f'status != {MatchStatus.COMPLETE:d}')),
+    )
+
+    @staticmethod
+    def by_id(match_id: int, db: Session):
+        return db.query(Match).filter(Match.id == match_id).first()
+
+    def update(self, match: MatchUpdate, db: Session, autocommit=True):
+        status_changed = self.status != match.status
+        self.competitor_1_score = match.competitor_1_score
+        self.competitor_2_score = match.competitor_2_score
+        self.status = match.status
+        db.add(self)
+        db.flush()
+
+        stage = self.pool.stage
+        if self.status == Match.MatchStatus.COMPLETE:
+            # Finishing a round of a lazy stage creates the matches for the next one
+            stage.materialize_next_round_if_ready(db, autocommit=False)
+        if status_changed:
+            # Only a match starting, finishing or being reset changes when the others can be played, and only the
+            # matches still to be played are moved around
+            stage.schedule_matches(db, autocommit=False)
+
+        if autocommit:
+            db.commit()
+            db.refresh(self)
+
+
+# The counter columns on pools and stages for each match status
+MATCH_STATUS_COUNT_COLUMNS = {
+    Match.MatchStatus.PENDING: 'pending_match_count',
+    Match.MatchStatus.ACTIVE: 'active_match_count',
+    Match.MatchStatus.COMPLETE: 'complete_match_count',
+}
+MATCH_COUNT_COLUMNS = ['match_count'] + list(MATCH_STATUS_COUNT_COLUMNS.values())
+
+
+def match_count_triggers_sql() -> str:
+    """
+    Returns the SQL for the statement level triggers that keep the match counters on pools and stages up to date. The
+    counters change in the same statement as the matches, so they can't get out of step with them whatever changed the
+    matches, whether it's the ORM, a bulk insert of a stage's matches or a bulk update. Each statement adds up its
+    changes per pool first, so inserting thousands of matches is a single UPDATE of each table. Changes that don't
+    move any counts, like rescheduling or scoring a match without changing its status, don't touch either table.
+    """
+    sums = ',\n            '.join(
+        ['sum(sign) AS match_count'] +
+        [f'sum(CASE WHEN status = {status:d} THEN sign ELSE 0 END) AS {column}'
+         for status, column in MATCH_STATUS_COUNT_COLUMNS.items()]
+    )
+    add = ',\n            '.join(f'{column} = {{table}}.{column} + deltas.{column}' for column in MATCH_COUNT_COLUMNS)
+    returning = ', '.join(f'deltas.{column}' for column in MATCH_COUNT_COLUMNS)
+    totals = ', '.join(f'sum({column}) AS {column}' for column in MATCH_COUNT_COLUMNS)
+    no_change = ', '.join('0' for _ in MATCH_COUNT_COLUMNS)
+
+    changes = {
+        'insert': ('INSERT', 'NEW TABLE AS new_rows', 'SELECT pool_id, status, 1 AS sign FROM new_rows'),
+        'update': ('UPDATE', 'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+                   'SELECT pool_id, status, 1 AS sign FROM new_rows '
+                   'UNION ALL SELECT pool_id, status, -1 AS sign FROM old_rows'),
+        'delete': ('DELETE', 'OLD TABLE AS old_rows', 'SELECT pool_id, status, -1 AS sign FROM old_rows'),
+    }
+    statements = []
+    for name, (operation, transition_tables, changed_rows) in changes.items():
+        statements.append(f"""
+CREATE OR REPLACE FUNCTION count_{name}_matches() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    WITH pool_deltas AS (
+        SELECT pool_id, {sums}
+        FROM ({changed_rows}) changes
+        GROUP BY pool_id
+    ), updated_pools AS (
+        UPDATE pool SET {add.format(table='pool')}
+        FROM pool_deltas deltas
+        WHERE pool.id = deltas.pool_id AND ({returning}) != ({no_change})
+        RETURNING pool.stage_id, {returning}
     )
+    UPDATE stage SET {add.format(table='stage')}
+    FROM (SELECT stage_id, {totals} FROM updated_pools GROUP BY stage_id) deltas
+    WHERE stage.id = deltas.stage_id;
+    RETURN NULL;
+END
+$$;
+CREATE TRIGGER count_{name}_matches AFTER {operation} ON match REFERENCING {transition_tables}
+    FOR EACH STATEMENT EXECUTE PROCEDURE count_{name}_matches();""")
+    return '\n'.join(statements)
+
+
+# Tables built from the models get the triggers too, so tests and benchmarks keep their counters up to date
+event.listen(Match.__table__, 'after_create', DDL(match_count_triggers_sql()))
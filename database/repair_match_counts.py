@@ -0,0 +1,20 @@
+"""
+Recounts the matches of every pool and stage and fixes any counters that drifted from the match table.
+
+    python -m database.repair_match_counts
+"""
+from database.db import SessionLocal
+from database.models import Stage
+
+
+def main():
+    db = SessionLocal()
+    try:
+        num_repaired = Stage.repair_match_counts(db)
+    finally:
+        db.close()
+    print(f'Repaired the match counts of {num_repaired} pools and stages')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import logging
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from typing import Optional
+
+from database.models import Stage
+from lib.match_generators.brackets import BracketTemplate, single_elimination_template, double_elimination_template
+from settings import BRACKET_TEMPLATE_CACHE_SIZE, BRACKET_TEMPLATE_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the bracket topology changes so that stale templates on disk are ignored
+TEMPLATE_VERSION = 1
+
+cache_dir: Optional[str] = BRACKET_TEMPLATE_CACHE_DIR
+
+
+def get_bracket_template(stage_type: int, num_competitors: int, grand_final_reset: bool = True) -> BracketTemplate:
+    """
+    Returns the bracket template for the given stage type and number of competitors. Templates only depend on the
+    shape of the bracket, not on who is in it or how they were seeded, so they are built once and then served from a
+    bounded LRU cache, and from disk across restarts if BRACKET_TEMPLATE_CACHE_DIR is set. Templates are shared, so
+    they must not be modified.
+    """
+    if stage_type == Stage.StageType.BRACKET_SINGLE_ELIMINATION:
+        # Single elimination brackets don't have a grand final, so don't cache them twice
+        grand_final_reset = False
+    elif stage_type != Stage.StageType.BRACKET_DOUBLE_ELIMINATION:
+        raise ValueError(f'No bracket template for stages of type {stage_type}')
+
+    return _get_cached_template(int(stage_type), num_competitors, grand_final_reset)
+
+
+@lru_cache(maxsize=BRACKET_TEMPLATE_CACHE_SIZE)
+def _get_cached_template(stage_type: int, num_competitors: int, grand_final_reset: bool) -> BracketTemplate:
+    path = _template_path(stage_type, num_competitors, grand_final_reset)
+    if path:
+        template = _load_template(path)
+        if template:
+            return template
+
+    if stage_type == Stage.StageType.BRACKET_SINGLE_ELIMINATION:
+        template = single_elimination_template(num_competitors)
+    else:
+        template = double_elimination_template(num_competitors, grand_final_reset)
+
+    if path:
+        _save_template(path, template)
+    return template
+
+
+def clear_cache():
+    """
+    Empties the in-memory cache. Templates persisted to disk are kept.
+    """
+    _get_cached_template.cache_clear()
+
+
+def _template_path(stage_type: int, num_competitors: int, grand_final_reset: bool) -> Optional[str]:
+    if not cache_dir:
+        return None
+    return os.path.join(
+        cache_dir,
+        f'bracket-v{TEMPLATE_VERSION}-{stage_type}-{num_competitors}-{int(grand_final_reset)}.pickle',
+    )
+
+
+def _load_template(path: str) -> Optional[BracketTemplate]:
+    try:
+        with open(path, 'rb') as f:
+            template = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # A corrupt file just means the template gets rebuilt and rewritten
+        logger.warning(f'Unable to load bracket template from {path}', exc_info=True)
+        return None
+    return template if isinstance(template, BracketTemplate) else None
+
+
+def _save_template(path: str, template: BracketTemplate):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so other workers never see a partially written template
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(template, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.warning(f'Unable to save bracket template to {path}', exc_info=True)
@@ -0,0 +1,219 @@
+from array import array
+from typing import List, NamedTuple, Optional, Tuple
+
+# A slot source is ('S', seed) for a seeded competitor, ('W', idx) for the winner of match idx, or ('L', idx) for the
+# loser of match idx
+SlotSource = Tuple[str, int]
+
+
+class BracketTemplate(NamedTuple):
+    """
+    The topology of a bracket for a given number of competitors, independent of any tournament. Matches are indexed so
+    that every link points to a match with a higher index, and each attribute is an array indexed by match.
+    """
+    num_competitors: int
+    # The pool (section of the bracket) each match belongs to
+    pool: array
+    # The order the matches should be played in
+    ordinal: array
+    # The 0-based seed placed in each competitor slot, or -1 if the slot is filled by a feeder match
+    seed_1: array
+    seed_2: array
+    # The match the winner moves on to and the competitor slot (1 or 2) they fill, or -1 and 0 if there isn't one
+    next_match: array
+    next_slot: array
+    # The same for the loser, only used by double elimination brackets
+    loser_next_match: array
+    loser_next_slot: array
+
+    def __len__(self):
+        return len(self.ordinal)
+
+
+class _RawMatch(NamedTuple):
+    pool: int
+    phase: int
+    source_1: SlotSource
+    source_2: SlotSource
+
+
+def bracket_size(num_competitors: int) -> int:
+    """
+    Returns the number of lines in the bracket, the smallest power of two that fits every competitor.
+    """
+    if num_competitors < 2:
+        raise ValueError('At least two competitors are needed for a bracket')
+    return 1 << (num_competitors - 1).bit_length()
+
+
+def seed_order(size: int) -> List[int]:
+    """
+    Returns the 0-based seed on each line of a bracket of the given size using standard seed placement, where the top
+    two seeds can only meet in the final, the top four in the semifinals, and so on. Seeds that don't exist are byes,
+    so byes always go to the top seeds.
+    """
+    order = [0]
+    while len(order) < size:
+        num_lines = len(order) * 2
+        order = [line for seed in order for line in (seed, num_lines - 1 - seed)]
+    return order
+
+
+# Pools used to split a double elimination bracket into its sections
+WINNERS_POOL = 0
+LOSERS_POOL = 1
+FINALS_POOL = 2
+
+
+def _single_elimination_rounds(size: int, pool: int = 0) -> Tuple[List[_RawMatch], List[List[int]]]:
+    """
+    Builds the raw matches of a full single elimination bracket with the given number of lines.
+    :return: the raw matches, and the raw match indices of each round
+    """
+    raw: List[_RawMatch] = []
+    rounds: List[List[int]] = []
+
+    lines = seed_order(size)
+    sources: List[SlotSource] = [('S', seed) for seed in lines]
+    phase = 0
+    while len(sources) > 1:
+        round_indices = []
+        for idx in range(0, len(sources), 2):
+            round_indices.append(len(raw))
+            raw.append(_RawMatch(pool, phase, sources[idx], sources[idx + 1]))
+        rounds.append(round_indices)
+        sources = [('W', idx) for idx in round_indices]
+        phase += 1
+
+    return raw, rounds
+
+
+def _collapse(raw: List[_RawMatch], num_competitors: int) -> BracketTemplate:
+    """
+    Removes the matches that have fewer than two competitors because of byes and resolves every remaining slot to
+    either a seed or a feeder match. A match with a single competitor is skipped and that competitor moves straight on
+    to wherever the match's winner would have gone.
+    """
+    # What fills a slot that is fed by the winner or loser of each raw match, or None if nobody ever arrives
+    winner_of: List[Optional[SlotSource]] = [None] * len(raw)
+    loser_of: List[Optional[SlotSource]] = [None] * len(raw)
+    kept: List[Tuple[_RawMatch, SlotSource, SlotSource]] = []
+
+    def resolve(source: SlotSource) -> Optional[SlotSource]:
+        kind, value = source
+        if kind == 'S':
+            return source if value < num_competitors else None
+        return winner_of[value] if kind == 'W' else loser_of[value]
+
+    for raw_idx, raw_match in enumerate(raw):
+        resolved_1 = resolve(raw_match.source_1)
+        resolved_2 = resolve(raw_match.source_2)
+        if resolved_1 is not None and resolved_2 is not None:
+            winner_of[raw_idx] = ('W', len(kept))
+            loser_of[raw_idx] = ('L', len(kept))
+            kept.append((raw_match, resolved_1, resolved_2))
+        else:
+            winner_of[raw_idx] = resolved_1 if resolved_1 is not None else resolved_2
+
+    num_matches = len(kept)
+    template = BracketTemplate(
+        num_competitors=num_competitors,
+        pool=array('i', (raw_match.pool for raw_match, _, _ in kept)),
+        ordinal=array('i', [0] * num_matches),
+        seed_1=array('i', [-1] * num_matches),
+        seed_2=array('i', [-1] * num_matches),
+        next_match=array('i', [-1] * num_matches),
+        next_slot=array('i', [0] * num_matches),
+        loser_next_match=array('i', [-1] * num_matches),
+        loser_next_slot=array('i', [0] * num_matches),
+    )
+
+    for idx, (_, resolved_1, resolved_2) in enumerate(kept):
+        for slot, (kind, value) in ((1, resolved_1), (2, resolved_2)):
+            if kind == 'S':
+                (template.seed_1 if slot == 1 else template.seed_2)[idx] = value
+            elif kind == 'W':
+                template.next_match[value] = idx
+                template.next_slot[value] = slot
+            else:
+                template.loser_next_match[value] = idx
+                template.loser_next_slot[value] = slot
+
+    # Matches are played phase by phase, keeping the bracket order within each phase
+    play_order = sorted(range(num_matches), key=lambda idx: (kept[idx][0].phase, idx))
+    for ordinal, idx in enumerate(play_order):
+        template.ordinal[idx] = ordinal
+
+    return template
+
+
+def single_elimination_template(num_competitors: int) -> BracketTemplate:
+    """
+    Builds the template for a single elimination bracket. Fields that aren't a power of two get byes for the top
+    seeds, and no match is created for a bye.
+    """
+    raw, _ = _single_elimination_rounds(bracket_size(num_competitors))
+    return _collapse(raw, num_competitors)
+
+
+def double_elimination_template(num_competitors: int, grand_final_reset: bool = True) -> BracketTemplate:
+    """
+    Builds the template for a double elimination bracket, split into winners, losers and finals pools.
+
+    With k winners bracket rounds, the losers bracket alternates between rounds where the losers of a winners round
+    drop in to face the losers bracket survivors, and rounds where the survivors play each other. Every other drop in
+    round takes the winners bracket losers in reverse order, which keeps early rematches to a minimum. The losers
+    bracket champion then faces the winners bracket champion in the grand final. If there is a reset, the grand final
+    routes both its winner and loser into it, and it only needs to be played if the losers bracket champion wins the
+    first grand final.
+    """
+    size = bracket_size(num_competitors)
+    num_winners_rounds = size.bit_length() - 1
+
+    raw, winners_rounds = _single_elimination_rounds(size, pool=WINNERS_POOL)
+    # Winners round r is played in phase 2r, which leaves the odd phases in between for the losers bracket
+    raw = [raw_match._replace(phase=raw_match.phase * 2) for raw_match in raw]
+
+    def add_round(sources: List[Tuple[SlotSource, SlotSource]], pool: int, phase: int) -> List[int]:
+        round_indices = []
+        for source_1, source_2 in sources:
+            round_indices.append(len(raw))
+            raw.append(_RawMatch(pool, phase, source_1, source_2))
+        return round_indices
+
+    if num_winners_rounds == 1:
+        # With only two competitors there's no losers bracket, the loser of the first match goes to the grand final
+        losers_champion: SlotSource = ('L', winners_rounds[0][0])
+    else:
+        # The first losers round pairs up the losers of the first winners round
+        first_round_losers = [('L', idx) for idx in winners_rounds[0]]
+        survivors = add_round(list(zip(first_round_losers[::2], first_round_losers[1::2])), LOSERS_POOL, 1)
+
+        for winners_round in range(1, num_winners_rounds):
+            # The losers of this winners round drop in to face the survivors
+            dropped = [('L', idx) for idx in winners_rounds[winners_round]]
+            if winners_round % 2 == 1:
+                dropped.reverse()
+            survivors = add_round(
+                [(('W', survivor), drop) for survivor, drop in zip(survivors, dropped)],
+                LOSERS_POOL,
+                winners_round * 2 + 1,
+            )
+
+            # Then the survivors play each other until there's one left to face the next round's losers
+            if len(survivors) > 1:
+                survivor_sources = [('W', idx) for idx in survivors]
+                survivors = add_round(
+                    list(zip(survivor_sources[::2], survivor_sources[1::2])),
+                    LOSERS_POOL,
+                    winners_round * 2 + 2,
+                )
+
+        losers_champion = ('W', survivors[0])
+
+    final_phase = num_winners_rounds * 2
+    grand_final, = add_round([(('W', winners_rounds[-1][0]), losers_champion)], FINALS_POOL, final_phase)
+    if grand_final_reset:
+        add_round([(('W', grand_final), ('L', grand_final))], FINALS_POOL, final_phase + 1)
+
+    return _collapse(raw, num_competitors)
@@ -1,11 +1,22 @@
-import itertools
 from abc import ABC, abstractmethod
+from itertools import count
 from math import floor
 from random import shuffle
-from typing import List
+from typing import List, Dict, Any, Sequence, Tuple, Callable, Set
+
+from sqlalchemy import text, func
 
 from database.db import Session
 from database.models import Stage, Competitor, Pool, Match
+from lib.match_generators.bracket_templates import get_bracket_template
+from lib.match_generators.brackets import BracketTemplate
+from lib.match_generators.parallel import schedule_pools, schedule_pool
+from lib.match_generators.pool_assignment import PoolEntrant, assign_pools, sort_by_rating
+from lib.match_generators.swiss import SwissPlayer, swiss_pairings, WIN_POINTS, DRAW_POINTS
+from lib.standings import seed_from_standings
+
+# Number of rows sent per multi-row INSERT when persisting generated matches
+MATCH_INSERT_BATCH_SIZE = 1000
 
 
 class MatchGenerator(ABC):
@@ -21,19 +32,88 @@ class MatchGenerator(ABC):
         """
         Returns an instance of the appropriate MatchGenerator sub-type for the given stage.
         """
-        if stage.type == Stage.StageType.POOL:
-            return PoolMatchGenerator(stage)
-        elif stage.type == Stage.StageType.BRACKET_SINGLE_ELIMINATION:
-            return SingleEliminationBracketMatchGenerator(stage)
-        elif stage.type == Stage.StageType.BRACKET_DOUBLE_ELIMINATION:
-            return DoubleEliminationBracketMatchGenerator(stage)
+        return MatchGenerator.get_match_generator_class(stage.type)(stage)
+
+    @staticmethod
+    def get_match_generator_class(stage_type: int):
+        """
+        Returns the MatchGenerator sub-type for the given stage type.
+        """
+        if stage_type == Stage.StageType.POOL:
+            return PoolMatchGenerator
+        elif stage_type == Stage.StageType.BRACKET_SINGLE_ELIMINATION:
+            return SingleEliminationBracketMatchGenerator
+        elif stage_type == Stage.StageType.BRACKET_DOUBLE_ELIMINATION:
+            return DoubleEliminationBracketMatchGenerator
+        elif stage_type == Stage.StageType.SWISS:
+            return SwissMatchGenerator
         else:
-            raise ValueError(f'No match generator configured for type {stage.type}')
+            raise ValueError(f'No match generator configured for type {stage_type}')
 
     def next_match_ordinal(self):
         self._match_ordinal += 1
         return self._match_ordinal - 1
 
+    def _get_entrants(self, db: Session) -> List[PoolEntrant]:
+        """
+        Loads just the columns needed to place the stage's competitors, in registration order.
+        """
+        rows = db.query(Competitor.id, Competitor.rating, Competitor.organization) \
+            .filter(Competitor.tournament_id == self._stage.tournament_id) \
+            .order_by(Competitor.id)
+        return [PoolEntrant(*row) for row in rows]
+
+    def _insert_pools(self, num_pools: int, db: Session) -> List[int]:
+        """
+        Inserts num_pools pools for the stage with a single multi-row INSERT ... RETURNING.
+        :return: the ids of the new pools, indexed by pool ordinal
+        """
+        pool_table = Pool.__table__
+        result = db.execute(
+            pool_table.insert()
+            .values([{'stage_id': self._stage.id, 'ordinal': ordinal} for ordinal in range(num_pools)])
+            .returning(pool_table.c.id, pool_table.c.ordinal)
+        )
+        pool_ids = [0] * num_pools
+        for pool_id, ordinal in result:
+            pool_ids[ordinal] = pool_id
+
+        # The stage's pools were just created behind the ORM's back, so make sure they are reloaded on next access
+        db.expire(self._stage, ['pools'])
+        return pool_ids
+
+    @staticmethod
+    def _reserve_match_ids(count: int, db: Session) -> List[int]:
+        """
+        Pulls count ids from the match id sequence in one round trip, so that rows linking to each other can be built
+        before any of them are inserted.
+        """
+        result = db.execute(
+            text("SELECT nextval(pg_get_serial_sequence('match', 'id')) FROM generate_series(1, :count)"),
+            {'count': count},
+        )
+        return [match_id for match_id, in result]
+
+    @staticmethod
+    def _insert_matches(match_rows: Sequence[Dict[str, Any]], db: Session):
+        """
+        Inserts the given match rows with multi-row INSERTs of up to MATCH_INSERT_BATCH_SIZE rows each.
+        """
+        match_table = Match.__table__
+        for start in range(0, len(match_rows), MATCH_INSERT_BATCH_SIZE):
+            db.execute(match_table.insert().values(match_rows[start:start + MATCH_INSERT_BATCH_SIZE]))
+
+    @staticmethod
+    def _next_match_ordinal_for_stage(stage: Stage, db: Session) -> int:
+        """
+        Returns the ordinal that follows the stage's existing matches, for stages that create matches a round at a
+        time.
+        """
+        return db.query(func.coalesce(func.max(Match.ordinal) + 1, 0)) \
+            .join(Pool) \
+            .filter(Pool.stage_id == stage.id) \
+            .scalar()
+
     @abstractmethod
     def generate_matches(self, db: Session, autocommit=True):
         raise NotImplementedError()
@@ -42,76 +122,266 @@ class MatchGenerator(ABC):
 class PoolMatchGenerator(MatchGenerator):
     def generate_matches(self, db: Session, autocommit=True):
         # Grab the config values
-        minimum_pool_size: int = self._stage.parsed_params['minimum_pool_size']
-        if minimum_pool_size > len(self._stage.tournament.competitors):
+        params = self._stage.parsed_params
+        minimum_pool_size: int = params['minimum_pool_size']
+        entrants = self._get_entrants(db)
+        if minimum_pool_size > len(entrants):
             # There's not enough competitors for even a single pool
             raise ValueError('There are not enough competitors for even a single pool')
         if minimum_pool_size == 0:
             raise ValueError('Cannot have a pool size of 0')
 
-        # Copy the competitors list so we don't muck up the ORM list
-        competitors: List[Competitor] = [competitor for competitor in self._stage.tournament.competitors]
-        # Randomize the order so we get randomized pools
-        shuffle(competitors)
+        # Randomize the order so we get randomized pools, seeding only reorders competitors with different ratings
+        shuffle(entrants)
 
         # Determine how many pools are necessary
-        num_pools = floor(len(competitors) / minimum_pool_size)
+        num_pools = floor(len(entrants) / minimum_pool_size)
+        pool_competitor_ids = assign_pools(entrants, num_pools, params['seeded'], params['spread_organizations'])
 
-        for i in range(num_pools):
-            # Create a new pool
-            pool = Pool(stage=self._stage, ordinal=i)
+        # Create the pools, then generate and insert their matches
+        pool_ids = self._insert_pools(num_pools, db)
+        if params['lazy']:
+            # Only the schedule is stored, each round's matches are created once the round before it is complete
+            self._stage.schedule = pool_competitor_ids
+            self._stage.materialized_rounds = 1
+            self.materialize_round(self._stage, 0, db)
+        else:
+            match_rows = []
+            for pool_id, rounds in zip(pool_ids, schedule_pools(pool_competitor_ids)):
+                match_rows += self._generate_matches_for_pool(pool_id, rounds, self.next_match_ordinal)
+            self._insert_matches(match_rows, db)
 
-            # Use the pool's ordinal value to grab its competitors
-            pool_competitors = [competitor
-                                for idx, competitor in enumerate(competitors)
-                                if idx % num_pools == pool.ordinal]
+        if autocommit:
+            db.commit()
+
+    @classmethod
+    def materialize_round(cls, stage: Stage, round_index: int, db: Session):
+        """
+        Creates the matches for a single round of a lazy stage from its stored schedule. The round robin and its rest
+        ordering are deterministic, so the round comes out the same as it would have if every match had been created
+        up front.
+        """
+        pool_ids = [pool_id for pool_id, in db.query(Pool.id).filter(Pool.stage_id == stage.id).order_by(Pool.ordinal)]
+        ordinals = count(cls._next_match_ordinal_for_stage(stage, db))
 
-            # Generate matches for the pool
-            matches = self._generate_matches_for_pool(pool, pool_competitors)
+        match_rows = []
+        for pool_id, competitor_ids in zip(pool_ids, stage.schedule):
+            # Smaller pools can run out of rounds before the rest of the stage
+            rounds = schedule_pool(competitor_ids)[round_index:round_index + 1]
+            match_rows += cls._generate_matches_for_pool(pool_id, rounds, ordinals.__next__, first_round=round_index)
+        cls._insert_matches(match_rows, db)
 
-            # Add the pool and matches to the DB
-            db.add(pool)
-            for match in matches:
-                db.add(match)
+        # Make sure any pools that were already loaded pick up their new matches
+        for pool in stage.pools:
+            db.expire(pool, ['matches'])
+
+    @staticmethod
+    def _generate_matches_for_pool(pool_id: int, rounds: Sequence[Sequence[Tuple[int, int]]],
+                                   next_ordinal: Callable[[], int], first_round: int = 0) -> List[Dict[str, Any]]:
+        """
+        Given the pool and its scheduled rounds, generate and return a list of match rows. The rounds come from
+        schedule_pools, so each competitor faces each other competitor, and the matches are ordered so that
+        competitors get as much rest as possible between their matches.
+        :param pool_id: the id of the Pool to contain the matches
+        :param rounds: the competitor ids of each match in each round, in the order they should be played
+        :param next_ordinal: returns the ordinal for the next match
+        :param first_round: the round index of the first round given
+        :return: a list of generated match rows for the given pool and rounds
+        """
+        matches = []
+        for round_index, pairings in enumerate(rounds, first_round):
+            for competitor_1_id, competitor_2_id in pairings:
+                matches.append({
+                    'pool_id': pool_id,
+                    'ordinal': next_ordinal(),
+                    'round': round_index,
+                    'status': Match.MatchStatus.PENDING,
+                    'competitor_1_id': competitor_1_id,
+                    'competitor_2_id': competitor_2_id,
+                })
+
+        return matches
+
+
+class SwissMatchGenerator(MatchGenerator):
+    """
+    Puts every competitor in a single pool and pairs them a round at a time, so each round can take the results of
+    the ones before it into account.
+    """
+    def generate_matches(self, db: Session, autocommit=True):
+        params = self._stage.parsed_params
+        competitor_ids = [entrant.id for entrant in self._get_entrants(db)]
+        # Ties in the standings keep this order, so unseeded stages get random pairings within each score group
+        shuffle(competitor_ids)
+        if len(competitor_ids) < 2:
+            raise ValueError('There are not enough competitors for a swiss stage')
+        if params['num_rounds'] is not None and not 0 < params['num_rounds'] < len(competitor_ids):
+            raise ValueError(f'A swiss stage with {len(competitor_ids)} competitors needs between 1 and '
+                             f'{len(competitor_ids) - 1} rounds')
+
+        self._insert_pools(1, db)
+        self._stage.schedule = [competitor_ids]
+        self._stage.materialized_rounds = 1
+        self.materialize_round(self._stage, 0, db)
 
         if autocommit:
             db.commit()
 
-    def _generate_matches_for_pool(self, pool: Pool, competitors: List[Competitor]) -> List[Match]:
+    @classmethod
+    def materialize_round(cls, stage: Stage, round_index: int, db: Session):
         """
-        Given the pool, generate and return a list of matches. Each competitor should face each other competitor.
-        :param pool: the Pool to contain the matches
-        :param competitors: the Competitors included in the pool
-        :return: a list of generated matches for the given pool and competitors list
+        Pairs the next round from the results so far. A competitor with a bye gets a match with no opponent that is
+        already complete, and counts as a win.
         """
-        # Generate all the possible pairings, then filter out pairings where a competitor faces itself, and duplicates
-        pairings = itertools.product(competitors, competitors)
-        pairings = {
-            (c1, c2) if c1.id < c2.id else (c2, c1)
-            for c1, c2 in pairings
-            if c1 != c2
-        }
+        pool_id = db.query(Pool.id).filter(Pool.stage_id == stage.id).scalar()
+        players = cls._get_players(stage, pool_id, db)
+        pairings, bye = swiss_pairings(players)
 
-        matches = []
-        for pairing in pairings:
-            matches.append(Match(
-                pool=pool,
-                ordinal=self.next_match_ordinal(),
-                competitor_1=pairing[0],
-                competitor_2=pairing[1],
-            ))
+        ordinals = count(cls._next_match_ordinal_for_stage(stage, db))
+        match_rows = [{
+            'pool_id': pool_id,
+            'ordinal': next(ordinals),
+            'round': round_index,
+            'status': Match.MatchStatus.PENDING,
+            'competitor_1_id': competitor_1_id,
+            'competitor_2_id': competitor_2_id,
+        } for competitor_1_id, competitor_2_id in pairings]
+        if bye is not None:
+            match_rows.append({
+                'pool_id': pool_id,
+                'ordinal': next(ordinals),
+                'round': round_index,
+                'status': Match.MatchStatus.COMPLETE,
+                'competitor_1_id': bye,
+                'competitor_2_id': None,
+            })
+        cls._insert_matches(match_rows, db)
 
-        # Randomize the match order to reduce the number of 'double headers'
-        shuffle(matches)  # TODO: There's probably an optimal way to do this
+        for pool in stage.pools:
+            db.expire(pool, ['matches'])
 
-        return matches
+    @staticmethod
+    def _get_players(stage: Stage, pool_id: int, db: Session) -> List[SwissPlayer]:
+        """
+        Tallies each competitor's score and past opponents from the matches played so far.
+        """
+        competitor_ids = stage.schedule[0]
+        scores: Dict[int, float] = dict.fromkeys(competitor_ids, 0)
+        opponents: Dict[int, Set[int]] = {competitor_id: set() for competitor_id in competitor_ids}
+        had_bye: Set[int] = set()
 
+        matches = db.query(Match.competitor_1_id, Match.competitor_1_score, Match.competitor_2_id,
+                           Match.competitor_2_score) \
+            .filter(Match.pool_id == pool_id, Match.status == Match.MatchStatus.COMPLETE)
+        for competitor_1_id, competitor_1_score, competitor_2_id, competitor_2_score in matches:
+            if competitor_2_id is None:
+                scores[competitor_1_id] += WIN_POINTS
+                had_bye.add(competitor_1_id)
+                continue
 
-class SingleEliminationBracketMatchGenerator(MatchGenerator):
-    def generate_matches(self, db: Session, autocommit=True):
-        raise NotImplementedError()
+            opponents[competitor_1_id].add(competitor_2_id)
+            opponents[competitor_2_id].add(competitor_1_id)
+            competitor_1_score, competitor_2_score = competitor_1_score or 0, competitor_2_score or 0
+            if competitor_1_score > competitor_2_score:
+                scores[competitor_1_id] += WIN_POINTS
+            elif competitor_2_score > competitor_1_score:
+                scores[competitor_2_id] += WIN_POINTS
+            else:
+                scores[competitor_1_id] += DRAW_POINTS
+                scores[competitor_2_id] += DRAW_POINTS
+
+        # Ratings only break ties between equal scores
+        ratings = dict(db.query(Competitor.id, Competitor.rating).filter(Competitor.id.in_(competitor_ids))) \
+            if stage.parsed_params['seeded'] else {}
 
+        return [
+            SwissPlayer(competitor_id, scores[competitor_id], ratings.get(competitor_id),
+                        frozenset(opponents[competitor_id]), competitor_id in had_bye)
+            for competitor_id in competitor_ids
+        ]
 
-class DoubleEliminationBracketMatchGenerator(MatchGenerator):
+
+class BracketMatchGenerator(MatchGenerator):
+    """
+    Base class for generators that build a whole bracket up front. The bracket's topology comes from a
+    BracketTemplate, and every match is inserted with its links to later matches already resolved.
+    """
     def generate_matches(self, db: Session, autocommit=True):
+        competitor_ids = self._get_seeded_competitor_ids(db)
+        if len(competitor_ids) < 2:
+            raise ValueError('There are not enough competitors for a bracket')
+
+        template = self._get_template(len(competitor_ids))
+        pool_ids = self._insert_pools(max(template.pool) + 1, db)
+        match_ids = self._reserve_match_ids(len(template), db)
+        match_rows = self._build_match_rows(template, competitor_ids, pool_ids, match_ids)
+
+        # Every link points to a later match in the template, so insert in reverse to satisfy the foreign keys
+        self._insert_matches(match_rows[::-1], db)
+
+        if autocommit:
+            db.commit()
+
+    @abstractmethod
+    def _get_template(self, num_competitors: int) -> BracketTemplate:
         raise NotImplementedError()
+
+    def _get_seeded_competitor_ids(self, db: Session) -> List[int]:
+        """
+        Returns the ids of the stage's competitors from the top seed down. Brackets that follow a pool stage are seeded
+        from its standings, with anyone that didn't play in the pools seeded after them in registration order.
+        Otherwise seeded stages seed by rating, highest first, then by registration order, and unseeded stages draw
+        the seeds at random.
+        """
+        entrants = self._get_entrants(db)
+        previous_stage = db.query(Stage) \
+            .filter(Stage.tournament_id == self._stage.tournament_id, Stage.ordinal < self._stage.ordinal) \
+            .order_by(Stage.ordinal.desc()) \
+            .first()
+        if previous_stage is not None and previous_stage.type == Stage.StageType.POOL:
+            competitor_ids = seed_from_standings(list(previous_stage.standings(db).values()))
+            placed = set(competitor_ids)
+            return competitor_ids + [entrant.id for entrant in entrants if entrant.id not in placed]
+
+        if self._stage.parsed_params['seeded']:
+            entrants = sort_by_rating(entrants)
+        else:
+            shuffle(entrants)
+        return [entrant.id for entrant in entrants]
+
+    def _build_match_rows(self, template: BracketTemplate, competitor_ids: Sequence[int], pool_ids: Sequence[int],
+                          match_ids: Sequence[int]) -> List[Dict[str, Any]]:
+        ordinal_offset = self._match_ordinal
+        self._match_ordinal += len(template)
+
+        match_rows = []
+        for idx in range(len(template)):
+            seed_1, seed_2 = template.seed_1[idx], template.seed_2[idx]
+            next_match, loser_next_match = template.next_match[idx], template.loser_next_match[idx]
+            match_rows.append({
+                'id': match_ids[idx],
+                'pool_id': pool_ids[template.pool[idx]],
+                'ordinal': ordinal_offset + template.ordinal[idx],
+                'status': Match.MatchStatus.PENDING,
+                'competitor_1_id': competitor_ids[seed_1] if seed_1 >= 0 else None,
+                'competitor_2_id': competitor_ids[seed_2] if seed_2 >= 0 else None,
+                'next_match_id': match_ids[next_match] if next_match >= 0 else None,
+                'next_match_competitor_slot': template.next_slot[idx] or None,
+                'loser_next_match_id': match_ids[loser_next_match] if loser_next_match >= 0 else None,
+                'loser_next_match_competitor_slot': template.loser_next_slot[idx] or None,
+            })
+        return match_rows
+
+
+class SingleEliminationBracketMatchGenerator(BracketMatchGenerator):
+    def _get_template(self, num_competitors: int) -> BracketTemplate:
+        return get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, num_competitors)
+
+
+class DoubleEliminationBracketMatchGenerator(BracketMatchGenerator):
+    def _get_template(self, num_competitors: int) -> BracketTemplate:
+        return get_bracket_template(
+            Stage.StageType.BRACKET_DOUBLE_ELIMINATION,
+            num_competitors,
+            self._stage.parsed_params['grand_final_reset'],
+        )
@@ -0,0 +1,55 @@
+from typing import Dict, List, Sequence, Tuple
+
+
+def order_rounds_for_rest(rounds: Sequence[Sequence[Tuple[int, int]]]) -> List[List[Tuple[int, int]]]:
+    """
+    Orders round robin matches so competitors get as much rest as possible between their matches. Rounds are played
+    in order and, within a round, the matches whose competitors played longest ago go first. Since each competitor
+    plays at most once per round, the two competitors from the last match of a round always sort to the end of the
+    next one, so nobody plays back to back as long as every round has at least three matches (pools of six or more).
+    Sorting each round keeps this at O(m log m) for m matches, and ties are broken by the pairing itself so the result
+    is deterministic.
+    :param rounds: the pairings for each round, as produced by round_robin_rounds
+    :return: the pairings of each round in the order they should be played
+    """
+    # Maps competitor id -> position of the last match it was scheduled in, -1 if it hasn't played yet
+    last_played: Dict[int, int] = {}
+    position = 0
+    ordered_rounds: List[List[Tuple[int, int]]] = []
+
+    for round_pairings in rounds:
+        def rest_key(pairing: Tuple[int, int]):
+            last_1 = last_played.get(pairing[0], -1)
+            last_2 = last_played.get(pairing[1], -1)
+            return max(last_1, last_2), min(last_1, last_2), pairing
+
+        ordered_round = sorted(round_pairings, key=rest_key)
+        for pairing in ordered_round:
+            last_played[pairing[0]] = last_played[pairing[1]] = position
+            position += 1
+        ordered_rounds.append(ordered_round)
+
+    return ordered_rounds
+
+
+def order_for_rest(rounds: Sequence[Sequence[Tuple[int, int]]]) -> List[Tuple[int, int]]:
+    """
+    Same as order_rounds_for_rest, flattened into a single list of pairings.
+    """
+    return [pairing for ordered_round in order_rounds_for_rest(rounds) for pairing in ordered_round]
+
+
+def minimum_rest(ordered_pairings: Sequence[Tuple[int, int]]) -> int:
+    """
+    Returns the smallest number of matches any competitor sits out between two of its matches, or -1 if nobody plays
+    more than once. A result of 0 means someone plays back to back.
+    """
+    last_played: Dict[int, int] = {}
+    smallest = -1
+    for position, pairing in enumerate(ordered_pairings):
+        for competitor_id in pairing:
+            if competitor_id in last_played:
+                rest = position - last_played[competitor_id] - 1
+                smallest = rest if smallest == -1 else min(smallest, rest)
+            last_played[competitor_id] = position
+    return smallest
@@ -0,0 +1,59 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil
+from threading import Lock
+from typing import List, Optional, Sequence, Tuple
+
+from lib.match_generators.ordering import order_rounds_for_rest
+from lib.match_generators.round_robin import round_robin_rounds
+from settings import PARALLEL_MATCH_GENERATION_WORKERS, PARALLEL_MATCH_GENERATION_THRESHOLD
+
+# This module is imported by the worker processes, so it must not pull in anything that touches the database
+
+workers = PARALLEL_MATCH_GENERATION_WORKERS
+threshold = PARALLEL_MATCH_GENERATION_THRESHOLD
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def schedule_pool(competitor_ids: Sequence[int]) -> List[List[Tuple[int, int]]]:
+    """
+    Returns the pairings of each round of a pool's round robin in the order they should be played.
+    """
+    return order_rounds_for_rest(round_robin_rounds(competitor_ids))
+
+
+def schedule_pools(pool_competitor_ids: Sequence[Sequence[int]]) -> List[List[List[Tuple[int, int]]]]:
+    """
+    Schedules each pool's round robin. Pools are independent of each other, so once there are at least threshold of
+    them they are fanned out across a pool of worker processes. Only plain id lists cross the process boundary.
+    :param pool_competitor_ids: the competitor ids in each pool
+    :return: the ordered pairings of each round for each pool
+    """
+    if workers < 2 or len(pool_competitor_ids) < threshold:
+        return [schedule_pool(competitor_ids) for competitor_ids in pool_competitor_ids]
+
+    # A few chunks per worker keeps them all busy without paying to ship each pool separately
+    chunksize = ceil(len(pool_competitor_ids) / (workers * 4))
+    return list(_get_executor().map(schedule_pool, pool_competitor_ids, chunksize=chunksize))
+
+
+def shutdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor:
+            _executor.shutdown()
+            _executor = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """
+    The worker processes are started on first use and then kept around, so only the first large stage pays for it.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Spawn rather than fork so workers don't inherit the parent's database connections or threads
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
@@ -0,0 +1,201 @@
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Open pools checked for one without a member of an entrant's organization before falling back to its heaps
+SPREAD_SCAN_LIMIT = 16
+
+
+class PoolEntrant(NamedTuple):
+    id: int
+    rating: Optional[int] = None
+    organization: Optional[str] = None
+
+
+def sort_by_rating(entrants: Sequence[PoolEntrant]) -> List[PoolEntrant]:
+    """
+    Returns the entrants sorted by rating, highest first. Unrated entrants go last, and the sort is stable so ties keep
+    the order they were given in.
+    """
+    return sorted(entrants, key=lambda entrant: -entrant.rating if entrant.rating is not None else 1)
+
+
+def assign_pools(entrants: Sequence[PoolEntrant], num_pools: int, seeded: bool = False,
+                 spread_organizations: bool = False) -> List[List[int]]:
+    """
+    Splits the entrants into num_pools pools. Pool sizes never differ by more than one.
+
+    Unseeded entrants are dealt out in the order given, so callers should shuffle them first for random pools. Seeded
+    entrants are sorted by rating, highest first, and snake seeded: the first num_pools seeds go to pools 0..n-1, the
+    next num_pools to pools n-1..0, and so on, which keeps the total strength of each pool even.
+
+    When spreading organizations, members of the same organization are kept apart as much as possible. Unseeded, each
+    organization's members are dealt out consecutively, which puts them in different pools until there are more
+    members than pools. Seeded, each tier of num_pools seeds is still spread one per pool, but each entrant takes the
+    first open pool in snake order that has the fewest members of its organization. Dealing is linear in the number
+    of entrants, see _assign_seeded_spreading_organizations for what spreading seeded entrants costs.
+    :param entrants: the entrants to assign
+    :param num_pools: the number of pools to split them into
+    :param seeded: whether to snake seed by rating
+    :param spread_organizations: whether to keep members of the same organization apart
+    :return: the entrant ids in each pool
+    """
+    if num_pools < 1:
+        raise ValueError('At least one pool is needed')
+
+    if seeded:
+        entrants = sort_by_rating(entrants)
+        if spread_organizations:
+            return _assign_seeded_spreading_organizations(entrants, num_pools)
+        return _deal(entrants, num_pools, snake=True)
+
+    if spread_organizations:
+        entrants = _group_by_organization(entrants)
+    return _deal(entrants, num_pools, snake=False)
+
+
+def _snake_pool(position: int, num_pools: int) -> int:
+    tier, offset = divmod(position, num_pools)
+    return offset if tier % 2 == 0 else num_pools - 1 - offset
+
+
+def _deal(entrants: Sequence[PoolEntrant], num_pools: int, snake: bool) -> List[List[int]]:
+    pools: List[List[int]] = [[] for _ in range(num_pools)]
+    for position, entrant in enumerate(entrants):
+        pools[_snake_pool(position, num_pools) if snake else position % num_pools].append(entrant.id)
+    return pools
+
+
+def _group_by_organization(entrants: Sequence[PoolEntrant]) -> List[PoolEntrant]:
+    """
+    Reorders the entrants so that each organization's members are next to each other, largest organization first.
+    Entrants without an organization can't clash with anyone, so they fill in at the end.
+    """
+    by_organization: Dict[str, List[PoolEntrant]] = defaultdict(list)
+    unaffiliated = []
+    for entrant in entrants:
+        if entrant.organization is None:
+            unaffiliated.append(entrant)
+        else:
+            by_organization[entrant.organization].append(entrant)
+
+    members = sorted(by_organization.values(), key=len, reverse=True)
+    return [entrant for organization_members in members for entrant in organization_members] + unaffiliated
+
+
+class _OrganizationPools:
+    """
+    How many members of one organization each pool has. The pools are also kept in two min-heaps by that count and
+    then by snake order, one for the tiers that go up the pools and one for the tiers that come back down. Entries are
+    never updated in place: a pool gets a new entry whenever its count goes up, and the old one is dropped when it
+    reaches the top. The heaps are only built once a member can't simply take the first open pool.
+    """
+
+    def __init__(self, num_pools: int):
+        self._num_pools = num_pools
+        self.counts: Dict[int, int] = {}
+        # Entries are (count, snake key, pool), where the snake key is the pool going up and -pool coming down
+        self._heaps: Optional[Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]]]] = None
+        # Entries taken off each heap because their pool was closed in the tier they were set aside in
+        self._set_aside: Tuple[List[Tuple[int, int, int]], List[Tuple[int, int, int]]] = ([], [])
+        self._set_aside_tier = [-1, -1]
+
+    def add(self, pool: int):
+        count = self.counts[pool] = self.counts.get(pool, 0) + 1
+        if self._heaps is not None:
+            heappush(self._heaps[0], (count, pool, pool))
+            heappush(self._heaps[1], (count, -pool, pool))
+
+    def best_open_pool(self, tier: int, is_open: Callable[[int], bool]) -> int:
+        """
+        Returns the open pool with the fewest members of the organization, first in the tier's snake order on ties
+        """
+        if self._heaps is None:
+            self._heaps = tuple(
+                [(self.counts.get(pool, 0), pool if direction == 0 else -pool, pool) for pool in range(self._num_pools)]
+                for direction in (0, 1)
+            )
+            for heap in self._heaps:
+                heapify(heap)
+
+        direction = tier % 2
+        heap, set_aside = self._heaps[direction], self._set_aside[direction]
+        if self._set_aside_tier[direction] != tier:
+            # Pools closed in an earlier tier are open again
+            for entry in set_aside:
+                heappush(heap, entry)
+            set_aside.clear()
+            self._set_aside_tier[direction] = tier
+
+        while True:
+            count, _, pool = heap[0]
+            if count != self.counts.get(pool, 0):
+                heappop(heap)
+            elif not is_open(pool):
+                set_aside.append(heappop(heap))
+            else:
+                return pool
+
+
+def _first_open_without(organization: _OrganizationPools, idx: int, find_open: Callable[[int], int],
+                        tier_order: Sequence[int]) -> Optional[int]:
+    """
+    Looks through the first SPREAD_SCAN_LIMIT open pools from idx on for one without a member of the organization
+    :return: its place in the tier's snake order, or None if there isn't one
+    """
+    for _ in range(SPREAD_SCAN_LIMIT):
+        if idx == len(tier_order):
+            return None
+        if not organization.counts.get(tier_order[idx], 0):
+            return idx
+        idx = find_open(idx + 1)
+    return None
+
+
+def _assign_seeded_spreading_organizations(entrants: Sequence[PoolEntrant], num_pools: int) -> List[List[int]]:
+    """
+    Each entrant takes the first open pool in the tier's snake order without a member of its organization, if one of
+    the first few open pools will do. Otherwise the organization is in most of the pools, and its heaps find the open
+    pool with the fewest members in O(log p) for p pools. Building an organization's heaps is O(p), and they set aside
+    each pool that closed earlier in the tier at most once per tier, so only organizations with members in most pools
+    pay for them.
+    """
+    pools: List[List[int]] = [[] for _ in range(num_pools)]
+    organizations: Dict[str, _OrganizationPools] = {}
+
+    for tier_idx, tier_start in enumerate(range(0, len(entrants), num_pools)):
+        tier = entrants[tier_start:tier_start + num_pools]
+        tier_order = [_snake_pool(position, num_pools) for position in range(tier_start, tier_start + num_pools)]
+        # Maps each pool to its place in the tier's snake order
+        positions = {pool: idx for idx, pool in enumerate(tier_order)}
+
+        # Union-find over the tier's snake order, next_open[idx] leads to the first pool at or after idx that hasn't
+        # been given an entrant from this tier yet. The extra slot at the end is a sentinel.
+        next_open = list(range(num_pools + 1))
+
+        def find_open(idx: int) -> int:
+            root = idx
+            while next_open[root] != root:
+                root = next_open[root]
+            while next_open[idx] != root:
+                next_open[idx], idx = root, next_open[idx]
+            return root
+
+        def is_open(pool: int) -> bool:
+            return next_open[positions[pool]] == positions[pool]
+
+        for entrant in tier:
+            idx = find_open(0)
+            if entrant.organization is not None:
+                organization = organizations.get(entrant.organization)
+                if organization is None:
+                    organization = organizations[entrant.organization] = _OrganizationPools(num_pools)
+                idx = _first_open_without(organization, idx, find_open, tier_order)
+                if idx is None:
+                    idx = positions[organization.best_open_pool(tier_idx, is_open)]
+                organization.add(tier_order[idx])
+
+            pools[tier_order[idx]].append(entrant.id)
+            next_open[idx] = idx + 1
+
+    return pools
@@ -0,0 +1,57 @@
+from typing import List, Sequence, Tuple
+
+
+def num_rounds(num_competitors: int) -> int:
+    """
+    Returns the number of rounds needed for every competitor to face every other competitor once. An odd number of
+    competitors needs an extra round since one competitor sits out (has a bye) each round.
+    """
+    if num_competitors < 2:
+        return 0
+    return num_competitors - 1 if num_competitors % 2 == 0 else num_competitors
+
+
+def round_robin_round(competitor_ids: Sequence[int], round_index: int) -> List[Tuple[int, int]]:
+    """
+    Returns the pairings for a single round of a round robin using the circle (Berger) method. The first competitor
+    stays in place while everyone else rotates one slot per round, and slot i faces slot n - 1 - i. Competitors with a
+    bye in the given round are left out. Each pairing has the lower id first.
+    :param competitor_ids: the ids of the competitors, in a stable order
+    :param round_index: the 0-based round, must be less than num_rounds(len(competitor_ids))
+    :return: the pairings for the round
+    """
+    num_competitors = len(competitor_ids)
+    if not 0 <= round_index < num_rounds(num_competitors):
+        raise ValueError(f'Round {round_index} is out of range for {num_competitors} competitors')
+
+    # Pad odd fields with an empty slot, whoever lands opposite it has a bye
+    num_slots = num_competitors + num_competitors % 2
+    rotating_slots = num_slots - 1
+
+    def competitor_at(slot: int):
+        idx = 0 if slot == 0 else 1 + (slot - 1 + round_index) % rotating_slots
+        return competitor_ids[idx] if idx < num_competitors else None
+
+    pairings = []
+    for slot in range(num_slots // 2):
+        c1 = competitor_at(slot)
+        c2 = competitor_at(num_slots - 1 - slot)
+        if c1 is None or c2 is None:
+            continue
+        pairings.append((c1, c2) if c1 < c2 else (c2, c1))
+
+    return pairings
+
+
+def round_robin_rounds(competitor_ids: Sequence[int]) -> List[List[Tuple[int, int]]]:
+    """
+    Returns every round of a round robin between the given competitors. Each unordered pair appears exactly once.
+    """
+    return [round_robin_round(competitor_ids, r) for r in range(num_rounds(len(competitor_ids)))]
+
+
+def round_robin_pairings(competitor_ids: Sequence[int]) -> List[Tuple[int, int]]:
+    """
+    Returns every pairing of a round robin between the given competitors, flattened in round order.
+    """
+    return [pairing for round_pairings in round_robin_rounds(competitor_ids) for pairing in round_pairings]
@@ -0,0 +1,186 @@
+from collections import deque
+from itertools import groupby
+from math import ceil, log2
+from typing import Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# Points awarded for each result, a bye counts as a win
+WIN_POINTS = 1.0
+DRAW_POINTS = 0.5
+
+
+class SwissPlayer(NamedTuple):
+    id: int
+    score: float = 0
+    rating: Optional[int] = None
+    # The ids of everyone this player has already faced
+    opponents: FrozenSet[int] = frozenset()
+    had_bye: bool = False
+
+
+def default_num_rounds(num_competitors: int) -> int:
+    """
+    Returns the number of rounds needed to leave a single undefeated competitor, capped so that nobody runs out of
+    new opponents.
+    """
+    if num_competitors < 2:
+        return 0
+    return min(ceil(log2(num_competitors)), num_competitors - 1)
+
+
+def rank(players: Sequence[SwissPlayer]) -> List[SwissPlayer]:
+    """
+    Returns the players in standings order, by score and then rating. Unrated players go last, and the sort is stable
+    so ties keep the order they were given in.
+    """
+    return sorted(players, key=lambda player: (-player.score, player.rating is None, -(player.rating or 0)))
+
+
+def swiss_pairings(players: Sequence[SwissPlayer]) -> Tuple[List[Tuple[int, int]], Optional[int]]:
+    """
+    Pairs a round of a Swiss system stage.
+
+    Players are ranked and split into groups with the same score. Within a group, the top half faces the bottom half
+    in order (the Dutch system), so 1 plays n/2 + 1, 2 plays n/2 + 2, and so on. Pairings that would be rematches are
+    repaired with a maximum bipartite matching between the two halves, found with augmenting paths that try the
+    opponents closest to the Dutch pairing first. Anyone that can't be paired in their group floats down to the next
+    one. If the players at the bottom can't be paired, the groups above are merged into theirs one at a time until
+    they can, and rematches are only allowed once the whole field has been merged.
+
+    Each player is matched once per group, and each augmenting path is a breadth first search over the group, so a
+    round is O(g * e) for a group of g players with e allowed pairings in the worst case. In practice almost every
+    player takes their Dutch opponent straight away, which keeps a 2,000 player round well under a second.
+    :param players: everyone taking part in the round
+    :return: the pairings, higher ranked player first and top boards first, and the id of the player with the bye
+    """
+    ranked = rank(players)
+
+    bye = None
+    if len(ranked) % 2 == 1:
+        # The bye goes to the lowest ranked player that hasn't had one yet
+        bye_idx = next((idx for idx in reversed(range(len(ranked))) if not ranked[idx].had_bye), len(ranked) - 1)
+        bye = ranked.pop(bye_idx).id
+
+    groups = [list(group) for _, group in groupby(ranked, key=lambda player: player.score)]
+
+    # The pairings made by the groups above each group, and the players floating down into it
+    pairings_before: List[List[Tuple[int, int]]] = []
+    floaters_into: List[List[SwissPlayer]] = []
+    pairings: List[Tuple[int, int]] = []
+    floaters: List[SwissPlayer] = []
+    for group in groups:
+        pairings_before.append(list(pairings))
+        floaters_into.append(floaters)
+        group_pairings, floaters = _pair_group(floaters + group)
+        pairings += group_pairings
+
+    # Work back up the standings until the leftover players can be paired
+    start = len(groups)
+    while floaters and start > 0:
+        start -= 1
+        merged = floaters_into[start] + [player for group in groups[start:] for player in group]
+        group_pairings, floaters = _pair_group(merged)
+        pairings = pairings_before[start] + group_pairings
+
+    if floaters:
+        # Splitting into halves couldn't avoid a rematch, so pair whoever is left in order and try to swap opponents
+        # with an existing pairing to get rid of any rematches that creates
+        opponents = {player.id: player.opponents for player in ranked}
+        for idx in range(0, len(floaters), 2):
+            pairings.append(_swap_out_rematch((floaters[idx].id, floaters[idx + 1].id), pairings, opponents))
+
+    return pairings, bye
+
+
+def _swap_out_rematch(pairing: Tuple[int, int], pairings: List[Tuple[int, int]],
+                      opponents: Dict[int, FrozenSet[int]]) -> Tuple[int, int]:
+    """
+    If pairing is a rematch, looks for an existing pairing whose players can trade opponents with it without creating
+    another rematch. The existing pairing is replaced in place.
+    :return: the pairing to add
+    """
+    a, b = pairing
+    if b not in opponents[a]:
+        return pairing
+
+    for idx, (c, d) in enumerate(pairings):
+        for first, second in (((a, c), (b, d)), ((a, d), (b, c))):
+            if first[1] not in opponents[first[0]] and second[1] not in opponents[second[0]]:
+                pairings[idx] = first
+                return second
+
+    return pairing
+
+
+def _preferences(idx: int, size: int) -> Iterator[int]:
+    """
+    Yields the bottom half positions for the player at idx in the top half, starting from its Dutch opponent and
+    moving outwards.
+    """
+    yield idx
+    for offset in range(1, size):
+        if idx + offset < size:
+            yield idx + offset
+        if idx - offset >= 0:
+            yield idx - offset
+
+
+def _pair_group(group: List[SwissPlayer]) -> Tuple[List[Tuple[int, int]], List[SwissPlayer]]:
+    """
+    Pairs the top half of a group against the bottom half without rematches, using as many players as possible.
+    :return: the pairings in board order, and the players left unpaired in ranking order
+    """
+    top = group[:len(group) // 2]
+    bottom = group[len(group) // 2:]
+
+    def allowed(top_idx: int, bottom_idx: int) -> bool:
+        return bottom[bottom_idx].id not in top[top_idx].opponents
+
+    # Maps each position in the bottom half to the position in the top half it is paired with, and the reverse
+    bottom_match: Dict[int, int] = {}
+    top_match: Dict[int, int] = {}
+
+    for top_idx in range(len(top)):
+        # Take the closest free opponent if there is one, which is nearly always the Dutch pairing
+        free = next((bottom_idx for bottom_idx in _preferences(top_idx, len(bottom))
+                     if bottom_idx not in bottom_match and allowed(top_idx, bottom_idx)), None)
+        if free is not None:
+            bottom_match[free] = top_idx
+            top_match[top_idx] = free
+        else:
+            _augment(top_idx, len(bottom), allowed, top_match, bottom_match)
+
+    pairings = [(top[top_idx].id, bottom[top_match[top_idx]].id) for top_idx in sorted(top_match)]
+    unpaired = [player for idx, player in enumerate(top) if idx not in top_match] + \
+               [player for idx, player in enumerate(bottom) if idx not in bottom_match]
+    return pairings, unpaired
+
+
+def _augment(root: int, bottom_size: int, allowed: Callable[[int, int], bool], top_match: Dict[int, int],
+             bottom_match: Dict[int, int]):
+    """
+    Searches breadth first for an alternating path from an unpaired top player to a free bottom player, and if there
+    is one, moves every top player along it to the next opponent so that the root gets paired too.
+    """
+    # Maps each bottom position reached to the top position that reached it
+    parent: Dict[int, int] = {}
+    queue = deque([root])
+    while queue:
+        top_idx = queue.popleft()
+        for bottom_idx in _preferences(top_idx, bottom_size):
+            if bottom_idx in parent or not allowed(top_idx, bottom_idx):
+                continue
+            parent[bottom_idx] = top_idx
+
+            if bottom_idx in bottom_match:
+                queue.append(bottom_match[bottom_idx])
+                continue
+
+            # Found a free opponent, flip the path back to the root
+            while True:
+                top_idx = parent[bottom_idx]
+                previous = top_match.get(top_idx)
+                bottom_match[bottom_idx] = top_idx
+                top_match[top_idx] = bottom_idx
+                if top_idx == root:
+                    return
+                bottom_idx = previous
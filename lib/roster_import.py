@@ -0,0 +1,112 @@
+import csv
+import io
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+ROSTER_COLUMNS = ('first_name', 'last_name', 'organization', 'location', 'rating', 'minimum_rest')
+INTEGER_COLUMNS = ('rating', 'minimum_rest')
+# Postgres integer columns
+MIN_INTEGER = -2 ** 31
+MAX_INTEGER = 2 ** 31 - 1
+
+
+class RosterError(ValueError):
+    pass
+
+
+class RowError(NamedTuple):
+    line: int
+    detail: str
+
+
+class RosterReader:
+    """
+    A file-like view of a CSV roster for COPY ... FROM STDIN WITH (FORMAT csv). The first row is the header, naming
+    any of ROSTER_COLUMNS in any order. Rows are only read and checked as COPY asks for more data, so the roster is
+    never held in memory. Valid rows are passed on as their line number followed by ROSTER_COLUMNS, and invalid ones
+    are left out and recorded in errors.
+    """
+
+    def __init__(self, lines: Iterable[str]):
+        self.errors: List[RowError] = []
+        # Set if the roster can't be read at all, reading stops and this should be raised once COPY is done with us
+        self.failure: Optional[RosterError] = None
+        self._reader = csv.reader(lines)
+
+        header = self._next_row()
+        if header is None:
+            raise RosterError('The roster is empty')
+        self._columns = [column.strip().lower() for column in header]
+        unknown = [column for column in self._columns if column not in ROSTER_COLUMNS]
+        if unknown:
+            raise RosterError(f'Unknown roster columns: {", ".join(unknown)}')
+        if len(set(self._columns)) != len(self._columns):
+            raise RosterError('Roster columns can only appear once')
+        if 'last_name' not in self._columns and 'organization' not in self._columns:
+            raise RosterError('Rosters need a last_name or an organization column')
+
+        self._lines = self._copy_lines()
+        self._buffer = ''
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            try:
+                line = next(self._lines, None)
+            except RosterError as e:
+                # Raising here would only reach the caller as a generic COPY error
+                self.failure = e
+                self._buffer = ''
+                return ''
+            if line is None:
+                break
+            self._buffer += line
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    def _copy_lines(self) -> Iterator[str]:
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        # Rows are numbered by the line they start on, quoted fields can span several
+        line = self._reader.line_num + 1
+        row = self._next_row()
+        while row is not None:
+            row_line, line = line, self._reader.line_num + 1
+            values = self._parse(row_line, row) if any(field.strip() for field in row) else None
+            if values is not None:
+                writer.writerow([row_line] + [values.get(column) for column in ROSTER_COLUMNS])
+                yield out.getvalue()
+                out.seek(0)
+                out.truncate()
+            row = self._next_row()
+
+    def _next_row(self) -> Optional[List[str]]:
+        try:
+            return next(self._reader, None)
+        except UnicodeDecodeError:
+            raise RosterError(f'Line {self._reader.line_num + 1} of the roster is not valid UTF-8')
+
+    def _parse(self, line: int, row: List[str]) -> Optional[dict]:
+        """
+        :return: the row's values by column, blanks as None, or None if the row isn't a valid competitor
+        """
+        if len(row) != len(self._columns):
+            self.errors.append(RowError(line, f'Expected {len(self._columns)} fields but found {len(row)}'))
+            return None
+        values = {column: field.strip() or None for column, field in zip(self._columns, row)}
+        if not values.get('last_name') and not values.get('organization'):
+            self.errors.append(RowError(line, 'Competitors must have at least a last name or an organization'))
+            return None
+        for column in INTEGER_COLUMNS:
+            if values.get(column) is None:
+                continue
+            try:
+                value = int(values[column])
+            except ValueError:
+                self.errors.append(RowError(line, f'{column} must be a whole number'))
+                return None
+            if not MIN_INTEGER <= value <= MAX_INTEGER:
+                self.errors.append(RowError(line, f'{column} is out of range'))
+                return None
+            values[column] = value
+        return values
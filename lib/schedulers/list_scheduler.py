@@ -0,0 +1,107 @@
+from collections import defaultdict
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+
+class SchedulableMatch(NamedTuple):
+    id: int
+    # Lower ordinals are played first when more matches are ready than there are courts
+    ordinal: int
+    # Either competitor may not be known yet for bracket matches waiting on their feeders
+    competitor_1_id: Optional[int] = None
+    competitor_2_id: Optional[int] = None
+    # Matches being scheduled alongside this one that have to finish before it can start
+    feeder_ids: Tuple[int, ...] = ()
+    # The earliest slot the match can start in, regardless of anything else being scheduled
+    earliest_slot: int = 0
+
+
+class Assignment(NamedTuple):
+    court: int
+    slot: int
+
+
+def list_schedule(matches: Sequence[SchedulableMatch], num_courts: int, start_slot: int = 0,
+                  rest_slots: Mapping[int, int] = None, default_rest_slots: int = 0,
+                  available_from: Mapping[int, int] = None,
+                  occupied: Mapping[int, Set[int]] = None) -> Dict[int, Assignment]:
+    """
+    Assigns each match a court and a start slot with a list scheduler. Every match lasts a single slot.
+
+    Matches sit in a priority queue keyed by the earliest slot they could start in, then by ordinal. The scheduler
+    fills one slot at a time, popping matches and either giving them the lowest numbered free court or, if one of their
+    competitors is still resting, pushing them back keyed by when that competitor is free again. A match only joins
+    the queue once all of its feeders have been given a slot, at which point it can start once the slowest feeder and
+    its competitors' rest are over. Each match is pushed back at most once per competitor or full slot, so this is
+    O(m log m) for m matches in practice.
+    :param matches: the matches to schedule
+    :param num_courts: the number of courts matches can be played on at once
+    :param start_slot: the first slot that can be used
+    :param rest_slots: maps competitor id -> number of slots they have to sit out after a match
+    :param default_rest_slots: the rest for competitors that aren't in rest_slots
+    :param available_from: maps competitor id -> the first slot they can play in, for matches that have already been
+    played
+    :param occupied: maps slot -> courts already taken in it by matches that aren't being scheduled
+    :return: maps match id -> the court and slot it was assigned
+    """
+    if num_courts < 1:
+        raise ValueError('At least one court is needed to schedule matches')
+
+    rest_slots = rest_slots or {}
+    available = dict(available_from or {})
+    courts_taken: Dict[int, Set[int]] = defaultdict(set, {
+        slot: set(courts) for slot, courts in (occupied or {}).items()
+    })
+
+    by_id = {match.id: match for match in matches}
+    earliest = {match.id: max(start_slot, match.earliest_slot) for match in matches}
+    waiting_on: Dict[int, int] = {}
+    dependents: Dict[int, List[int]] = defaultdict(list)
+    for match in matches:
+        feeder_ids = [feeder_id for feeder_id in match.feeder_ids if feeder_id in by_id]
+        waiting_on[match.id] = len(feeder_ids)
+        for feeder_id in feeder_ids:
+            dependents[feeder_id].append(match.id)
+
+    heap = [(earliest[match.id], match.ordinal, match.id) for match in matches if not waiting_on[match.id]]
+    heapify(heap)
+
+    def rest_after(competitor_id: Optional[int]) -> int:
+        return rest_slots.get(competitor_id, default_rest_slots) if competitor_id is not None else default_rest_slots
+
+    assignments: Dict[int, Assignment] = {}
+    slot = start_slot
+    while heap:
+        key, ordinal, match_id = heappop(heap)
+        # Nothing else can start before the smallest key, so the scheduler can skip ahead to it
+        slot = max(slot, key)
+        match = by_id[match_id]
+        competitor_ids = [competitor_id for competitor_id in (match.competitor_1_id, match.competitor_2_id)
+                          if competitor_id is not None]
+
+        ready_at = max((available.get(competitor_id, start_slot) for competitor_id in competitor_ids),
+                       default=start_slot)
+        if ready_at > slot:
+            heappush(heap, (ready_at, ordinal, match_id))
+            continue
+
+        if len(courts_taken[slot]) >= num_courts:
+            # The slot is full, so everything still waiting competes for the next one
+            slot += 1
+            heappush(heap, (key, ordinal, match_id))
+            continue
+
+        court = next(court for court in range(num_courts) if court not in courts_taken[slot])
+        courts_taken[slot].add(court)
+        assignments[match_id] = Assignment(court, slot)
+
+        rest = max((rest_after(competitor_id) for competitor_id in competitor_ids), default=default_rest_slots)
+        for competitor_id in competitor_ids:
+            available[competitor_id] = slot + 1 + rest_after(competitor_id)
+        for dependent_id in dependents[match_id]:
+            earliest[dependent_id] = max(earliest[dependent_id], slot + 1 + rest)
+            waiting_on[dependent_id] -= 1
+            if not waiting_on[dependent_id]:
+                heappush(heap, (earliest[dependent_id], by_id[dependent_id].ordinal, dependent_id))
+
+    return assignments
@@ -0,0 +1,123 @@
+from collections import defaultdict
+from math import ceil
+from typing import Dict, List, Set
+
+from sqlalchemy import bindparam, func, or_
+
+from database.db import Session
+from database.models import Stage, Competitor, Pool, Match
+from lib.schedulers.list_scheduler import SchedulableMatch, list_schedule
+
+
+class MatchScheduler:
+    """
+    Assigns a stage's pending matches to courts and start slots, using the stage's courts, match_duration and
+    minimum_rest params. Rest is given in minutes and rounded up to whole slots of match_duration minutes, and a
+    competitor's own minimum_rest takes over from the stage's if it is longer.
+    """
+    def __init__(self, stage: Stage):
+        self._stage = stage
+        params = stage.parsed_params
+        self._num_courts: int = params['courts']
+        self._match_duration: int = params['match_duration']
+        self._minimum_rest: int = params['minimum_rest']
+
+    def _to_slots(self, minutes: int) -> int:
+        return ceil(minutes / self._match_duration)
+
+    def schedule_matches(self, db: Session):
+        """
+        Schedules the stage's pending matches from the current slot on, which is the earliest slot of a match in
+        progress or, if nothing is being played, the slot after the last match to finish. Matches that have started or
+        finished keep their courts and slots, so results coming in only move the matches that haven't been played yet,
+        and only the matches whose court or slot actually changed are written. Played matches are only loaded as far
+        back as they can still hold up a competitor's rest. Does nothing if the stage has no courts configured.
+        """
+        if not self._num_courts:
+            return
+
+        rest_slots = {
+            competitor_id: self._to_slots(max(minimum_rest, self._minimum_rest))
+            for competitor_id, minimum_rest in db.query(Competitor.id, Competitor.minimum_rest)
+            .filter(Competitor.tournament_id == self._stage.tournament_id, Competitor.minimum_rest.isnot(None))
+        }
+        default_rest_slots = self._to_slots(self._minimum_rest)
+
+        in_progress_slot, last_complete_slot = db.query(
+            func.min(Match.slot).filter(Match.status == Match.MatchStatus.ACTIVE),
+            func.max(Match.slot).filter(Match.status == Match.MatchStatus.COMPLETE),
+        ).join(Pool).filter(Pool.stage_id == self._stage.id).one()
+        if in_progress_slot is not None:
+            current_slot = in_progress_slot
+        elif last_complete_slot is not None:
+            current_slot = last_complete_slot + 1
+        else:
+            current_slot = 0
+        # Matches played before this can't keep anyone resting into the current slot
+        window_start = current_slot - 1 - max([default_rest_slots, *rest_slots.values()])
+
+        rows = db.query(Match.id, Match.ordinal, Match.status, Match.competitor_1_id, Match.competitor_2_id,
+                        Match.next_match_id, Match.loser_next_match_id, Match.court, Match.slot) \
+            .join(Pool) \
+            .filter(Pool.stage_id == self._stage.id,
+                    or_(Match.status == Match.MatchStatus.PENDING, Match.slot >= window_start)) \
+            .all()
+
+        played = [row for row in rows if row.status != Match.MatchStatus.PENDING and row.slot is not None]
+
+        # Courts still in use by matches that have started, and when their competitors can play again
+        occupied: Dict[int, Set[int]] = defaultdict(set)
+        available_from: Dict[int, int] = {}
+        for row in played:
+            if row.slot >= current_slot:
+                occupied[row.slot].add(row.court)
+            for competitor_id in (row.competitor_1_id, row.competitor_2_id):
+                if competitor_id is not None:
+                    rest = rest_slots.get(competitor_id, default_rest_slots)
+                    available_from[competitor_id] = max(available_from.get(competitor_id, 0), row.slot + 1 + rest)
+
+        pending_ids = {row.id for row in rows if row.status == Match.MatchStatus.PENDING}
+        feeder_ids: Dict[int, List[int]] = defaultdict(list)
+        earliest_slot: Dict[int, int] = defaultdict(int)
+        for row in rows:
+            for next_match_id in (row.next_match_id, row.loser_next_match_id):
+                if next_match_id is None:
+                    continue
+                if row.id in pending_ids:
+                    feeder_ids[next_match_id].append(row.id)
+                elif row.slot is not None:
+                    earliest_slot[next_match_id] = max(earliest_slot[next_match_id], row.slot + 1)
+
+        pending = [row for row in rows if row.id in pending_ids]
+        assignments = list_schedule(
+            [
+                SchedulableMatch(row.id, row.ordinal, row.competitor_1_id, row.competitor_2_id,
+                                 tuple(feeder_ids[row.id]), earliest_slot[row.id])
+                for row in pending
+            ],
+            self._num_courts,
+            start_slot=current_slot,
+            rest_slots=rest_slots,
+            default_rest_slots=default_rest_slots,
+            available_from=available_from,
+            occupied=occupied,
+        )
+
+        changed = [
+            {'match_id': row.id, 'court': assignments[row.id].court, 'slot': assignments[row.id].slot}
+            for row in pending
+            if (row.court, row.slot) != assignments[row.id]
+        ]
+        if changed:
+            match_table = Match.__table__
+            db.execute(
+                match_table.update()
+                .where(match_table.c.id == bindparam('match_id'))
+                .values(court=bindparam('court'), slot=bindparam('slot')),
+                changed,
+            )
+            # Matches that are already loaded need to pick up their new courts and slots
+            changed_ids = {row['match_id'] for row in changed}
+            for instance in list(db.identity_map.values()):
+                if isinstance(instance, Match) and instance.id in changed_ids:
+                    db.expire(instance, ['court', 'slot'])
@@ -0,0 +1,143 @@
+from array import array
+from itertools import groupby
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from lib.match_generators.swiss import WIN_POINTS, DRAW_POINTS
+
+
+class MatchColumns(NamedTuple):
+    """
+    A stage's matches as one sequence per column, ordered by pool. Scores of None count as 0.
+    """
+    pool_id: Sequence[int]
+    competitor_1_id: Sequence[Optional[int]]
+    competitor_2_id: Sequence[Optional[int]]
+    competitor_1_score: Sequence[Optional[int]]
+    competitor_2_score: Sequence[Optional[int]]
+    complete: Sequence[bool]
+
+
+class Standing(NamedTuple):
+    competitor_id: int
+    place: int
+    played: int
+    wins: int
+    draws: int
+    losses: int
+    # WIN_POINTS for each win and DRAW_POINTS for each draw
+    score: float
+    points_for: int
+    points_against: int
+    differential: int
+    # Score from the matches against the competitors with the same score, 0 for anyone not tied
+    head_to_head: float
+
+
+def pool_standings(matches: MatchColumns) -> Dict[int, List[Standing]]:
+    """
+    Ranks the competitors of every pool in a stage. Competitors are ranked by score, then by the score from their
+    matches against the others on the same score, then by points differential, then by points for, then by id. Only
+    complete matches count, but everyone with a match in the pool is ranked.
+
+    The results are tallied in a single pass over the matches, into arrays indexed by competitor, and each pool is
+    sorted on its own, so a stage is O(m + n log p) for m matches and n competitors in pools of p.
+    :return: maps each pool id to its standings from first place down, in the order the pools were given in
+    """
+    # Competitors are numbered in the order they are first seen, which keeps each pool's together
+    index: Dict[int, int] = {}
+    competitor_ids = array('q')
+    pool_ids = array('q')
+    played = array('l')
+    wins = array('l')
+    draws = array('l')
+    losses = array('l')
+    points_for = array('q')
+    points_against = array('q')
+    # Maps (competitor index, opponent index) to the score the competitor earned against that opponent
+    head_to_head: Dict[Tuple[int, int], float] = {}
+
+    def competitor_index(competitor_id: int, pool_id: int) -> int:
+        idx = index.get(competitor_id)
+        if idx is None:
+            idx = index[competitor_id] = len(competitor_ids)
+            competitor_ids.append(competitor_id)
+            pool_ids.append(pool_id)
+            for column in (played, wins, draws, losses, points_for, points_against):
+                column.append(0)
+        return idx
+
+    for pool_id, competitor_1_id, competitor_2_id, score_1, score_2, complete in zip(*matches):
+        idx_1 = competitor_index(competitor_1_id, pool_id) if competitor_1_id is not None else None
+        idx_2 = competitor_index(competitor_2_id, pool_id) if competitor_2_id is not None else None
+        if not complete or idx_1 is None or idx_2 is None:
+            continue
+
+        score_1, score_2 = score_1 or 0, score_2 or 0
+        played[idx_1] += 1
+        played[idx_2] += 1
+        points_for[idx_1] += score_1
+        points_against[idx_1] += score_2
+        points_for[idx_2] += score_2
+        points_against[idx_2] += score_1
+        if score_1 > score_2:
+            wins[idx_1] += 1
+            losses[idx_2] += 1
+            earned_1, earned_2 = WIN_POINTS, 0
+        elif score_2 > score_1:
+            wins[idx_2] += 1
+            losses[idx_1] += 1
+            earned_1, earned_2 = 0, WIN_POINTS
+        else:
+            draws[idx_1] += 1
+            draws[idx_2] += 1
+            earned_1, earned_2 = DRAW_POINTS, DRAW_POINTS
+        head_to_head[idx_1, idx_2] = head_to_head.get((idx_1, idx_2), 0) + earned_1
+        head_to_head[idx_2, idx_1] = head_to_head.get((idx_2, idx_1), 0) + earned_2
+
+    scores = [wins[idx] * WIN_POINTS + draws[idx] * DRAW_POINTS for idx in range(len(competitor_ids))]
+    tied_scores = [0.0] * len(competitor_ids)
+
+    standings: Dict[int, List[Standing]] = {}
+    # Pools were given in order and their competitors were numbered in order, so each pool is a run of indexes
+    for pool_id, pool in groupby(range(len(competitor_ids)), key=pool_ids.__getitem__):
+        by_score = sorted(pool, key=lambda idx: -scores[idx])
+        for _, tied in groupby(by_score, key=scores.__getitem__):
+            tied = list(tied)
+            if len(tied) > 1:
+                for idx in tied:
+                    tied_scores[idx] = sum(head_to_head.get((idx, opponent), 0) for opponent in tied)
+
+        ranked = sorted(by_score, key=lambda idx: (
+            -scores[idx], -tied_scores[idx], -(points_for[idx] - points_against[idx]), -points_for[idx],
+            competitor_ids[idx],
+        ))
+        standings[pool_id] = [
+            Standing(competitor_ids[idx], place, played[idx], wins[idx], draws[idx], losses[idx], scores[idx],
+                     points_for[idx], points_against[idx], points_for[idx] - points_against[idx], tied_scores[idx])
+            for place, idx in enumerate(ranked, 1)
+        ]
+    return standings
+
+
+def seed_from_standings(standings: Sequence[Sequence[Standing]]) -> List[int]:
+    """
+    Seeds the competitors that come out of a pool stage, all the pool winners first, then everyone that came second,
+    and so on. Competitors with the same place are ordered by score, differential and points for per match played,
+    so pools of different sizes compare fairly, and then by pool.
+    :param standings: each pool's standings, in pool order
+    :return: the competitor ids from the top seed down
+    """
+    def per_match(value: float, standing: Standing) -> float:
+        return value / standing.played if standing.played else 0
+
+    by_place = sorted(
+        ((standing.place, pool_idx, standing) for pool_idx, pool in enumerate(standings) for standing in pool),
+        key=lambda entry: (
+            entry[0],
+            -per_match(entry[2].score, entry[2]),
+            -per_match(entry[2].differential, entry[2]),
+            -per_match(entry[2].points_for, entry[2]),
+            entry[1],
+        ),
+    )
+    return [standing.competitor_id for _, _, standing in by_place]
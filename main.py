@@ -1,10 +1,14 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from logging.config import fileConfig
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.routers import security, tournament, stage, competitor
+from api.routers import security, tournament, stage, competitor, match, status
+from lib.match_generators.parallel import shutdown_executor
+from settings import API_THREADPOOL_WORKERS
 
 fileConfig('logging.conf', disable_existing_loggers=False)
 
@@ -33,3 +37,17 @@ app.include_router(security.router, prefix='/auth', tags=['authentication'])
 app.include_router(tournament.router)
 app.include_router(stage.router)
 app.include_router(competitor.router)
+app.include_router(match.router)
+app.include_router(status.router)
+
+
+@app.on_event('startup')
+def startup():
+    # The route handlers are plain functions that FastAPI runs on the event loop's default executor
+    asyncio.get_event_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=API_THREADPOOL_WORKERS, thread_name_prefix='api'))
+
+
+@app.on_event('shutdown')
+def shutdown():
+    shutdown_executor()
@@ -12,3 +12,41 @@ DB_PASSWORD = 'password'
 DB_HOST = os.environ.get('DB_HOST', 'db')
 DB_PORT = '5432'
 SQLALCHEMY_DATABASE_URL = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+# Connections kept open per worker process, and how many more can be opened when they're all in use
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+# Seconds to wait for a connection once the pool and overflow are used up before giving up
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+# Connections older than this many seconds are replaced, -1 keeps them forever
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+# Check connections are still alive before handing them out, so a database restart doesn't fail the next requests
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+# Milliseconds Postgres lets a single statement run before cancelling it, 0 for no limit
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 30000))
+# Shows up in pg_stat_activity to tell the API's connections apart
+DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME', 'tourneyman-api')
+# Hosts of read-only replicas of the database, comma separated. GET requests read from them when they're caught up.
+DB_REPLICA_HOSTS = [host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+SQLALCHEMY_REPLICA_URLS = [
+    f'postgresql://{DB_USER}:{DB_PASSWORD}@{host}:{DB_PORT}/{DB_NAME}' for host in DB_REPLICA_HOSTS
+]
+# Replicas more than this many seconds behind the primary aren't read from until they catch up
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+# Seconds between checks of each replica's lag
+DB_REPLICA_LAG_CHECK_INTERVAL = float(os.environ.get('DB_REPLICA_LAG_CHECK_INTERVAL', 2))
+# Seconds after a user's last write that their reads stay on the primary, so they see their own changes
+DB_READ_YOUR_WRITES_WINDOW = float(os.environ.get('DB_READ_YOUR_WRITES_WINDOW', 10))
+
+# API
+# Route handlers use the database synchronously, so each worker runs them on this many threads. More threads than
+# pooled connections would only leave requests waiting on the pool, so it defaults to the most the pool can hand out.
+API_THREADPOOL_WORKERS = int(os.environ.get('API_THREADPOOL_WORKERS', DB_POOL_SIZE + DB_MAX_OVERFLOW))
+
+# Match generation
+# Number of bracket templates kept in memory, and an optional directory to persist them to across restarts
+BRACKET_TEMPLATE_CACHE_SIZE = int(os.environ.get('BRACKET_TEMPLATE_CACHE_SIZE', 64))
+BRACKET_TEMPLATE_CACHE_DIR = os.environ.get('BRACKET_TEMPLATE_CACHE_DIR')
+# Pool stages with at least PARALLEL_MATCH_GENERATION_THRESHOLD pools have their matches scheduled across
+# PARALLEL_MATCH_GENERATION_WORKERS processes. Anything less than two workers keeps generation in the request.
+PARALLEL_MATCH_GENERATION_WORKERS = int(os.environ.get('PARALLEL_MATCH_GENERATION_WORKERS', 0))
+PARALLEL_MATCH_GENERATION_THRESHOLD = int(os.environ.get('PARALLEL_MATCH_GENERATION_THRESHOLD', 100))
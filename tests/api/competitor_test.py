@@ -1,8 +1,11 @@
 from typing import Sequence
 
+from sqlalchemy import event
+
 from database.models import Competitor
+from tests import conftest
 from tests.conftest import not_yet_implemented
-from tests.factories import TournamentFactory
+from tests.factories import TournamentFactory, CompetitorFactory
 from tests.utils import ApiTest
 
 
@@ -143,6 +146,146 @@ class TestUpdateCompetitors(ApiTest):
         assert len(competitors) == 10
 
 
+    def test_unchanged_competitors_keep_their_ids(self, client, test_user, db):
+        tournament = TournamentFactory(owner=test_user['user'])
+        kept, changed, removed = [
+            CompetitorFactory(tournament=tournament, rating=rating) for rating in range(3)
+        ]
+        roster = [
+            {'first_name': kept.first_name, 'last_name': kept.last_name, 'organization': kept.organization,
+             'location': kept.location, 'rating': kept.rating},
+            {'first_name': changed.first_name, 'last_name': changed.last_name, 'organization': changed.organization,
+             'location': 'Somewhere else', 'rating': 10},
+            {'last_name': 'Newcomer'},
+        ]
+        kept_id, changed_id, removed_id = kept.id, changed.id, removed.id
+
+        statements = []
+
+        def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+            statements.append(statement.split()[0])
+
+        event.listen(conftest.engine, 'before_cursor_execute', record)
+        try:
+            response = client.put(f'/tournaments/{tournament.id}/competitors/', json=roster, headers={
+                'Authorization': f'Bearer {test_user["auth_token"]}',
+            })
+        finally:
+            event.remove(conftest.engine, 'before_cursor_execute', record)
+
+        assert response.status_code == 200
+        response_body = response.json()
+        assert [competitor['id'] for competitor in response_body[:2]] == [kept_id, changed_id]
+        assert response_body[1]['location'] == 'Somewhere else'
+        assert response_body[1]['rating'] == 10
+        assert response_body[2]['last_name'] == 'Newcomer'
+        assert response_body[2]['id'] > removed_id
+
+        db.expire_all()
+        assert db.query(Competitor).get(removed_id) is None
+        # One statement each for the deletes, updates and inserts
+        assert (statements.count('DELETE'), statements.count('UPDATE'), statements.count('INSERT')) == (1, 1, 1)
+
+
+class TestImportCompetitors(ApiTest):
+    def _import(self, client, test_user, tournament, roster: str):
+        return client.post(f'/tournaments/{tournament.id}/competitors/import', files={
+            'roster': ('roster.csv', roster.encode('utf-8'), 'text/csv'),
+        }, headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+
+    def test_wrong_owner_gets_404(self, client, test_user, db):
+        tournament = TournamentFactory()
+
+        response = self._import(client, test_user, tournament, 'organization\nOrg 1\n')
+
+        assert response.status_code == 404
+        assert db.query(Competitor).count() == 0
+
+    def test_rows_are_added_in_order(self, client, test_user, db):
+        tournament = TournamentFactory(owner=test_user['user'])
+        CompetitorFactory(tournament=tournament, organization='Existing')
+
+        response = self._import(client, test_user, tournament, (
+            'last_name,first_name,organization,rating,minimum_rest\n'
+            'Smith,Jane,,1500,\n'
+            '"Doe, Jr.",John,Club,,20\n'
+            ',,Team 3,,\n'
+        ))
+
+        assert response.status_code == 201
+        response_body = response.json()
+        assert response_body['errors'] == []
+        assert [(c['first_name'], c['last_name'], c['organization'], c['rating'], c['minimum_rest'])
+                for c in response_body['competitors']] == [
+            ('Jane', 'Smith', None, 1500, None),
+            ('John', 'Doe, Jr.', 'Club', None, 20),
+            (None, None, 'Team 3', None, None),
+        ]
+        db.expire_all()
+        assert len(tournament.competitors) == 4
+
+    def test_invalid_rows_are_reported_and_skipped(self, client, test_user, db):
+        tournament = TournamentFactory(owner=test_user['user'])
+
+        response = self._import(client, test_user, tournament, (
+            'first_name,last_name,organization,rating\n'
+            'Jane,Smith,,\n'
+            'John,,,\n'
+            '\n'
+            'Ann,Lee,,high\n'
+            'Bob,Ray,\n'
+            'Sam,Cho,,99999999999\n'
+            ',,Club,7\n'
+        ))
+
+        assert response.status_code == 201
+        response_body = response.json()
+        assert [c['last_name'] or c['organization'] for c in response_body['competitors']] == ['Smith', 'Club']
+        assert response_body['errors'] == [
+            {'line': 3, 'detail': 'Competitors must have at least a last name or an organization'},
+            {'line': 5, 'detail': 'rating must be a whole number'},
+            {'line': 6, 'detail': 'Expected 4 fields but found 3'},
+            {'line': 7, 'detail': 'rating is out of range'},
+        ]
+        assert db.query(Competitor).count() == 2
+
+    def test_bad_header_gets_400(self, client, test_user, db):
+        tournament = TournamentFactory(owner=test_user['user'])
+
+        response = self._import(client, test_user, tournament, 'first_name,team\nJane,Club\n')
+
+        assert response.status_code == 400
+        assert response.json() == {'detail': 'Unknown roster columns: team'}
+        assert db.query(Competitor).count() == 0
+
+    def test_undecodable_roster_gets_400(self, client, test_user, db):
+        tournament = TournamentFactory(owner=test_user['user'])
+
+        response = client.post(f'/tournaments/{tournament.id}/competitors/import', files={
+            'roster': ('roster.csv', 'last_name\nSmith\nM\u00fcller\n'.encode('latin-1'), 'text/csv'),
+        }, headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+
+        assert response.status_code == 400
+        assert response.json() == {'detail': 'Line 3 of the roster is not valid UTF-8'}
+        assert db.query(Competitor).count() == 0
+
+    def test_large_roster(self, client, test_user, db):
+        tournament = TournamentFactory(owner=test_user['user'])
+        roster = 'first_name,last_name,organization,rating\n' + ''.join(
+            f'First {idx},Last {idx},Org {idx % 50},{idx}\n' for idx in range(10000))
+
+        response = self._import(client, test_user, tournament, roster)
+
+        assert response.status_code == 201
+        response_body = response.json()
+        assert response_body['errors'] == []
+        assert [c['rating'] for c in response_body['competitors']] == list(range(10000))
+
+
 @not_yet_implemented
 class TestGetCompetitor:
     pass
@@ -0,0 +1,141 @@
+from database.models import Stage, Match
+from tests.factories import StageFactory, CompetitorFactory
+from tests.utils import ApiTest
+
+
+# noinspection PyMethodMayBeStatic
+class TestMatches(ApiTest):
+    def _active_stage(self, db, owner, **params) -> Stage:
+        stage: Stage = StageFactory(tournament__owner=owner, tournament__public=True,
+                                    params={'minimum_pool_size': 4, **params})
+        CompetitorFactory.create_batch(4, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        return stage
+
+    def test_get_matches(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'])
+
+        response = client.get(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/matches/')
+
+        assert response.status_code == 200
+        response_body = response.json()
+        assert [match['ordinal'] for match in response_body] == list(range(6))
+        assert [match['round'] for match in response_body] == [0, 0, 1, 1, 2, 2]
+
+    def test_get_matches_wrong_tournament_gets_404(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'])
+        other_stage: Stage = StageFactory(tournament__public=True)
+
+        response = client.get(f'/tournaments/{other_stage.tournament_id}/stages/{stage.id}/matches/')
+
+        assert response.status_code == 404
+
+    def test_update_match(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'])
+        match = stage.pools[0].matches[0]
+
+        response = client.put(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/matches/{match.id}', json={
+            'competitor_1_score': 3,
+            'competitor_2_score': 1,
+            'status': Match.MatchStatus.COMPLETE,
+        }, headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+
+        assert response.status_code == 200
+        db.refresh(match)
+        assert match.competitor_1_score == 3
+        assert match.competitor_2_score == 1
+        assert match.status == Match.MatchStatus.COMPLETE
+
+        # The stage's counters pick up the result
+        stage_body = client.get(f'/tournaments/{stage.tournament_id}/stages/{stage.id}').json()
+        assert (stage_body['match_count'], stage_body['pending_match_count'], stage_body['complete_match_count']) == \
+            (6, 5, 1)
+        assert stage_body['pools'][0]['complete_match_count'] == 1
+
+    def test_update_match_wrong_owner_gets_404(self, client, test_user, db):
+        stage: Stage = StageFactory(tournament__public=True, params={'minimum_pool_size': 2})
+        CompetitorFactory.create_batch(2, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        match = stage.pools[0].matches[0]
+
+        response = client.put(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/matches/{match.id}', json={
+            'competitor_1_score': 3,
+            'competitor_2_score': 1,
+            'status': Match.MatchStatus.COMPLETE,
+        }, headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+
+        assert response.status_code == 404
+        db.refresh(match)
+        assert match.status == Match.MatchStatus.PENDING
+
+    def test_completing_a_lazy_round_creates_the_next(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'], lazy=True)
+
+        for match in stage.pools[0].matches:
+            response = client.put(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/matches/{match.id}', json={
+                'competitor_1_score': 1,
+                'competitor_2_score': 0,
+                'status': Match.MatchStatus.COMPLETE,
+            }, headers={
+                'Authorization': f'Bearer {test_user["auth_token"]}',
+            })
+            assert response.status_code == 200
+
+        response = client.get(f'/tournaments/{stage.tournament_id}/stages/{stage.id}')
+        assert response.status_code == 200
+        assert response.json()['pending_rounds'] == 1
+        assert len(response.json()['pools'][0]['matches']) == 4
+
+    def test_create_stage_round(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'], lazy=True)
+
+        response = client.post(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/rounds', headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+        assert response.status_code == 201
+        assert response.json()['pending_rounds'] == 1
+
+        client.post(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/rounds', headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+        response = client.post(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/rounds', headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+        assert response.status_code == 409
+
+    def test_matches_include_their_court_and_slot(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'], courts=2)
+
+        response = client.get(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/matches/')
+
+        assert response.status_code == 200
+        assert [(match['court'], match['slot']) for match in response.json()] == [
+            (0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2),
+        ]
+
+    def test_schedule_stage_matches(self, client, test_user, db):
+        stage = self._active_stage(db, test_user['user'])
+        stage.params = {**stage.params, 'courts': 1}
+        db.commit()
+
+        response = client.post(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/schedule', headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+
+        assert response.status_code == 200
+        matches = response.json()['pools'][0]['matches']
+        assert sorted(match['slot'] for match in matches) == list(range(6))
+        assert {match['court'] for match in matches} == {0}
+
+    def test_schedule_pending_stage_gets_409(self, client, test_user, db):
+        stage: Stage = StageFactory(tournament__owner=test_user['user'], params={'courts': 1})
+
+        response = client.post(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/schedule', headers={
+            'Authorization': f'Bearer {test_user["auth_token"]}',
+        })
+
+        assert response.status_code == 409
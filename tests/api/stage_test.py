@@ -1,8 +1,8 @@
 from typing import Sequence
 
-from database.models import Stage
+from database.models import Stage, Match
 from tests.conftest import not_yet_implemented
-from tests.factories import TournamentFactory
+from tests.factories import TournamentFactory, StageFactory, CompetitorFactory
 from tests.utils import ApiTest
 
 
@@ -155,6 +155,48 @@ class TestGetStage:
     pass
 
 
+class TestGetStageStandings(ApiTest):
+    def test_standings_for_each_pool(self, client, test_user, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 2}, tournament__public=True)
+        competitors = CompetitorFactory.create_batch(2, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        match: Match = stage.pools[0].matches[0]
+        match.competitor_1_score, match.competitor_2_score = 1, 3
+        match.status = Match.MatchStatus.COMPLETE
+        db.commit()
+
+        response = client.get(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/standings')
+
+        assert response.status_code == 200
+        loser, winner = match.competitor_1_id, match.competitor_2_id
+        assert {loser, winner} == {competitor.id for competitor in competitors}
+        assert response.json() == [{
+            'pool_id': stage.pools[0].id,
+            'standings': [{
+                'competitor_id': winner, 'place': 1, 'played': 1, 'wins': 1, 'draws': 0, 'losses': 0, 'score': 1.0,
+                'points_for': 3, 'points_against': 1, 'differential': 2, 'head_to_head': 0.0,
+            }, {
+                'competitor_id': loser, 'place': 2, 'played': 1, 'wins': 0, 'draws': 0, 'losses': 1, 'score': 0.0,
+                'points_for': 1, 'points_against': 3, 'differential': -2, 'head_to_head': 0.0,
+            }],
+        }]
+
+    def test_bracket_stages_have_no_standings(self, client, test_user, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, tournament__public=True)
+
+        response = client.get(f'/tournaments/{stage.tournament_id}/stages/{stage.id}/standings')
+
+        assert response.status_code == 409
+
+    def test_stage_from_another_tournament_gets_404(self, client, test_user, db):
+        stage: Stage = StageFactory(tournament__public=True)
+        other_tournament = TournamentFactory(public=True)
+
+        response = client.get(f'/tournaments/{other_tournament.id}/stages/{stage.id}/standings')
+
+        assert response.status_code == 404
+
+
 @not_yet_implemented
 class TestDeleteStage:
     pass
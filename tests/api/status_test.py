@@ -0,0 +1,16 @@
+from database.db import engine
+from settings import DB_POOL_SIZE, DB_MAX_OVERFLOW
+from tests.utils import ApiTest
+
+
+# noinspection PyMethodMayBeStatic
+class TestStatus(ApiTest):
+    def test_get_pool_status_reports_connections_in_use(self, client):
+        with engine.connect():
+            response = client.get('/status/pool')
+
+        assert response.status_code == 200
+        response_body = response.json()
+        assert response_body['size'] == DB_POOL_SIZE
+        assert response_body['max_overflow'] == DB_MAX_OVERFLOW
+        assert response_body['checked_out'] >= 1
@@ -1,9 +1,13 @@
 import json
 from datetime import datetime, timedelta
 
+from sqlalchemy import event
+
+from api.routers.tournament import encode_cursor
 from api.schemas.tournament import TournamentList
-from database.models import Tournament
-from tests.factories import TournamentFactory
+from database.models import Tournament, Stage
+from tests import conftest
+from tests.factories import TournamentFactory, StageFactory, CompetitorFactory
 from tests.utils import ApiTest
 
 
@@ -133,6 +137,7 @@ class TestTournament(ApiTest):
         assert response_body == json.loads(TournamentList(**{
             'total': 25,
             'items': test_tournaments[0:10],
+            'next_cursor': encode_cursor(test_tournaments[9]),
         }).json())
 
         # Grab the second page for a page size of 10
@@ -146,6 +151,7 @@ class TestTournament(ApiTest):
         assert response_body == json.loads(TournamentList(**{
             'total': 25,
             'items': test_tournaments[10:20],
+            'next_cursor': encode_cursor(test_tournaments[19]),
         }).json())
 
         # Grab the third page for a page size of 10, which will be a partial page
@@ -160,3 +166,98 @@ class TestTournament(ApiTest):
             'total': 25,
             'items': test_tournaments[20:],
         }).json())
+
+    def test_get_tournaments_total_counts_past_the_first_page(self, client, test_user, db):
+        TournamentFactory.create_batch(105, public=True)
+        TournamentFactory.create_batch(3, public=False)
+
+        response = client.get('/tournaments/?skip=0&limit=10')
+
+        assert response.status_code == 200
+        response_body = response.json()
+        assert response_body['total'] == 105
+        assert len(response_body['items']) == 10
+
+    def test_get_tournaments_cursor_pages_through_every_tournament_once(self, client, test_user, db):
+        # Several tournaments starting at the same time have to be split across pages by their ids
+        start_date = datetime.now()
+        test_tournaments = [
+            TournamentFactory.create(public=True, start_date=start_date + timedelta(days=i // 3)) for i in range(25)
+        ]
+
+        seen_ids = []
+        cursor = None
+        while True:
+            url = '/tournaments/?limit=10' + (f'&cursor={cursor}' if cursor else '')
+            response = client.get(url)
+            assert response.status_code == 200
+            response_body = response.json()
+            assert response_body['total'] == 25 + (len(seen_ids) > 0)
+            seen_ids += [tournament['id'] for tournament in response_body['items']]
+            cursor = response_body['next_cursor']
+            if cursor is None:
+                break
+
+            # A tournament created part way through shows up on the first page rather than pushing rows onto the next
+            if len(seen_ids) == 10:
+                TournamentFactory.create(public=True, start_date=start_date + timedelta(days=30))
+
+        expected = sorted(test_tournaments, key=lambda tournament: (tournament.start_date, tournament.id), reverse=True)
+        assert seen_ids == [tournament.id for tournament in expected]
+
+    def test_get_tournaments_invalid_cursor_returns_400(self, client, test_user, db):
+        response = client.get('/tournaments/?cursor=not-a-cursor')
+
+        assert response.status_code == 400
+
+
+# noinspection PyMethodMayBeStatic
+class TestTournamentDetailQueries(ApiTest):
+    def _active_tournament(self, db, owner, num_competitors: int) -> Tournament:
+        tournament: Tournament = TournamentFactory(owner=owner, status=Tournament.TournamentStatus.READY)
+        StageFactory(tournament=tournament, ordinal=0, params={'minimum_pool_size': 4})
+        StageFactory(tournament=tournament, ordinal=1, type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={})
+        CompetitorFactory.create_batch(num_competitors, tournament=tournament)
+        tournament.progress(db)
+        return tournament
+
+    def _count_statements(self, client, url, test_user):
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(conftest.engine, 'before_cursor_execute', count_statement)
+        try:
+            response = client.get(url, headers={'Authorization': f'Bearer {test_user["auth_token"]}'})
+        finally:
+            event.remove(conftest.engine, 'before_cursor_execute', count_statement)
+        assert response.status_code == 200
+        return len(statements), response.json()
+
+    def test_get_tournament_query_count_does_not_grow_with_the_tournament(self, client, test_user, db):
+        small = self._active_tournament(db, test_user['user'], 4)
+        large = self._active_tournament(db, test_user['user'], 40)
+        db.commit()
+
+        small_count, small_body = self._count_statements(client, f'/tournaments/{small.id}', test_user)
+        large_count, large_body = self._count_statements(client, f'/tournaments/{large.id}', test_user)
+
+        assert len(large_body['stages'][0]['pools']) == 10
+        assert large_body['stages'][0]['pools'][0]['matches'][0]['competitor_1']['id']
+        assert small_count == large_count
+
+    def test_get_stage_query_count_does_not_grow_with_the_stage(self, client, test_user, db):
+        small = self._active_tournament(db, test_user['user'], 4)
+        large = self._active_tournament(db, test_user['user'], 40)
+        db.commit()
+
+        counts = []
+        for tournament in (small, large):
+            stage_id = tournament.stages[0].id
+            db.commit()
+            for url in (f'/tournaments/{tournament.id}/stages/', f'/tournaments/{tournament.id}/stages/{stage_id}',
+                        f'/tournaments/{tournament.id}/stages/{stage_id}/matches/'):
+                counts.append(self._count_statements(client, url, test_user)[0])
+
+        assert counts[:3] == counts[3:]
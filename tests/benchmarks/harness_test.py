@@ -0,0 +1,73 @@
+from benchmarks.harness import find_regressions, measure, save_results, load_results
+from database.models import User
+from tests.utils import DatabaseAwareTest
+from tests import conftest
+
+
+# noinspection PyMethodMayBeStatic
+class TestFindRegressions:
+    baseline = {
+        'progress': {
+            '16': {'seconds': 0.5, 'peak_memory': 1000, 'statements': 10},
+            '64': {'seconds': 0.001, 'peak_memory': 1000, 'statements': 10},
+        },
+    }
+
+    def test_within_tolerance_is_not_a_regression(self):
+        current = {'progress': {'16': {'seconds': 0.6, 'peak_memory': 1200, 'statements': 10}}}
+
+        assert find_regressions(self.baseline, current, tolerance=0.25) == []
+
+    def test_beyond_tolerance_is_a_regression(self):
+        current = {'progress': {'16': {'seconds': 0.7, 'peak_memory': 1300, 'statements': 10}}}
+
+        regressions = find_regressions(self.baseline, current, tolerance=0.25)
+
+        assert [(regression.metric, regression.baseline, regression.current) for regression in regressions] == [
+            ('seconds', 0.5, 0.7),
+            ('peak_memory', 1000, 1300),
+        ]
+
+    def test_any_extra_statement_is_a_regression(self):
+        current = {'progress': {'16': {'seconds': 0.5, 'peak_memory': 1000, 'statements': 11}}}
+
+        regressions = find_regressions(self.baseline, current, tolerance=0.25)
+
+        assert [regression.metric for regression in regressions] == ['statements']
+
+    def test_tiny_timings_are_ignored(self):
+        current = {'progress': {'64': {'seconds': 0.004, 'peak_memory': 1000, 'statements': 10}}}
+
+        assert find_regressions(self.baseline, current, tolerance=0.25) == []
+
+    def test_cases_missing_from_the_baseline_are_ignored(self):
+        current = {
+            'progress': {'256': {'seconds': 5, 'peak_memory': 1000, 'statements': 10}},
+            'other': {'16': {'seconds': 5, 'peak_memory': 1000, 'statements': 10}},
+        }
+
+        assert find_regressions(self.baseline, current) == []
+
+    def test_results_round_trip(self, tmp_path):
+        path = str(tmp_path / 'baseline.json')
+
+        save_results(path, self.baseline)
+
+        assert load_results(path) == self.baseline
+
+
+# noinspection PyMethodMayBeStatic
+class TestMeasure(DatabaseAwareTest):
+    def test_counts_statements_and_calls_teardown(self, db):
+        torn_down = []
+
+        def run(session):
+            session.query(User).count()
+            session.query(User).count()
+
+        measurement = measure(lambda: db, run, teardown=torn_down.append, repeats=2, engine=conftest.engine)
+
+        assert measurement.statements == 2
+        assert measurement.seconds > 0
+        # Two timed runs plus the one for memory and statements
+        assert len(torn_down) == 3
@@ -5,8 +5,11 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, scoped_session
 
 sys.path.append('.')
+# pytest may import this file under the repo's package name, make `tests.conftest` the same module so the tests, the
+# factories and the app's sessions all share one engine
+sys.modules.setdefault('tests.conftest', sys.modules[__name__])
 
-from database.db import Base, get_db
+from database.db import Base, get_db, engine_options
 from main import app
 from settings import DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
 
@@ -25,7 +28,8 @@ try:
 finally:
     Session.remove()
 
-engine = create_engine(f'{test_db_conn_string}/{test_db_name}')
+# Same pool as the app, get_db limits requests to the connections it can hand out
+engine = create_engine(f'{test_db_conn_string}/{test_db_name}', **engine_options())
 session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Session = scoped_session(session_local)
 
@@ -41,13 +45,13 @@ def setup_database():
         Base.metadata.bind = connection
         Base.metadata.create_all()
 
-        def override_get_db():
-            test_db = Session()
+        async def override_get_db():
+            test_db = session_local()
             try:
                 yield test_db
-            finally:
                 test_db.commit()
-                Session.remove()
+            finally:
+                test_db.close()
 
         app.dependency_overrides[get_db] = override_get_db
 
@@ -1,14 +1,57 @@
-from typing import List
+from datetime import datetime, timedelta
+from threading import Thread
+from typing import List, Tuple
 
 import pytest
+from sqlalchemy import event
 
-from database.models import Tournament, Stage, Match, TournamentError
-from tests.factories import TournamentFactory, StageFactory, CompetitorFactory
+from api.schemas.match import MatchUpdate
+from database.models import Tournament, Stage, Match, TournamentError, Pool
+from tests import conftest
+from tests.factories import TournamentFactory, StageFactory, CompetitorFactory, UserFactory
 from tests.utils import DatabaseAwareTest
 
 
 # noinspection PyMethodMayBeStatic
 class TestTournament(DatabaseAwareTest):
+    def test_count_visible_matches_get_all_visible(self, db):
+        user = UserFactory()
+        TournamentFactory.create_batch(3, public=True)
+        TournamentFactory.create_batch(2, public=False)
+        TournamentFactory(public=False, owner=user)
+        TournamentFactory(public=True, owner=user)
+
+        for visible_to, is_filtered_by_user, expected in ((None, False, 4), (user, False, 5), (user, True, 2)):
+            assert Tournament.count_visible(visible_to, db, is_filtered_by_user) == expected
+            assert len(Tournament.get_all_visible(visible_to, db, is_filtered_by_user)) == expected
+
+    def test_get_all_visible_after_continues_from_the_given_tournament(self, db):
+        start_date = datetime(2021, 1, 1)
+        tournaments = [TournamentFactory(public=True, start_date=start_date + timedelta(days=i // 2)) for i in range(6)]
+        newest_first = sorted(tournaments, key=lambda tournament: (tournament.start_date, tournament.id), reverse=True)
+
+        last = newest_first[2]
+        page = Tournament.get_all_visible(None, db, limit=2, after=(last.start_date, last.id))
+
+        assert page == newest_first[3:5]
+
+    def test_get_all_visible_signed_in_merges_public_and_owned_tournaments(self, db):
+        user = UserFactory()
+        start_date = datetime(2021, 1, 1)
+        tournaments = [
+            TournamentFactory(public=i % 3 != 0, owner=user if i % 2 else UserFactory(),
+                              start_date=start_date + timedelta(days=i // 2))
+            for i in range(12)
+        ]
+        TournamentFactory(public=False, start_date=start_date + timedelta(days=3))
+        visible = sorted((tournament for tournament in tournaments if tournament.public or tournament.owner == user),
+                         key=lambda tournament: (tournament.start_date, tournament.id), reverse=True)
+
+        assert Tournament.get_all_visible(user, db) == visible
+        assert Tournament.get_all_visible(user, db, skip=2, limit=3) == visible[2:5]
+        last = visible[4]
+        assert Tournament.get_all_visible(user, db, limit=3, after=(last.start_date, last.id)) == visible[5:8]
+
     def test_delete_stages_no_stages_is_a_noop(self, db):
         tournament: Tournament = TournamentFactory()
         tournament.delete_stages(db)
@@ -47,6 +90,7 @@ class TestTournament(DatabaseAwareTest):
     def test_delete_competitors_autocommit_is_false_no_changes(self, db):
         tournament: Tournament = TournamentFactory(competitors=10)
         tournament.delete_competitors(db, autocommit=False)
+        db.rollback()
 
         assert len(tournament.competitors) == 10
 
@@ -210,6 +254,37 @@ class TestStage(DatabaseAwareTest):
         # Verify that the status was not altered
         assert stage.status == Stage.StageStatus.COMPLETE
 
+    def _count_statements_to_complete(self, db, num_competitors: int) -> List[str]:
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4})
+        CompetitorFactory.create_batch(num_competitors, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        db.query(Match).update({Match.status: Match.MatchStatus.COMPLETE})
+        # Start from a stage that hasn't loaded its pools or matches, like a request would
+        db.expire_all()
+
+        statements = []
+
+        def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+            statements.append(statement)
+
+        event.listen(db.bind, 'before_cursor_execute', record)
+        try:
+            stage.progress(db, autocommit=False)
+        finally:
+            event.remove(db.bind, 'before_cursor_execute', record)
+
+        assert stage.status == Stage.StageStatus.COMPLETE
+        return statements
+
+    def test_progress_active_reads_the_stage_counters_whatever_the_stage_size(self, db):
+        small = self._count_statements_to_complete(db, 4)
+        large = self._count_statements_to_complete(db, 200)
+
+        assert len(small) == len(large)
+        assert not [statement for statement in large if 'FROM match' in statement or 'FROM pool' in statement]
+        # Loading the expired stage, then reading its counters
+        assert len(large) == 2
+
     def test_all_matches_complete_no_matches_raises_exception(self, db):
         stage: Stage = StageFactory(params={'minimum_pool_size': 2})
         CompetitorFactory.create_batch(2, tournament=stage.tournament)
@@ -241,3 +316,326 @@ class TestStage(DatabaseAwareTest):
         db.query(Match).update({Match.status: Match.MatchStatus.COMPLETE})
 
         assert stage.all_matches_complete()
+
+
+# noinspection PyMethodMayBeStatic
+class TestMatchCounts(DatabaseAwareTest):
+    def _counts(self, db, model, model_id: int) -> Tuple[int, int, int, int]:
+        return db.query(model.match_count, model.pending_match_count, model.active_match_count,
+                        model.complete_match_count).filter(model.id == model_id).one()
+
+    def _actual_counts(self, db, pool_ids: List[int]) -> Tuple[int, int, int, int]:
+        statuses = [status for status, in db.query(Match.status).filter(Match.pool_id.in_(pool_ids))]
+        return (len(statuses), statuses.count(Match.MatchStatus.PENDING), statuses.count(Match.MatchStatus.ACTIVE),
+                statuses.count(Match.MatchStatus.COMPLETE))
+
+    def _assert_counts_match(self, db, stage: Stage):
+        pool_ids = [pool_id for pool_id, in db.query(Pool.id).filter(Pool.stage_id == stage.id)]
+        for pool_id in pool_ids:
+            assert self._counts(db, Pool, pool_id) == self._actual_counts(db, [pool_id])
+        assert self._counts(db, Stage, stage.id) == self._actual_counts(db, pool_ids)
+
+    @pytest.fixture
+    def stage(self, db) -> Stage:
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4})
+        CompetitorFactory.create_batch(12, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        return stage
+
+    def test_generating_matches_counts_them(self, db, stage):
+        assert self._counts(db, Stage, stage.id) == (18, 18, 0, 0)
+        self._assert_counts_match(db, stage)
+
+    def test_updating_a_match_moves_it_between_counts(self, db, stage):
+        match = stage.pools[0].matches[0]
+        match.update(MatchUpdate(competitor_1_score=0, competitor_2_score=0, status=Match.MatchStatus.ACTIVE), db)
+        assert self._counts(db, Stage, stage.id) == (18, 17, 1, 0)
+
+        match.update(MatchUpdate(competitor_1_score=1, competitor_2_score=0, status=Match.MatchStatus.COMPLETE), db)
+        assert self._counts(db, Stage, stage.id) == (18, 17, 0, 1)
+        self._assert_counts_match(db, stage)
+
+    def test_bulk_changes_are_counted(self, db, stage):
+        first_pool_id = stage.pools[0].id
+        db.query(Match).filter(Match.pool_id == first_pool_id).update({Match.status: Match.MatchStatus.COMPLETE})
+        db.query(Match).filter(Match.pool_id == stage.pools[1].id).delete()
+        db.commit()
+
+        assert self._counts(db, Pool, first_pool_id) == (6, 0, 0, 6)
+        assert self._counts(db, Stage, stage.id) == (12, 6, 0, 6)
+        self._assert_counts_match(db, stage)
+
+    def test_repair_match_counts_fixes_counters_that_drifted(self, db, stage):
+        db.query(Pool).filter(Pool.id == stage.pools[0].id).update({Pool.match_count: 0, Pool.pending_match_count: 3})
+        db.query(Stage).filter(Stage.id == stage.id).update({Stage.complete_match_count: 5})
+        db.commit()
+
+        assert Stage.repair_match_counts(db) == 2
+        self._assert_counts_match(db, stage)
+        assert Stage.repair_match_counts(db) == 0
+
+
+# noinspection PyMethodMayBeStatic
+class TestStandings(DatabaseAwareTest):
+    def test_standings_rank_each_pool_from_a_single_query(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4})
+        CompetitorFactory.create_batch(12, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        # The lower id wins every match but the last of each pool, which is still to be played
+        for pool in stage.pools:
+            for match in pool.matches[:-1]:
+                match.competitor_1_score, match.competitor_2_score = \
+                    (4, 1) if match.competitor_1_id < match.competitor_2_id else (1, 4)
+                match.status = Match.MatchStatus.COMPLETE
+        db.commit()
+        db.refresh(stage)
+
+        statements = []
+
+        def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+            statements.append(statement)
+
+        event.listen(db.bind, 'before_cursor_execute', record)
+        try:
+            standings = stage.standings(db)
+        finally:
+            event.remove(db.bind, 'before_cursor_execute', record)
+
+        assert len(statements) == 1
+        assert list(standings) == [pool.id for pool in stage.pools]
+        for pool in stage.pools:
+            pool_standings = standings[pool.id]
+            competitor_ids = {m.competitor_1_id for m in pool.matches} | {m.competitor_2_id for m in pool.matches}
+            assert {standing.competitor_id for standing in pool_standings} == competitor_ids
+            assert [standing.place for standing in pool_standings] == [1, 2, 3, 4]
+            assert sum(standing.played for standing in pool_standings) == 2 * (len(pool.matches) - 1)
+            assert sum(standing.differential for standing in pool_standings) == 0
+            assert pool_standings[0].competitor_id == min(competitor_ids)
+
+    def test_stage_without_matches_has_no_standings(self, db):
+        stage: Stage = StageFactory()
+
+        assert stage.standings(db) == {}
+
+
+class TestLazyStage(DatabaseAwareTest):
+    @pytest.fixture
+    def stage(self, db) -> Stage:
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4, 'lazy': True})
+        CompetitorFactory.create_batch(9, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        return stage
+
+    def _complete(self, matches: List[Match], db):
+        for match in matches:
+            match.update(MatchUpdate(competitor_1_score=1, competitor_2_score=0, status=Match.MatchStatus.COMPLETE),
+                         db, autocommit=False)
+        db.commit()
+
+    def test_progress_only_creates_the_first_round(self, db, stage):
+        assert stage.status == Stage.StageStatus.ACTIVE
+        # Pools of 5 and 4 have 5 and 3 rounds
+        assert stage.schedule is not None
+        assert sorted(len(competitor_ids) for competitor_ids in stage.schedule) == [4, 5]
+        assert stage.total_rounds == 5
+        assert stage.materialized_rounds == 1
+        assert stage.pending_rounds == 4
+        assert [len(pool.matches) for pool in stage.pools] == [2, 2]
+        assert {match.round for pool in stage.pools for match in pool.matches} == {0}
+
+    def test_all_matches_complete_accounts_for_pending_rounds(self, db, stage):
+        db.query(Match).update({Match.status: Match.MatchStatus.COMPLETE})
+
+        assert stage.materialized_matches_complete()
+        assert not stage.all_matches_complete()
+
+    def test_completing_a_round_creates_the_next_one(self, db, stage):
+        first_round = [match for pool in stage.pools for match in pool.matches]
+        self._complete(first_round[:-1], db)
+        assert stage.materialized_rounds == 1
+
+        self._complete(first_round[-1:], db)
+        assert stage.materialized_rounds == 2
+        matches = [match for pool in stage.pools for match in pool.matches]
+        assert len(matches) == 8
+        assert sorted(match.ordinal for match in matches) == list(range(8))
+        assert {match.round for match in matches if match not in first_round} == {1}
+
+    def test_lazy_rounds_match_eager_generation(self, db, stage):
+        while stage.pending_rounds:
+            stage.materialize_next_round(db, autocommit=True)
+
+        for pool, competitor_ids in zip(stage.pools, stage.schedule):
+            num_competitors = len(competitor_ids)
+            assert len(pool.matches) == num_competitors * (num_competitors - 1) // 2
+            pairings = {(match.competitor_1_id, match.competitor_2_id) for match in pool.matches}
+            assert len(pairings) == len(pool.matches)
+
+        with pytest.raises(TournamentError):
+            stage.materialize_next_round(db, autocommit=True)
+
+    def test_concurrent_rounds_wait_for_each_other(self, db, stage):
+        # Both requests have loaded the stage before either creates a round
+        other_db = conftest.session_local()
+        other_stage = other_db.query(Stage).filter(Stage.id == stage.id).one()
+        assert other_stage.materialized_rounds == 1
+
+        stage.materialize_next_round(db, autocommit=False)
+        other = Thread(target=other_stage.materialize_next_round, args=(other_db,))
+        other.start()
+        try:
+            # The other request has to wait until this one is done with the stage
+            other.join(0.5)
+            assert other.is_alive()
+            db.commit()
+            other.join(10)
+            assert not other.is_alive()
+        finally:
+            other_db.close()
+
+        db.refresh(stage)
+        assert stage.materialized_rounds == 3
+        rounds = [match.round for pool in stage.pools for match in pool.matches]
+        assert sorted(set(rounds)) == [0, 1, 2]
+        assert len(rounds) == 12
+
+    def test_stage_completes_after_the_last_round(self, db, stage):
+        while stage.pending_rounds:
+            self._complete([match for pool in stage.pools for match in pool.matches if match.status != 2], db)
+        self._complete([match for pool in stage.pools for match in pool.matches if match.status != 2], db)
+
+        stage.progress(db, autocommit=True)
+
+        assert stage.status == Stage.StageStatus.COMPLETE
+
+
+# noinspection PyMethodMayBeStatic
+class TestStageScheduling(DatabaseAwareTest):
+    def _assert_no_conflicts(self, matches: List[Match]):
+        courts = set()
+        competitor_slots = set()
+        for match in matches:
+            assert (match.court, match.slot) not in courts
+            courts.add((match.court, match.slot))
+            for competitor_id in (match.competitor_1_id, match.competitor_2_id):
+                if competitor_id is not None:
+                    assert (competitor_id, match.slot) not in competitor_slots
+                    competitor_slots.add((competitor_id, match.slot))
+
+    def test_stages_without_courts_are_not_scheduled(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4})
+        CompetitorFactory.create_batch(4, tournament=stage.tournament)
+
+        stage.progress(db, autocommit=True)
+
+        assert all(match.court is None and match.slot is None for match in stage.pools[0].matches)
+
+    def test_progress_schedules_every_match(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 5, 'courts': 2})
+        CompetitorFactory.create_batch(10, tournament=stage.tournament)
+
+        stage.progress(db, autocommit=True)
+
+        matches = [match for pool in stage.pools for match in pool.matches]
+        assert len(matches) == 20
+        assert all(match.court in (0, 1) for match in matches)
+        self._assert_no_conflicts(matches)
+        # Two pools of five can keep both courts busy the whole time
+        assert max(match.slot for match in matches) == 9
+
+    def test_rest_is_rounded_up_to_whole_slots(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4, 'courts': 2, 'match_duration': 20,
+                                            'minimum_rest': 30})
+        CompetitorFactory.create_batch(4, tournament=stage.tournament)
+
+        stage.progress(db, autocommit=True)
+
+        last_slot = {}
+        for match in sorted(stage.pools[0].matches, key=lambda m: m.slot):
+            for competitor_id in (match.competitor_1_id, match.competitor_2_id):
+                if competitor_id in last_slot:
+                    assert match.slot - last_slot[competitor_id] > 2
+                last_slot[competitor_id] = match.slot
+
+    def test_competitor_rest_is_respected(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4, 'courts': 2})
+        resting = CompetitorFactory(tournament=stage.tournament, minimum_rest=60)
+        CompetitorFactory.create_batch(3, tournament=stage.tournament)
+
+        stage.progress(db, autocommit=True)
+
+        slots = sorted(match.slot for match in stage.pools[0].matches if resting.id in
+                       (match.competitor_1_id, match.competitor_2_id))
+        assert all(later - earlier > 2 for earlier, later in zip(slots, slots[1:]))
+
+    def test_starting_a_match_early_does_not_move_the_current_slot(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 4, 'courts': 2})
+        CompetitorFactory.create_batch(8, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        matches = sorted((match for pool in stage.pools for match in pool.matches), key=lambda m: (m.slot, m.court))
+        first, second = matches[:2]
+
+        def competitors(match: Match) -> set:
+            return {match.competitor_1_id, match.competitor_2_id}
+
+        # A later match gets started early, while the first slot is still being played
+        first.update(MatchUpdate(status=Match.MatchStatus.ACTIVE), db)
+        early = next(match for match in reversed(matches)
+                     if match.slot > 1 and not competitors(match) & (competitors(first) | competitors(second)))
+        early_court, early_slot = early.court, early.slot
+        second_court, second_slot = second.court, second.slot
+        early.update(MatchUpdate(status=Match.MatchStatus.ACTIVE), db)
+
+        db.refresh(second)
+        assert (early.court, early.slot) == (early_court, early_slot)
+        assert (second.court, second.slot) == (second_court, second_slot)
+        self._assert_no_conflicts(matches)
+
+    def test_results_only_move_matches_that_have_not_been_played(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 5, 'courts': 2})
+        CompetitorFactory.create_batch(5, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        matches = sorted(stage.pools[0].matches, key=lambda m: (m.slot, m.court))
+
+        # The first slot finishes and the next one starts without the second match of the first slot being played
+        matches[0].update(MatchUpdate(status=Match.MatchStatus.COMPLETE), db)
+        late = matches[2]
+        late.update(MatchUpdate(status=Match.MatchStatus.ACTIVE), db)
+        late_court, late_slot = late.court, late.slot
+        skipped = matches[1]
+
+        db.refresh(skipped)
+        assert (late.court, late.slot) == (late_court, late_slot)
+        assert skipped.slot >= late_slot
+        self._assert_no_conflicts(matches)
+
+    def test_only_status_changes_reschedule(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 5, 'courts': 2})
+        CompetitorFactory.create_batch(5, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+        matches = sorted(stage.pools[0].matches, key=lambda m: (m.slot, m.court))
+        first, last = matches[0], matches[-1]
+        first.update(MatchUpdate(status=Match.MatchStatus.ACTIVE), db)
+        # Leaves a gap the scheduler would close
+        last.slot += 10
+        db.commit()
+
+        first.update(MatchUpdate(competitor_1_score=1, competitor_2_score=0, status=Match.MatchStatus.ACTIVE), db)
+        db.refresh(last)
+        assert last.slot > 10
+
+        first.update(MatchUpdate(competitor_1_score=2, competitor_2_score=0, status=Match.MatchStatus.COMPLETE), db)
+        db.refresh(last)
+        assert last.slot < 10
+
+    def test_bracket_matches_wait_for_their_feeders(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={'courts': 4})
+        CompetitorFactory.create_batch(8, tournament=stage.tournament)
+
+        stage.progress(db, autocommit=True)
+
+        matches = stage.pools[0].matches
+        self._assert_no_conflicts(matches)
+        for match in matches:
+            for feeder in match.feeder_matches:
+                assert feeder.slot < match.slot
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from database.models import Stage
+from lib.match_generators import bracket_templates
+from lib.match_generators.bracket_templates import get_bracket_template, clear_cache
+from lib.match_generators.brackets import single_elimination_template, double_elimination_template
+
+
+# noinspection PyMethodMayBeStatic
+class TestGetBracketTemplate:
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch):
+        monkeypatch.setattr(bracket_templates, 'cache_dir', None)
+        clear_cache()
+        yield
+        clear_cache()
+
+    def test_templates_match_the_builders(self):
+        assert get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, 12) == single_elimination_template(12)
+        assert get_bracket_template(Stage.StageType.BRACKET_DOUBLE_ELIMINATION, 12, False) == \
+            double_elimination_template(12, False)
+
+    def test_templates_are_cached(self):
+        template = get_bracket_template(Stage.StageType.BRACKET_DOUBLE_ELIMINATION, 64)
+
+        assert get_bracket_template(Stage.StageType.BRACKET_DOUBLE_ELIMINATION, 64) is template
+        assert get_bracket_template(Stage.StageType.BRACKET_DOUBLE_ELIMINATION, 64, False) is not template
+        assert get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, 64) is not template
+
+    def test_single_elimination_ignores_grand_final_reset(self):
+        template = get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, 16, True)
+
+        assert get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, 16, False) is template
+
+    def test_invalid_stage_type_raises_error(self):
+        with pytest.raises(ValueError):
+            get_bracket_template(Stage.StageType.POOL, 16)
+
+    def test_templates_are_persisted_to_disk(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(bracket_templates, 'cache_dir', str(tmp_path))
+
+        template = get_bracket_template(Stage.StageType.BRACKET_DOUBLE_ELIMINATION, 32)
+        assert len(os.listdir(tmp_path)) == 1
+
+        # A fresh process would only have the disk copy
+        clear_cache()
+        monkeypatch.setattr(bracket_templates, 'double_elimination_template', None)
+        assert get_bracket_template(Stage.StageType.BRACKET_DOUBLE_ELIMINATION, 32) == template
+
+    def test_corrupt_templates_on_disk_are_rebuilt(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(bracket_templates, 'cache_dir', str(tmp_path))
+        get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, 8)
+        path = os.path.join(tmp_path, os.listdir(tmp_path)[0])
+        with open(path, 'wb') as f:
+            f.write(b'not a template')
+
+        clear_cache()
+        assert get_bracket_template(Stage.StageType.BRACKET_SINGLE_ELIMINATION, 8) == single_elimination_template(8)
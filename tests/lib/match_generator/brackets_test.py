@@ -0,0 +1,142 @@
+import pytest
+
+from lib.match_generators.brackets import bracket_size, seed_order, single_elimination_template, BracketTemplate, \
+    double_elimination_template, WINNERS_POOL, LOSERS_POOL, FINALS_POOL
+
+
+def _seeds_in_template(template: BracketTemplate):
+    return sorted(seed for seeds in (template.seed_1, template.seed_2) for seed in seeds if seed >= 0)
+
+
+def _feeder_counts(template: BracketTemplate):
+    counts = [0] * len(template)
+    for next_match in (*template.next_match, *template.loser_next_match):
+        if next_match >= 0:
+            counts[next_match] += 1
+    return counts
+
+
+def _assert_every_match_has_two_competitors(template: BracketTemplate):
+    feeder_counts = _feeder_counts(template)
+    for idx in range(len(template)):
+        seeded_slots = (template.seed_1[idx] >= 0) + (template.seed_2[idx] >= 0)
+        assert seeded_slots + feeder_counts[idx] == 2
+
+
+# noinspection PyMethodMayBeStatic
+class TestSeedOrder:
+    @pytest.mark.parametrize('num_competitors, expected_size', [(2, 2), (3, 4), (4, 4), (5, 8), (16, 16), (17, 32)])
+    def test_bracket_size(self, num_competitors, expected_size):
+        assert bracket_size(num_competitors) == expected_size
+
+    def test_bracket_size_too_few_competitors_raises_error(self):
+        with pytest.raises(ValueError):
+            bracket_size(1)
+
+    def test_standard_seed_placement(self):
+        assert seed_order(2) == [0, 1]
+        assert seed_order(4) == [0, 3, 1, 2]
+        assert seed_order(8) == [0, 7, 3, 4, 1, 6, 2, 5]
+
+    @pytest.mark.parametrize('size', [2, 4, 8, 16, 32])
+    def test_first_round_seeds_sum_to_size(self, size):
+        order = seed_order(size)
+        assert sorted(order) == list(range(size))
+        for idx in range(0, size, 2):
+            assert order[idx] + order[idx + 1] == size - 1
+
+
+# noinspection PyMethodMayBeStatic
+class TestSingleEliminationTemplate:
+    @pytest.mark.parametrize('num_competitors', [2, 3, 4, 5, 6, 7, 8, 13, 16, 17, 31, 32, 33])
+    def test_one_match_per_eliminated_competitor(self, num_competitors):
+        template = single_elimination_template(num_competitors)
+
+        assert len(template) == num_competitors - 1
+        assert _seeds_in_template(template) == list(range(num_competitors))
+
+    @pytest.mark.parametrize('num_competitors', [2, 3, 4, 5, 6, 7, 8, 13, 16, 17, 31, 32, 33])
+    def test_links_form_a_tree(self, num_competitors):
+        template = single_elimination_template(num_competitors)
+
+        # Only the final has no next match and every link points forward
+        assert list(template.next_match).count(-1) == 1
+        for idx, next_match in enumerate(template.next_match):
+            assert next_match == -1 or next_match > idx
+
+        # Every match has exactly two competitors, from seeds or from feeder matches
+        _assert_every_match_has_two_competitors(template)
+        assert list(template.loser_next_match) == [-1] * len(template)
+
+    def test_byes_go_to_the_top_seeds(self):
+        template = single_elimination_template(6)
+
+        # Seeds 0 and 1 have byes, so they only enter in the second round
+        first_round_seeds = {
+            seed
+            for idx in range(len(template))
+            for seed in (template.seed_1[idx], template.seed_2[idx])
+            if template.seed_1[idx] >= 0 and template.seed_2[idx] >= 0
+        }
+        assert first_round_seeds == {2, 3, 4, 5}
+
+    def test_ordinals_are_a_permutation(self):
+        template = single_elimination_template(13)
+
+        assert sorted(template.ordinal) == list(range(len(template)))
+        # Matches are always played after the matches that feed them
+        for idx, next_match in enumerate(template.next_match):
+            if next_match >= 0:
+                assert template.ordinal[idx] < template.ordinal[next_match]
+
+
+# noinspection PyMethodMayBeStatic
+class TestDoubleEliminationTemplate:
+    @pytest.mark.parametrize('num_competitors', [2, 3, 4, 5, 6, 7, 8, 13, 16, 17, 31, 32, 33])
+    def test_two_losses_to_be_eliminated(self, num_competitors):
+        template = double_elimination_template(num_competitors)
+
+        # Everyone but the champion loses twice, plus the reset
+        assert len(template) == 2 * num_competitors - 1
+        assert _seeds_in_template(template) == list(range(num_competitors))
+        _assert_every_match_has_two_competitors(template)
+
+    def test_no_reset(self):
+        template = double_elimination_template(8, grand_final_reset=False)
+
+        assert len(template) == 14
+        assert list(template.pool).count(FINALS_POOL) == 1
+
+    @pytest.mark.parametrize('num_competitors', [2, 3, 5, 8, 13, 32])
+    def test_routing(self, num_competitors):
+        template = double_elimination_template(num_competitors)
+
+        for idx in range(len(template)):
+            next_match, loser_next_match = template.next_match[idx], template.loser_next_match[idx]
+            # Every link points forward
+            assert next_match == -1 or next_match > idx
+            assert loser_next_match == -1 or loser_next_match > idx
+
+            if template.pool[idx] == WINNERS_POOL:
+                # Losing in the winners bracket drops a competitor into the losers bracket (or the grand final)
+                assert template.pool[loser_next_match] in (LOSERS_POOL, FINALS_POOL)
+            elif template.pool[idx] == LOSERS_POOL:
+                # Losing in the losers bracket is elimination
+                assert loser_next_match == -1
+                assert template.pool[next_match] in (LOSERS_POOL, FINALS_POOL)
+
+        # The grand final feeds both competitors into the reset, which is the last match
+        grand_final, reset = [idx for idx in range(len(template)) if template.pool[idx] == FINALS_POOL]
+        assert (template.next_match[grand_final], template.next_slot[grand_final]) == (reset, 1)
+        assert (template.loser_next_match[grand_final], template.loser_next_slot[grand_final]) == (reset, 2)
+        assert template.next_match[reset] == -1
+        assert template.ordinal[reset] == len(template) - 1
+
+    def test_ordinals_follow_dependencies(self):
+        template = double_elimination_template(11)
+
+        assert sorted(template.ordinal) == list(range(len(template)))
+        for idx in range(len(template)):
+            for next_match in (template.next_match[idx], template.loser_next_match[idx]):
+                if next_match >= 0:
+                    assert template.ordinal[idx] < template.ordinal[next_match]
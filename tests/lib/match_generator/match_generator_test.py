@@ -2,10 +2,12 @@ import itertools
 from typing import Sequence, Tuple, Set
 
 import pytest
+from sqlalchemy import event
 
 from database.models import Stage, Competitor, Pool, Match
+from lib.match_generators.ordering import minimum_rest
 from lib.match_generators.match_generator import PoolMatchGenerator, MatchGenerator, \
-    SingleEliminationBracketMatchGenerator, DoubleEliminationBracketMatchGenerator
+    SingleEliminationBracketMatchGenerator, DoubleEliminationBracketMatchGenerator, SwissMatchGenerator
 from tests.factories import StageFactory, CompetitorFactory
 from tests.utils import DatabaseAwareTest
 
@@ -33,6 +35,11 @@ class TestMatchGenerator(DatabaseAwareTest):
         mg = MatchGenerator.get_match_generator(stage)
         assert isinstance(mg, DoubleEliminationBracketMatchGenerator)
 
+    def test_get_match_generator_swiss_stage_type_returns_correctly(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.SWISS)
+        mg = MatchGenerator.get_match_generator(stage)
+        assert isinstance(mg, SwissMatchGenerator)
+
 
 # noinspection PyMethodMayBeStatic
 class TestPoolMatchGenerator(DatabaseAwareTest):
@@ -116,6 +123,76 @@ class TestPoolMatchGenerator(DatabaseAwareTest):
         actual_ordinals = [match.ordinal for pool in stage.pools for match in pool.matches]
         assert actual_ordinals == list(range(40))
 
+    def test_matches_are_ordered_for_rest(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 8})
+        CompetitorFactory.create_batch(8, tournament=stage.tournament)
+
+        pmg = PoolMatchGenerator(stage)
+        pmg.generate_matches(db, autocommit=True)
+
+        # Make sure nobody in the pool has to play back to back
+        pairings = [(match.competitor_1_id, match.competitor_2_id) for match in stage.pools[0].matches]
+        assert len(pairings) == 28
+        assert minimum_rest(pairings) >= 1
+
+    def test_pools_and_matches_are_inserted_in_bulk(self, db):
+        stage: Stage = StageFactory()
+        CompetitorFactory.create_batch(40, tournament=stage.tournament)
+        # Load the competitors up front so only the generator's own statements are counted
+        assert len(stage.tournament.competitors) == 40
+
+        inserts = []
+
+        def count_inserts(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT'):
+                inserts.append(statement)
+
+        event.listen(db.bind, 'before_cursor_execute', count_inserts)
+        try:
+            pmg = PoolMatchGenerator(stage)
+            pmg.generate_matches(db, autocommit=True)
+        finally:
+            event.remove(db.bind, 'before_cursor_execute', count_inserts)
+
+        # One INSERT for all the pools and one for all the matches
+        assert len(inserts) == 2
+        assert len(stage.pools) == 8
+        assert sum(len(pool.matches) for pool in stage.pools) == 80
+
+    def test_seeded_pools_are_snake_seeded_by_rating(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 3, 'seeded': True})
+        competitors: Sequence[Competitor] = [
+            CompetitorFactory(tournament=stage.tournament, rating=rating) for rating in range(6)
+        ]
+
+        pmg = PoolMatchGenerator(stage)
+        pmg.generate_matches(db, autocommit=True)
+
+        ratings = {competitor.id: competitor.rating for competitor in competitors}
+
+        def pool_ratings(pool: Pool):
+            return {ratings[competitor_id]
+                    for m in pool.matches for competitor_id in (m.competitor_1_id, m.competitor_2_id)}
+
+        assert pool_ratings(stage.pools[0]) == {5, 2, 1}
+        assert pool_ratings(stage.pools[1]) == {4, 3, 0}
+
+    def test_organizations_are_spread_across_pools(self, db):
+        stage: Stage = StageFactory(params={'minimum_pool_size': 3, 'spread_organizations': True})
+        competitors: Sequence[Competitor] = \
+            CompetitorFactory.create_batch(3, tournament=stage.tournament, organization='Club A') + \
+            CompetitorFactory.create_batch(3, tournament=stage.tournament, organization='Club B')
+
+        pmg = PoolMatchGenerator(stage)
+        pmg.generate_matches(db, autocommit=True)
+
+        organizations = {competitor.id: competitor.organization for competitor in competitors}
+        for pool in stage.pools:
+            pool_organizations = [organizations[competitor_id]
+                                  for competitor_id in {m.competitor_1_id for m in pool.matches} |
+                                  {m.competitor_2_id for m in pool.matches}]
+            assert sorted(pool_organizations) in (['Club A', 'Club A', 'Club B'], ['Club A', 'Club B', 'Club B'])
+
     def test_invalid_configuration_raises_error(self, db):
         stage: Stage = StageFactory(params={})
         CompetitorFactory.create_batch(3, tournament=stage.tournament)
@@ -140,3 +217,218 @@ class TestPoolMatchGenerator(DatabaseAwareTest):
         assert len(db.query(Pool).all()) == 0
         assert len(db.query(Match).all()) == 0
 
+
+# noinspection PyMethodMayBeStatic
+class TestSingleEliminationBracketMatchGenerator(DatabaseAwareTest):
+    def test_too_few_competitors_raises_error(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={})
+        CompetitorFactory.create_batch(1, tournament=stage.tournament)
+
+        mg = SingleEliminationBracketMatchGenerator(stage)
+        with pytest.raises(ValueError):
+            mg.generate_matches(db, autocommit=True)
+
+        # Make sure no pools or matches were created
+        assert len(db.query(Pool).all()) == 0
+        assert len(db.query(Match).all()) == 0
+
+    def test_power_of_two_field(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={'seeded': True})
+        competitors: Sequence[Competitor] = CompetitorFactory.create_batch(8, tournament=stage.tournament)
+
+        mg = SingleEliminationBracketMatchGenerator(stage)
+        mg.generate_matches(db, autocommit=True)
+
+        assert len(stage.pools) == 1
+        matches = stage.pools[0].matches
+        assert len(matches) == 7
+        assert [match.ordinal for match in matches] == list(range(7))
+
+        # The first round is fully populated using standard seed placement
+        seeds = {competitor.id: idx for idx, competitor in enumerate(sorted(competitors, key=lambda c: c.id))}
+        first_round = [(seeds[match.competitor_1_id], seeds[match.competitor_2_id]) for match in matches[:4]]
+        assert first_round == [(0, 7), (3, 4), (1, 6), (2, 5)]
+
+        # The later rounds are fed by the earlier ones
+        for match in matches[4:]:
+            assert match.competitor_1_id is None
+            assert match.competitor_2_id is None
+            assert sorted(feeder.next_match_competitor_slot for feeder in match.feeder_matches) == [1, 2]
+        assert matches[-1].next_match is None
+
+    def test_seeded_by_rating(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={'seeded': True})
+        competitors: Sequence[Competitor] = [
+            CompetitorFactory(tournament=stage.tournament, rating=rating) for rating in (10, 40, 20, 30)
+        ]
+
+        mg = SingleEliminationBracketMatchGenerator(stage)
+        mg.generate_matches(db, autocommit=True)
+
+        ratings = {competitor.id: competitor.rating for competitor in competitors}
+        first_round = [(ratings[m.competitor_1_id], ratings[m.competitor_2_id]) for m in stage.pools[0].matches[:2]]
+        assert first_round == [(40, 10), (30, 20)]
+
+    def test_seeded_from_the_previous_pool_stages_standings(self, db):
+        pool_stage: Stage = StageFactory(params={'minimum_pool_size': 4})
+        stage: Stage = StageFactory(tournament=pool_stage.tournament, ordinal=1,
+                                    type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={'seeded': True})
+        # Ratings are the reverse of how the pools will finish
+        competitors: Sequence[Competitor] = [
+            CompetitorFactory(tournament=stage.tournament, rating=rating) for rating in range(8)
+        ]
+        pool_stage.progress(db, autocommit=True)
+        # The lower id wins every match, so both pools finish in registration order with the same records
+        for pool in pool_stage.pools:
+            for match in pool.matches:
+                match.competitor_1_score, match.competitor_2_score = \
+                    (2, 1) if match.competitor_1_id < match.competitor_2_id else (1, 2)
+                match.status = Match.MatchStatus.COMPLETE
+        db.commit()
+
+        mg = SingleEliminationBracketMatchGenerator(stage)
+        mg.generate_matches(db, autocommit=True)
+
+        # Each place is seeded together, first pool first
+        pool_places = [sorted({m.competitor_1_id for m in pool.matches} | {m.competitor_2_id for m in pool.matches})
+                       for pool in pool_stage.pools]
+        expected_seeds = [pool[place] for place in range(4) for pool in pool_places]
+        seeds = {competitor_id: idx for idx, competitor_id in enumerate(expected_seeds)}
+        assert set(seeds) == {competitor.id for competitor in competitors}
+        first_round = [(seeds[m.competitor_1_id], seeds[m.competitor_2_id]) for m in stage.pools[0].matches[:4]]
+        assert first_round == [(0, 7), (3, 4), (1, 6), (2, 5)]
+
+    def test_byes_skip_the_first_round(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_SINGLE_ELIMINATION, params={'seeded': True})
+        competitors: Sequence[Competitor] = CompetitorFactory.create_batch(5, tournament=stage.tournament)
+        top_seed, *_ = sorted(competitors, key=lambda c: c.id)
+
+        mg = SingleEliminationBracketMatchGenerator(stage)
+        mg.generate_matches(db, autocommit=True)
+
+        matches = stage.pools[0].matches
+        assert len(matches) == 4
+
+        # Only the 4th and 5th seeds play in the first round, and the winner faces the top seed
+        play_in = matches[0]
+        assert play_in.next_match.competitor_1_id == top_seed.id
+        assert play_in.next_match_competitor_slot == 2
+
+
+# noinspection PyMethodMayBeStatic
+class TestDoubleEliminationBracketMatchGenerator(DatabaseAwareTest):
+    def test_too_few_competitors_raises_error(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_DOUBLE_ELIMINATION, params={})
+        CompetitorFactory.create_batch(1, tournament=stage.tournament)
+
+        mg = DoubleEliminationBracketMatchGenerator(stage)
+        with pytest.raises(ValueError):
+            mg.generate_matches(db, autocommit=True)
+
+        # Make sure no pools or matches were created
+        assert len(db.query(Pool).all()) == 0
+        assert len(db.query(Match).all()) == 0
+
+    @pytest.mark.parametrize('grand_final_reset, expected_finals', [(True, 2), (False, 1)])
+    def test_brackets_are_generated_and_linked(self, db, grand_final_reset, expected_finals):
+        stage: Stage = StageFactory(type=Stage.StageType.BRACKET_DOUBLE_ELIMINATION,
+                                    params={'seeded': True, 'grand_final_reset': grand_final_reset})
+        CompetitorFactory.create_batch(8, tournament=stage.tournament)
+
+        mg = DoubleEliminationBracketMatchGenerator(stage)
+        mg.generate_matches(db, autocommit=True)
+
+        # Winners, losers and finals pools
+        assert [len(pool.matches) for pool in stage.pools] == [7, 6, expected_finals]
+        all_matches = [match for pool in stage.pools for match in pool.matches]
+        assert sorted(match.ordinal for match in all_matches) == list(range(13 + expected_finals))
+
+        winners, losers, finals = stage.pools
+        for match in winners.matches:
+            assert match.loser_next_match.pool in (losers, finals)
+        for match in losers.matches:
+            assert match.loser_next_match is None
+            assert match.next_match.pool in (losers, finals)
+
+        grand_final = finals.matches[0]
+        assert {feeder.pool for feeder in grand_final.feeder_matches} == {winners, losers}
+        if grand_final_reset:
+            reset = finals.matches[1]
+            assert grand_final.next_match == reset
+            assert grand_final.loser_next_match == reset
+        else:
+            assert grand_final.next_match is None
+            assert grand_final.loser_next_match is None
+
+
+# noinspection PyMethodMayBeStatic
+class TestSwissMatchGenerator(DatabaseAwareTest):
+    def test_too_few_competitors_raises_error(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.SWISS, params={})
+        CompetitorFactory.create_batch(1, tournament=stage.tournament)
+
+        mg = SwissMatchGenerator(stage)
+        with pytest.raises(ValueError):
+            mg.generate_matches(db, autocommit=True)
+
+        assert len(db.query(Pool).all()) == 0
+        assert len(db.query(Match).all()) == 0
+
+    def test_too_many_rounds_raises_error(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.SWISS, params={'num_rounds': 4})
+        CompetitorFactory.create_batch(4, tournament=stage.tournament)
+
+        mg = SwissMatchGenerator(stage)
+        with pytest.raises(ValueError):
+            mg.generate_matches(db, autocommit=True)
+
+    def test_first_round_is_seeded_and_gives_a_bye(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.SWISS, params={'seeded': True})
+        competitors = [CompetitorFactory(tournament=stage.tournament, rating=rating) for rating in range(7)]
+        by_seed = sorted(competitors, key=lambda competitor: -competitor.rating)
+
+        mg = SwissMatchGenerator(stage)
+        mg.generate_matches(db, autocommit=True)
+
+        pool, = stage.pools
+        assert stage.total_rounds == 3
+        assert stage.pending_rounds == 2
+        # Top half plays bottom half, and the lowest seed has the bye
+        assert [(match.competitor_1, match.competitor_2) for match in pool.matches] == [
+            (by_seed[0], by_seed[3]),
+            (by_seed[1], by_seed[4]),
+            (by_seed[2], by_seed[5]),
+            (by_seed[6], None),
+        ]
+        bye = pool.matches[-1]
+        assert bye.status == Match.MatchStatus.COMPLETE
+        assert {match.round for match in pool.matches} == {0}
+
+    def test_later_rounds_pair_by_score_without_rematches(self, db):
+        stage: Stage = StageFactory(type=Stage.StageType.SWISS, params={'seeded': True, 'num_rounds': 3})
+        CompetitorFactory.create_batch(8, tournament=stage.tournament)
+        stage.progress(db, autocommit=True)
+
+        for round_index in range(3):
+            pool, = stage.pools
+            round_matches = [match for match in pool.matches if match.round == round_index]
+            assert len(round_matches) == 4
+
+            scores = {}
+            for match in pool.matches:
+                if match.status == Match.MatchStatus.COMPLETE:
+                    scores[match.competitor_1_id] = scores.get(match.competitor_1_id, 0) + 1
+            for match in round_matches:
+                # Competitor 1 always wins, so everyone in a pairing has the same number of wins
+                assert scores.get(match.competitor_1_id, 0) == scores.get(match.competitor_2_id, 0)
+                match.status = Match.MatchStatus.COMPLETE
+                match.competitor_1_score = 1
+                match.competitor_2_score = 0
+            db.flush()
+            stage.materialize_next_round_if_ready(db)
+
+        pool, = stage.pools
+        assert len(pool.matches) == 12
+        pairings = {frozenset((match.competitor_1_id, match.competitor_2_id)) for match in pool.matches}
+        assert len(pairings) == 12
+        assert stage.all_matches_complete()
@@ -0,0 +1,37 @@
+import pytest
+
+from lib.match_generators.ordering import order_for_rest, minimum_rest
+from lib.match_generators.round_robin import round_robin_rounds, round_robin_pairings
+
+
+# noinspection PyMethodMayBeStatic
+class TestOrderForRest:
+    @pytest.mark.parametrize('num_competitors', range(2, 21))
+    def test_all_pairings_are_kept(self, num_competitors):
+        competitor_ids = list(range(num_competitors))
+
+        ordered = order_for_rest(round_robin_rounds(competitor_ids))
+
+        assert sorted(ordered) == sorted(round_robin_pairings(competitor_ids))
+
+    @pytest.mark.parametrize('num_competitors', range(5, 21))
+    def test_nobody_plays_back_to_back(self, num_competitors):
+        ordered = order_for_rest(round_robin_rounds(list(range(num_competitors))))
+
+        assert minimum_rest(ordered) >= 1
+
+    def test_rest_grows_with_pool_size(self):
+        assert minimum_rest(order_for_rest(round_robin_rounds(list(range(8))))) >= 2
+        assert minimum_rest(order_for_rest(round_robin_rounds(list(range(12))))) >= 4
+
+    def test_ordering_is_deterministic(self):
+        competitor_ids = [17, 4, 9, 12, 3, 8, 21]
+
+        assert order_for_rest(round_robin_rounds(competitor_ids)) == order_for_rest(round_robin_rounds(competitor_ids))
+
+    def test_minimum_rest(self):
+        assert minimum_rest([]) == -1
+        assert minimum_rest([(1, 2), (3, 4)]) == -1
+        assert minimum_rest([(1, 2), (2, 3)]) == 0
+        assert minimum_rest([(1, 2), (3, 4), (1, 3)]) == 0
+        assert minimum_rest([(1, 2), (3, 4), (5, 6), (1, 3)]) == 1
@@ -0,0 +1,36 @@
+import pytest
+
+from lib.match_generators import parallel
+from lib.match_generators.parallel import schedule_pool, schedule_pools, shutdown_executor
+
+
+# noinspection PyMethodMayBeStatic
+class TestSchedulePools:
+    @pytest.fixture
+    def pool_competitor_ids(self):
+        return [list(range(start, start + 6 + start % 3)) for start in range(0, 400, 10)]
+
+    def test_serial_when_disabled(self, monkeypatch, pool_competitor_ids):
+        monkeypatch.setattr(parallel, 'workers', 0)
+        monkeypatch.setattr(parallel, 'threshold', 1)
+
+        assert schedule_pools(pool_competitor_ids) == [schedule_pool(ids) for ids in pool_competitor_ids]
+        assert parallel._executor is None
+
+    def test_serial_below_threshold(self, monkeypatch, pool_competitor_ids):
+        monkeypatch.setattr(parallel, 'workers', 2)
+        monkeypatch.setattr(parallel, 'threshold', len(pool_competitor_ids) + 1)
+
+        assert schedule_pools(pool_competitor_ids) == [schedule_pool(ids) for ids in pool_competitor_ids]
+        assert parallel._executor is None
+
+    def test_parallel_matches_serial(self, monkeypatch, pool_competitor_ids):
+        monkeypatch.setattr(parallel, 'workers', 2)
+        monkeypatch.setattr(parallel, 'threshold', 1)
+
+        try:
+            assert schedule_pools(pool_competitor_ids) == [schedule_pool(ids) for ids in pool_competitor_ids]
+            assert parallel._executor is not None
+        finally:
+            shutdown_executor()
+        assert parallel._executor is None
@@ -0,0 +1,76 @@
+from collections import Counter
+from typing import List
+
+import pytest
+
+from lib.match_generators.pool_assignment import PoolEntrant, assign_pools, sort_by_rating
+
+
+def _pool_sizes(pools: List[List[int]]):
+    return sorted(len(pool) for pool in pools)
+
+
+# noinspection PyMethodMayBeStatic
+class TestAssignPools:
+    def test_no_pools_raises_error(self):
+        with pytest.raises(ValueError):
+            assign_pools([PoolEntrant(1)], 0)
+
+    def test_unseeded_entrants_are_dealt_in_order(self):
+        entrants = [PoolEntrant(idx) for idx in range(7)]
+
+        assert assign_pools(entrants, 3) == [[0, 3, 6], [1, 4], [2, 5]]
+
+    def test_seeded_entrants_are_snake_seeded_by_rating(self):
+        entrants = [PoolEntrant(idx, rating=idx * 10) for idx in range(9)]
+
+        # Highest rated first, 8, 7, 6 then 5, 4, 3 snaking back
+        assert assign_pools(entrants, 3, seeded=True) == [[8, 3, 2], [7, 4, 1], [6, 5, 0]]
+
+    def test_unrated_entrants_are_seeded_last(self):
+        entrants = [PoolEntrant(0), PoolEntrant(1, rating=5), PoolEntrant(2, rating=7), PoolEntrant(3)]
+
+        assert [entrant.id for entrant in sort_by_rating(entrants)] == [2, 1, 0, 3]
+
+    @pytest.mark.parametrize('seeded', [True, False])
+    def test_organizations_are_spread_across_pools(self, seeded):
+        # Two large clubs and some independents, which would clump together if dealt in order
+        entrants = [PoolEntrant(idx, rating=100 - idx, organization='Club A') for idx in range(4)] + \
+                   [PoolEntrant(idx, rating=100 - idx, organization='Club B') for idx in range(4, 8)] + \
+                   [PoolEntrant(idx, rating=100 - idx) for idx in range(8, 12)]
+        organizations = {entrant.id: entrant.organization for entrant in entrants}
+
+        pools = assign_pools(entrants, 4, seeded=seeded, spread_organizations=True)
+
+        assert _pool_sizes(pools) == [3, 3, 3, 3]
+        for pool in pools:
+            counts = Counter(organizations[entrant_id] for entrant_id in pool if organizations[entrant_id])
+            assert counts == Counter({'Club A': 1, 'Club B': 1})
+
+    def test_seeded_spreading_keeps_one_entrant_per_tier_in_each_pool(self):
+        entrants = [PoolEntrant(idx, rating=100 - idx, organization='Club A' if idx < 6 else None) for idx in range(12)]
+
+        pools = assign_pools(entrants, 4, seeded=True, spread_organizations=True)
+
+        for pool in pools:
+            # Each pool gets one of the top 4, one of the next 4 and one of the last 4
+            assert sorted(entrant_id // 4 for entrant_id in pool) == [0, 1, 2]
+
+    @pytest.mark.parametrize('seeded', [True, False])
+    @pytest.mark.parametrize('spread_organizations', [True, False])
+    # A few large organizations have members in every pool, which is the worst case for spreading them
+    @pytest.mark.parametrize('num_organizations', [37, 3])
+    def test_large_fields_stay_balanced(self, seeded, spread_organizations, num_organizations):
+        entrants = [PoolEntrant(idx, rating=idx % 97, organization=f'Club {idx % num_organizations}')
+                    for idx in range(5000)]
+        organizations = {entrant.id: entrant.organization for entrant in entrants}
+
+        pools = assign_pools(entrants, 714, seeded=seeded, spread_organizations=spread_organizations)
+
+        assert sorted(entrant_id for pool in pools for entrant_id in pool) == list(range(5000))
+        sizes = _pool_sizes(pools)
+        assert sizes[-1] - sizes[0] <= 1
+        if spread_organizations:
+            for organization in {entrant.organization for entrant in entrants}:
+                counts = [sum(organizations[entrant_id] == organization for entrant_id in pool) for pool in pools]
+                assert max(counts) - min(counts) <= 1
@@ -0,0 +1,40 @@
+import itertools
+
+import pytest
+
+from lib.match_generators.round_robin import num_rounds, round_robin_round, round_robin_rounds, round_robin_pairings
+
+
+# noinspection PyMethodMayBeStatic
+class TestRoundRobin:
+    @pytest.mark.parametrize('num_competitors, expected_rounds', [(0, 0), (1, 0), (2, 1), (5, 5), (6, 5), (7, 7)])
+    def test_num_rounds(self, num_competitors, expected_rounds):
+        assert num_rounds(num_competitors) == expected_rounds
+
+    @pytest.mark.parametrize('num_competitors', range(2, 21))
+    def test_every_pair_appears_exactly_once(self, num_competitors):
+        competitor_ids = [(idx * 7) % 23 + 100 for idx in range(num_competitors)]
+
+        pairings = round_robin_pairings(competitor_ids)
+
+        expected_pairings = {(c1, c2) for c1, c2 in itertools.combinations(sorted(competitor_ids), 2)}
+        assert len(pairings) == len(expected_pairings)
+        assert set(pairings) == expected_pairings
+
+    @pytest.mark.parametrize('num_competitors', range(2, 21))
+    def test_each_competitor_plays_at_most_once_per_round(self, num_competitors):
+        competitor_ids = list(range(num_competitors))
+
+        for round_pairings in round_robin_rounds(competitor_ids):
+            round_competitors = [competitor_id for pairing in round_pairings for competitor_id in pairing]
+            assert len(round_competitors) == len(set(round_competitors))
+            # Everyone plays except the one competitor with a bye in odd fields
+            assert len(round_competitors) == num_competitors - num_competitors % 2
+
+    def test_lower_id_is_always_first(self):
+        for c1, c2 in round_robin_pairings([9, 3, 7, 1, 5]):
+            assert c1 < c2
+
+    def test_out_of_range_round_raises_error(self):
+        with pytest.raises(ValueError):
+            round_robin_round([1, 2, 3, 4], 3)
@@ -0,0 +1,124 @@
+import random
+
+import pytest
+
+from lib.match_generators.swiss import SwissPlayer, swiss_pairings, default_num_rounds, rank
+
+
+def play_rounds(num_players: int, num_rounds: int, seed: int = 0):
+    """
+    Pairs num_rounds rounds with random results and returns the players and every pairing made.
+    """
+    rng = random.Random(seed)
+    players = {idx: SwissPlayer(idx, rating=rng.randrange(3000)) for idx in range(num_players)}
+    all_pairings = []
+    for _ in range(num_rounds):
+        pairings, bye = swiss_pairings(list(players.values()))
+        all_pairings.append((pairings, bye))
+        for competitor_1_id, competitor_2_id in pairings:
+            result = rng.choice([1, 0.5, 0])
+            player_1, player_2 = players[competitor_1_id], players[competitor_2_id]
+            players[competitor_1_id] = player_1._replace(score=player_1.score + result,
+                                                         opponents=player_1.opponents | {competitor_2_id})
+            players[competitor_2_id] = player_2._replace(score=player_2.score + 1 - result,
+                                                         opponents=player_2.opponents | {competitor_1_id})
+        if bye is not None:
+            players[bye] = players[bye]._replace(score=players[bye].score + 1, had_bye=True)
+    return players, all_pairings
+
+
+# noinspection PyMethodMayBeStatic
+class TestSwiss:
+    @pytest.mark.parametrize('num_competitors, expected_rounds', [(1, 0), (2, 1), (3, 2), (8, 3), (9, 4), (2000, 11)])
+    def test_default_num_rounds(self, num_competitors, expected_rounds):
+        assert default_num_rounds(num_competitors) == expected_rounds
+
+    def test_rank_by_score_then_rating(self):
+        players = [SwissPlayer(1, 1, None), SwissPlayer(2, 1, 100), SwissPlayer(3, 2, 50), SwissPlayer(4, 1, None)]
+
+        assert [player.id for player in rank(players)] == [3, 2, 1, 4]
+
+    def test_first_round_is_top_half_against_bottom_half(self):
+        players = [SwissPlayer(idx, rating=100 - idx) for idx in range(6)]
+
+        pairings, bye = swiss_pairings(players)
+
+        assert pairings == [(0, 3), (1, 4), (2, 5)]
+        assert bye is None
+
+    def test_players_only_meet_within_their_score_group_when_possible(self):
+        players = [SwissPlayer(idx, score=1 if idx < 4 else 0, rating=100 - idx) for idx in range(8)]
+
+        pairings, _ = swiss_pairings(players)
+
+        assert pairings == [(0, 2), (1, 3), (4, 6), (5, 7)]
+
+    def test_rematches_are_avoided(self):
+        players = [
+            SwissPlayer(0, 1, 4, frozenset({2})),
+            SwissPlayer(1, 1, 3),
+            SwissPlayer(2, 1, 2, frozenset({0})),
+            SwissPlayer(3, 1, 1),
+        ]
+
+        pairings, _ = swiss_pairings(players)
+
+        assert pairings == [(0, 3), (1, 2)]
+
+    def test_odd_player_floats_down(self):
+        players = [SwissPlayer(idx, score=1 if idx < 3 else 0, rating=100 - idx) for idx in range(6)]
+
+        pairings, _ = swiss_pairings(players)
+
+        assert pairings == [(0, 1), (2, 4), (3, 5)]
+
+    def test_bye_goes_to_lowest_ranked_player_without_one(self):
+        players = [SwissPlayer(0, 1, 3), SwissPlayer(1, 1, 2), SwissPlayer(2, 1, 1, had_bye=True)]
+
+        pairings, bye = swiss_pairings(players)
+
+        assert bye == 1
+        assert pairings == [(0, 2)]
+
+    def test_bottom_players_that_already_met_are_fixed_by_merging_groups(self):
+        # The last two can't play each other again, so the group above has to give one of them an opponent
+        players = [
+            SwissPlayer(0, 1, 4),
+            SwissPlayer(1, 1, 3),
+            SwissPlayer(2, 0, 2, frozenset({3})),
+            SwissPlayer(3, 0, 1, frozenset({2})),
+        ]
+
+        pairings, _ = swiss_pairings(players)
+
+        assert len(pairings) == 2
+        assert all({competitor_1_id, competitor_2_id} != {2, 3} for competitor_1_id, competitor_2_id in pairings)
+
+    @pytest.mark.parametrize('num_players', [2, 3, 7, 16, 33, 100])
+    @pytest.mark.parametrize('seed', range(5))
+    def test_everyone_plays_once_per_round_without_rematches(self, num_players, seed):
+        _, all_pairings = play_rounds(num_players, default_num_rounds(num_players), seed)
+
+        seen = set()
+        for pairings, bye in all_pairings:
+            round_players = [competitor_id for pairing in pairings for competitor_id in pairing]
+            if bye is not None:
+                round_players.append(bye)
+            assert sorted(round_players) == list(range(num_players))
+
+            for pairing in pairings:
+                assert frozenset(pairing) not in seen
+                seen.add(frozenset(pairing))
+
+    def test_nobody_gets_two_byes(self):
+        _, all_pairings = play_rounds(9, 8)
+
+        byes = [bye for _, bye in all_pairings]
+        assert len(set(byes)) == len(byes)
+
+    def test_large_field(self):
+        _, all_pairings = play_rounds(2000, default_num_rounds(2000))
+
+        pairings = [frozenset(pairing) for round_pairings, _ in all_pairings for pairing in round_pairings]
+        assert len(pairings) == 1000 * 11
+        assert len(set(pairings)) == len(pairings)
@@ -0,0 +1,59 @@
+import pytest
+
+from lib.roster_import import RosterReader, RosterError, RowError
+
+
+# noinspection PyMethodMayBeStatic
+class TestRosterReader:
+    def test_rows_are_written_in_copy_column_order(self):
+        roster = RosterReader(['rating,organization,last_name\n', '12, Club ,\n', ',,Smith\n'])
+
+        assert roster.read() == '2,,,Club,,12,\n3,,Smith,,,,\n'
+        assert roster.errors == []
+
+    def test_reads_in_chunks(self):
+        roster = RosterReader(['last_name\n'] + [f'Name {idx}\n' for idx in range(100)])
+
+        chunks = []
+        chunk = roster.read(16)
+        while chunk:
+            assert len(chunk) <= 16
+            chunks.append(chunk)
+            chunk = roster.read(16)
+
+        assert ''.join(chunks) == ''.join(f'{idx + 2},,Name {idx},,,,\n' for idx in range(100))
+
+    def test_rows_are_only_read_when_asked_for(self):
+        def lines():
+            yield 'last_name\n'
+            yield 'Smith\n'
+            raise AssertionError('Read past the first row')
+
+        roster = RosterReader(lines())
+
+        assert roster.read(4) == '2,,S'
+
+    def test_invalid_rows_are_recorded(self):
+        roster = RosterReader(['first_name,last_name,minimum_rest\n', 'Jane,,\n', 'John,Doe,-\n', 'Ann,Lee\n'])
+
+        assert roster.read() == ''
+        assert roster.errors == [
+            RowError(2, 'Competitors must have at least a last name or an organization'),
+            RowError(3, 'minimum_rest must be a whole number'),
+            RowError(4, 'Expected 3 fields but found 2'),
+        ]
+
+    def test_quoted_fields_keep_their_line_numbers(self):
+        roster = RosterReader(['organization,location\n', '"Club","Line 1\n', 'Line 2"\n', ',\n', 'Team,\n'])
+
+        assert roster.read() == '2,,,Club,"Line 1\nLine 2",,\n5,,,Team,,,\n'
+
+    @pytest.mark.parametrize('lines, message', [
+        ([], 'The roster is empty'),
+        (['first_name,team\n'], 'Unknown roster columns: team'),
+        (['last_name,Last_Name\n'], 'Roster columns can only appear once'),
+        (['first_name,rating\n'], 'Rosters need a last_name or an organization column'),
+    ])
+    def test_bad_header(self, lines, message):
+        with pytest.raises(RosterError, match=message):
+            RosterReader(lines)
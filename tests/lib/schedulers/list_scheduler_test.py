@@ -0,0 +1,99 @@
+import pytest
+
+from lib.match_generators.ordering import order_for_rest
+from lib.match_generators.round_robin import round_robin_rounds
+from lib.schedulers.list_scheduler import SchedulableMatch, Assignment, list_schedule
+
+
+def round_robin_matches(num_competitors: int):
+    pairings = order_for_rest(round_robin_rounds(list(range(num_competitors))))
+    return [SchedulableMatch(idx, idx, c1, c2) for idx, (c1, c2) in enumerate(pairings)]
+
+
+def assert_valid(matches, assignments, num_courts, rest_slots=0):
+    assert set(assignments) == {match.id for match in matches}
+
+    used = set()
+    last_slot = {}
+    for match in sorted(matches, key=lambda m: assignments[m.id].slot):
+        court, slot = assignments[match.id]
+        assert 0 <= court < num_courts
+        assert (court, slot) not in used
+        used.add((court, slot))
+        for competitor_id in (match.competitor_1_id, match.competitor_2_id):
+            if competitor_id in last_slot:
+                assert slot > last_slot[competitor_id] + rest_slots
+            last_slot[competitor_id] = slot
+
+
+# noinspection PyMethodMayBeStatic
+class TestListSchedule:
+    def test_no_courts_raises_error(self):
+        with pytest.raises(ValueError):
+            list_schedule([SchedulableMatch(0, 0, 1, 2)], 0)
+
+    def test_fills_courts_in_ordinal_order(self):
+        matches = [SchedulableMatch(idx, idx, idx * 2, idx * 2 + 1) for idx in range(5)]
+
+        assignments = list_schedule(matches, 2)
+
+        assert [assignments[idx] for idx in range(5)] == [
+            Assignment(0, 0), Assignment(1, 0), Assignment(0, 1), Assignment(1, 1), Assignment(0, 2),
+        ]
+
+    def test_competitors_never_play_twice_in_a_slot(self):
+        matches = [SchedulableMatch(0, 0, 1, 2), SchedulableMatch(1, 1, 1, 3), SchedulableMatch(2, 2, 4, 5)]
+
+        assignments = list_schedule(matches, 3)
+
+        # The match that doesn't involve competitor 1 moves up to fill the free court
+        assert assignments == {0: Assignment(0, 0), 1: Assignment(0, 1), 2: Assignment(1, 0)}
+
+    @pytest.mark.parametrize('num_competitors, num_courts, rest', [(5, 2, 0), (6, 3, 0), (8, 2, 1), (10, 4, 1)])
+    def test_round_robin_respects_courts_and_rest(self, num_competitors, num_courts, rest):
+        matches = round_robin_matches(num_competitors)
+
+        assignments = list_schedule(matches, num_courts, default_rest_slots=rest)
+
+        assert_valid(matches, assignments, num_courts, rest)
+
+    def test_competitor_rest_overrides_default(self):
+        matches = [SchedulableMatch(0, 0, 1, 2), SchedulableMatch(1, 1, 1, 3), SchedulableMatch(2, 2, 2, 3)]
+
+        assignments = list_schedule(matches, 1, rest_slots={1: 2})
+
+        # Competitor 1 sits out two slots, so the match between 2 and 3 goes first
+        assert assignments == {0: Assignment(0, 0), 2: Assignment(0, 1), 1: Assignment(0, 3)}
+
+    def test_matches_wait_for_their_feeders(self):
+        matches = [
+            SchedulableMatch(10, 0, 1, 2),
+            SchedulableMatch(11, 1, 3, 4),
+            SchedulableMatch(12, 2, feeder_ids=(10, 11)),
+            SchedulableMatch(13, 3, 5, 6),
+        ]
+
+        assignments = list_schedule(matches, 4, default_rest_slots=1)
+
+        assert assignments[10].slot == assignments[11].slot == assignments[13].slot == 0
+        assert assignments[12].slot == 2
+
+    def test_starts_after_the_occupied_slots(self):
+        matches = [SchedulableMatch(0, 0, 1, 2), SchedulableMatch(1, 1, 3, 4)]
+
+        assignments = list_schedule(matches, 2, start_slot=5, occupied={5: {0}}, available_from={3: 7})
+
+        assert assignments == {0: Assignment(1, 5), 1: Assignment(0, 7)}
+
+    def test_large_event(self):
+        matches = []
+        for pool in range(400):
+            matches += [match._replace(id=pool * 100 + match.id, competitor_1_id=pool * 10 + match.competitor_1_id,
+                                       competitor_2_id=pool * 10 + match.competitor_2_id)
+                        for match in round_robin_matches(5)]
+
+        assignments = list_schedule(matches, 40, default_rest_slots=1)
+
+        assert_valid(matches, assignments, 40, 1)
+        # Every court is busy until the last few slots
+        assert max(assignment.slot for assignment in assignments.values()) < len(matches) // 40 + 5
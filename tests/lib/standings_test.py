@@ -0,0 +1,123 @@
+from typing import Optional, Sequence, Tuple
+
+from lib.standings import MatchColumns, Standing, pool_standings, seed_from_standings
+
+# (pool id, competitor 1, competitor 2, score 1, score 2, complete)
+MatchRow = Tuple[int, Optional[int], Optional[int], Optional[int], Optional[int], bool]
+
+
+def columns(rows: Sequence[MatchRow]) -> MatchColumns:
+    return MatchColumns(*zip(*rows))
+
+
+def standing(competitor_id: int, place: int, score: float = 0, played: int = 1, differential: int = 0,
+             points_for: int = 0) -> Standing:
+    return Standing(competitor_id, place, played, 0, 0, 0, score, points_for, points_for - differential, differential,
+                    0)
+
+
+# noinspection PyMethodMayBeStatic
+class TestPoolStandings:
+    def test_tallies_results(self):
+        standings = pool_standings(columns([
+            (1, 10, 11, 5, 3, True),
+            (1, 11, 12, 2, 2, True),
+            (1, 12, 10, 4, 1, True),
+        ]))
+
+        assert standings == {1: [
+            Standing(12, 1, 2, 1, 1, 0, 1.5, 6, 3, 3, 0),
+            Standing(10, 2, 2, 1, 0, 1, 1.0, 6, 7, -1, 0),
+            Standing(11, 3, 2, 0, 1, 1, 0.5, 5, 7, -2, 0),
+        ]}
+
+    def test_only_complete_matches_count_but_everyone_is_ranked(self):
+        standings = pool_standings(columns([
+            (1, 10, 11, 5, 3, True),
+            (1, 12, 13, 9, 0, False),
+            (1, 10, 12, None, None, False),
+        ]))
+
+        assert [(s.competitor_id, s.played, s.wins) for s in standings[1]] == [(10, 1, 1), (12, 0, 0), (13, 0, 0),
+                                                                                 (11, 1, 0)]
+
+    def test_head_to_head_breaks_ties_before_differential(self):
+        # 10 and 11 both win twice, 11 has the better differential but lost to 10
+        standings = pool_standings(columns([
+            (1, 10, 11, 2, 1, True),
+            (1, 10, 12, 1, 0, True),
+            (1, 11, 12, 20, 0, True),
+            (1, 13, 10, 5, 0, True),
+            (1, 11, 13, 9, 0, True),
+            (1, 12, 13, 1, 0, True),
+        ]))
+
+        assert [(s.competitor_id, s.score, s.head_to_head) for s in standings[1]] == [
+            (10, 2, 1), (11, 2, 0), (12, 1, 1), (13, 1, 0),
+        ]
+        assert standings[1][1].differential > standings[1][0].differential
+
+    def test_three_way_ties_use_the_mini_league_then_differential_then_points_for(self):
+        # 10 beats 11, 11 beats 12, 12 beats 10, so the head to head is level and differential decides
+        standings = pool_standings(columns([
+            (1, 10, 11, 3, 0, True),
+            (1, 11, 12, 2, 0, True),
+            (1, 12, 10, 2, 1, True),
+            (2, 20, 21, 4, 2, True),
+            (2, 21, 22, 4, 2, True),
+            (2, 22, 20, 3, 1, True),
+        ]))
+
+        assert [s.competitor_id for s in standings[1]] == [10, 11, 12]
+        assert [s.head_to_head for s in standings[1]] == [1, 1, 1]
+        # All level on differential too, so most points for wins, and then the lowest id
+        assert [s.competitor_id for s in standings[2]] == [21, 20, 22]
+
+    def test_pools_keep_their_order(self):
+        standings = pool_standings(columns([
+            (7, 70, 71, 1, 0, True),
+            (3, 30, 31, 0, 1, True),
+            (5, 50, 51, 1, 1, True),
+        ]))
+
+        assert list(standings) == [7, 3, 5]
+        assert [[s.competitor_id for s in pool] for pool in standings.values()] == [[70, 71], [31, 30], [50, 51]]
+
+    def test_large_stage(self):
+        # 200 pools of 6, everyone beats the competitors with higher ids
+        rows = []
+        for pool_id in range(200):
+            competitor_ids = [pool_id * 6 + idx for idx in range(6)]
+            for idx_1, competitor_1_id in enumerate(competitor_ids):
+                for competitor_2_id in competitor_ids[idx_1 + 1:]:
+                    rows.append((pool_id, competitor_2_id, competitor_1_id, 0, 1, True))
+
+        standings = pool_standings(columns(rows))
+
+        assert len(standings) == 200
+        for pool_id, pool in standings.items():
+            assert [s.competitor_id for s in pool] == [pool_id * 6 + idx for idx in range(6)]
+            assert [s.wins for s in pool] == [5, 4, 3, 2, 1, 0]
+
+
+# noinspection PyMethodMayBeStatic
+class TestSeedFromStandings:
+    def test_seeds_by_place_then_record(self):
+        seeds = seed_from_standings([
+            [standing(1, 1, score=2, played=2), standing(2, 2, score=1, played=2), standing(3, 3, played=2)],
+            [standing(4, 1, score=3, played=3), standing(5, 2, score=2, played=3), standing(6, 3, played=3),
+             standing(7, 4, played=3)],
+            [standing(8, 1, score=2, played=2, differential=4), standing(9, 2, score=1, played=2, differential=1)],
+        ])
+
+        # 1, 4 and 8 won every match, 8 with the better differential. 5 won two of three, 2 and 9 one of two.
+        assert seeds == [8, 1, 4, 5, 9, 2, 3, 6, 7]
+
+    def test_ties_go_by_points_for_then_pool(self):
+        seeds = seed_from_standings([
+            [standing(1, 1, score=1, points_for=2)],
+            [standing(2, 1, score=1, points_for=5)],
+            [standing(3, 1, score=1, points_for=2)],
+        ])
+
+        assert seeds == [2, 1, 3]
@@ -0,0 +1,24 @@
+import asyncio
+
+from fastapi.routing import APIRoute
+
+from database.db import get_db
+from main import app
+
+
+def _dependencies(dependant):
+    for dependency in dependant.dependencies:
+        yield dependency
+        yield from _dependencies(dependency)
+
+
+def test_handlers_using_the_database_do_not_block_the_event_loop():
+    # SQLAlchemy blocks while it waits on the database, so these have to run on the threadpool rather than the loop
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        dependencies = list(_dependencies(route.dependant))
+        if any(dependency.call is get_db for dependency in dependencies):
+            assert not asyncio.iscoroutinefunction(route.endpoint), route.path
+            for dependency in dependencies:
+                assert not asyncio.iscoroutinefunction(dependency.call), (route.path, dependency.call)